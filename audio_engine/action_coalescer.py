@@ -0,0 +1,155 @@
+"""
+Coalescing dispatcher for continuous gestures, in front of VisionBridge.execute_action.
+
+A held pinch produces a zoom action for every frame that moves. Each one runs
+every action listener (a WebSocket broadcast) and callback, which floods the
+frontend with tiny steps. ActionCoalescer merges consecutive actions of the
+same kind and dispatches the result at a capped rate:
+
+    ZOOM_IN/ZOOM_OUT   factors multiply; the product is sent as ZOOM_IN (>= 1) or ZOOM_OUT
+    SCROLL_*           amounts add up per axis (left/right and up/down cancel)
+
+Merged actions are dispatched once `window` seconds have passed since the
+first of them, and never more often than `max_rate` per second; flush() sends
+whatever is pending at once (gesture end). Any other intent first flushes what
+is pending and is then dispatched immediately, so the order of actions is kept.
+
+It is not thread-safe: the gesture loop owns it and calls poll() between events,
+waiting at most wait_time() for the next one.
+"""
+
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from audio_engine import metrics
+
+logger = logging.getLogger("ActionCoalescer")
+
+ZOOM = "zoom"
+SCROLL = "scroll"
+
+_GROUPS = {"ZOOM_IN": ZOOM, "ZOOM_OUT": ZOOM,
+           "SCROLL_LEFT": SCROLL, "SCROLL_RIGHT": SCROLL, "SCROLL_UP": SCROLL, "SCROLL_DOWN": SCROLL}
+# Unit vector per scroll intent (x grows to the right, y downwards)
+_SCROLL_AXES = {"SCROLL_LEFT": (-1, 0), "SCROLL_RIGHT": (1, 0), "SCROLL_UP": (0, -1), "SCROLL_DOWN": (0, 1)}
+# Same defaults as VisionBridge.execute_action
+_DEFAULT_ZOOM = {"ZOOM_IN": 1.2, "ZOOM_OUT": 0.8}
+_DEFAULT_SCROLL = 50
+
+
+class _Pending:
+    def __init__(self, group: str, since: float):
+        self.group = group
+        self.since = since
+        self.count = 0
+        self.factor = 1.0
+        self.region = None
+        self.point = None
+        self.dx = 0.0
+        self.dy = 0.0
+
+    def add(self, intent: str, parameters: Dict[str, Any]):
+        self.count += 1
+        if self.group == ZOOM:
+            self.factor *= parameters.get("factor", _DEFAULT_ZOOM[intent])
+            self.region = parameters.get("region", self.region)
+            self.point = parameters.get("point", self.point)
+        else:
+            x, y = _SCROLL_AXES[intent]
+            amount = parameters.get("amount", _DEFAULT_SCROLL)
+            self.dx += x * amount
+            self.dy += y * amount
+
+    def actions(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """The merged action(s); empty if they cancel out."""
+        if self.group == ZOOM:
+            if abs(math.log(self.factor)) < 1e-3:
+                return []
+            parameters: Dict[str, Any] = {"factor": self.factor}
+            if self.region is not None:
+                parameters["region"] = self.region
+            if self.point is not None:
+                parameters["point"] = self.point
+            return [("ZOOM_IN" if self.factor >= 1.0 else "ZOOM_OUT", parameters)]
+        actions = []
+        if self.dx:
+            actions.append(("SCROLL_RIGHT" if self.dx > 0 else "SCROLL_LEFT", {"amount": abs(self.dx)}))
+        if self.dy:
+            actions.append(("SCROLL_DOWN" if self.dy > 0 else "SCROLL_UP", {"amount": abs(self.dy)}))
+        return actions
+
+
+class ActionCoalescer:
+    def __init__(self, execute: Callable[..., Any], window: float = 0.1, max_rate: float = 4.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param execute: Dispatches one action, called as execute(intent, parameters) (VisionBridge.execute_action).
+        :param window: Seconds over which consecutive zoom/scroll actions are merged.
+        :param max_rate: Most merged actions dispatched per second.
+        :param clock: Time source in seconds (benchmarks and tests pass a simulated one).
+        """
+        self.execute = execute
+        self.window = window
+        self.min_interval = 1.0 / max_rate
+        self.clock = clock
+        self._pending: Optional[_Pending] = None
+        self._last_dispatch = -math.inf
+        self.submitted = 0
+        self.dispatched = 0
+
+    def submit(self, intent: str, parameters: Optional[Dict[str, Any]] = None):
+        parameters = parameters or {}
+        self.submitted += 1
+        group = _GROUPS.get(intent)
+        if group is None:
+            self.flush()
+            self._dispatch(intent, parameters)
+            return
+        if self._pending is not None and self._pending.group != group:
+            self.flush()
+        if self._pending is None:
+            self._pending = _Pending(group, self.clock())
+        else:
+            metrics.GESTURE_ACTIONS.labels("merged").inc()
+        self._pending.add(intent, parameters)
+        self.poll()
+
+    def due(self) -> Optional[float]:
+        """Clock time at which the pending actions will be dispatched, or None."""
+        if self._pending is None:
+            return None
+        return max(self._pending.since + self.window, self._last_dispatch + self.min_interval)
+
+    def wait_time(self, idle: float) -> float:
+        """How long the caller may block before the next poll(); `idle` if nothing is pending."""
+        due = self.due()
+        if due is None:
+            return idle
+        return max(0.0, due - self.clock())
+
+    def poll(self) -> bool:
+        """Dispatch the pending actions if they are due. :return: True if anything was dispatched."""
+        due = self.due()
+        if due is None or self.clock() < due:
+            return False
+        self.flush()
+        return True
+
+    def flush(self):
+        """Dispatch whatever is pending now (e.g. on PINCH_END)."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        for intent, parameters in pending.actions():
+            self._dispatch(intent, parameters)
+
+    def _dispatch(self, intent: str, parameters: Dict[str, Any]):
+        self._last_dispatch = self.clock()
+        self.dispatched += 1
+        metrics.GESTURE_ACTIONS.labels("dispatched").inc()
+        try:
+            self.execute(intent, parameters)
+        except Exception as e:
+            logger.error(f"Dispatch of {intent} failed: {e}")
@@ -0,0 +1,295 @@
+"""
+Per-image annotation and highlight store with a uniform-grid spatial index.
+
+Deictic commands ("highlight this", "analyze this region") resolve a gaze or
+cursor point to the nearest annotated structure of the active image. Each
+image keeps its annotations in a grid index so the lookup only touches the
+cells around the point, which keeps it fast with thousands of annotations per
+study. Highlights created by HIGHLIGHT_REGION are stored the same way and
+returned when the image is shown again.
+
+Coordinates are normalized to the image: (0, 0) top-left, (1, 1) bottom-right.
+Boxes are (x0, y0, x1, y1).
+"""
+
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from audio_engine import metrics
+
+logger = logging.getLogger("AnnotationStore")
+
+STRUCTURE = "structure"  # Imported/segmented anatomy, lesions, measurements
+HIGHLIGHT = "highlight"  # Created by voice/gesture commands
+
+
+class Annotation(NamedTuple):
+    id: str
+    label: str
+    bbox: Tuple[float, float, float, float]
+    kind: str = STRUCTURE
+    created: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "label": self.label, "bbox": list(self.bbox), "kind": self.kind, "created": self.created}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Annotation":
+        return cls(str(data["id"]), data.get("label", ""), tuple(float(v) for v in data["bbox"]),
+                   data.get("kind", STRUCTURE), float(data.get("created", 0.0)))
+
+
+class GridIndex:
+    """
+    Uniform grid over the unit square. Each box is listed in every cell it overlaps.
+    Nearest-box queries search rings of cells outward from the query point and stop
+    as soon as no unvisited cell can hold a closer box.
+    """
+    def __init__(self, cells=32):
+        self.cells = cells
+        self.cell_size = 1.0 / cells
+        self._buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._boxes = np.zeros((64, 4))
+        self._keys: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _cell(self, v: float) -> int:
+        return min(max(int(v * self.cells), 0), self.cells - 1)
+
+    def _cell_range(self, bbox):
+        return (range(self._cell(bbox[0]), self._cell(bbox[2]) + 1),
+                range(self._cell(bbox[1]), self._cell(bbox[3]) + 1))
+
+    def insert(self, key: str, bbox: Sequence[float]):
+        if key in self._slots:
+            self.remove(key)
+        slot = len(self._keys)
+        if slot == len(self._boxes):
+            self._boxes = np.concatenate([self._boxes, np.zeros_like(self._boxes)])
+        self._boxes[slot] = bbox
+        self._keys.append(key)
+        self._slots[key] = slot
+        xs, ys = self._cell_range(bbox)
+        for cell in itertools.product(xs, ys):
+            self._buckets[cell].append(slot)
+
+    def remove(self, key: str):
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        xs, ys = self._cell_range(self._boxes[slot])
+        for cell in itertools.product(xs, ys):
+            self._buckets[cell].remove(slot)
+        self._keys[slot] = None
+
+    def _ring(self, cx, cy, r, out: List[int]):
+        """Append the slots listed in the cells at Chebyshev distance r from (cx, cy)."""
+        buckets = self._buckets
+        n = self.cells
+        if r == 0:
+            cells = [(cx, cy)]
+        else:
+            xs = range(max(cx - r, 0), min(cx + r, n - 1) + 1)
+            ys = range(max(cy - r + 1, 0), min(cy + r - 1, n - 1) + 1)
+            cells = [(x, y) for y in (cy - r, cy + r) if 0 <= y < n for x in xs]
+            cells += [(x, y) for x in (cx - r, cx + r) if 0 <= x < n for y in ys]
+        for cell in cells:
+            bucket = buckets.get(cell)
+            if bucket:
+                out.extend(bucket)
+
+    def nearest(self, x: float, y: float, max_dist: float = np.inf) -> Optional[Tuple[str, float]]:
+        """
+        Closest box to (x, y); distance is 0 inside a box, and among containing boxes the smallest wins.
+        :return: (key, distance) or None if nothing is within max_dist.
+        """
+        if not self._slots:
+            return None
+        cx, cy = self._cell(x), self._cell(y)
+        best_slot, best_dist = -1, np.inf
+        slots: List[int] = []
+        for r in range(self.cells):
+            # Every box first listed in ring r is at least (r - 1) cells away from the query point
+            min_possible = max(r - 1, 0) * self.cell_size
+            if min_possible > max_dist or min_possible > best_dist:
+                break
+            self._ring(cx, cy, r, slots)
+            if not slots or r == 0:
+                # Ring 1 has the same lower bound as ring 0, so both are always searched together
+                continue
+            candidates = np.array(slots)
+            slots.clear()
+            boxes = self._boxes[candidates]
+            dx = np.maximum(np.maximum(boxes[:, 0] - x, x - boxes[:, 2]), 0.0)
+            dy = np.maximum(np.maximum(boxes[:, 1] - y, y - boxes[:, 3]), 0.0)
+            dist = np.hypot(dx, dy)
+            k = int(np.argmin(dist))
+            if dist[k] == 0.0:
+                # Nested boxes: the innermost (smallest) structure is the one being pointed at
+                inside = np.flatnonzero(dist == 0.0)
+                area = (boxes[inside, 2] - boxes[inside, 0]) * (boxes[inside, 3] - boxes[inside, 1])
+                k = int(inside[np.argmin(area)])
+            if dist[k] < best_dist:
+                best_slot, best_dist = int(candidates[k]), float(dist[k])
+        if best_slot < 0 or best_dist > max_dist:
+            return None
+        return self._keys[best_slot], best_dist
+
+    def query(self, bbox: Sequence[float]) -> List[str]:
+        """Keys of all boxes overlapping bbox."""
+        xs, ys = self._cell_range(bbox)
+        slots = set()
+        for cell in itertools.product(xs, ys):
+            slots.update(self._buckets.get(cell, ()))
+        if not slots:
+            return []
+        slots = np.fromiter(slots, dtype=np.int64)
+        boxes = self._boxes[slots]
+        hit = (boxes[:, 0] <= bbox[2]) & (boxes[:, 2] >= bbox[0]) & (boxes[:, 1] <= bbox[3]) & (boxes[:, 3] >= bbox[1])
+        return [self._keys[s] for s in slots[hit]]
+
+
+class ImageAnnotations:
+    """Annotations of one image, with one spatial index per annotation kind."""
+    def __init__(self, cells=32):
+        self.cells = cells
+        self.annotations: Dict[str, Annotation] = {}
+        self.indexes: Dict[str, GridIndex] = {}
+
+    def add(self, annotation: Annotation):
+        self.remove(annotation.id)
+        self.annotations[annotation.id] = annotation
+        index = self.indexes.get(annotation.kind)
+        if index is None:
+            index = self.indexes[annotation.kind] = GridIndex(self.cells)
+        index.insert(annotation.id, annotation.bbox)
+
+    def remove(self, annotation_id: str) -> bool:
+        annotation = self.annotations.pop(annotation_id, None)
+        if annotation is None:
+            return False
+        self.indexes[annotation.kind].remove(annotation_id)
+        return True
+
+    def of_kind(self, kind: str) -> List[Annotation]:
+        return [a for a in self.annotations.values() if a.kind == kind]
+
+    def nearest(self, x: float, y: float, max_dist: float, kind: Optional[str]) -> Optional[Tuple[Annotation, float]]:
+        indexes = [self.indexes[kind]] if kind in self.indexes else [] if kind else list(self.indexes.values())
+        best = None
+        for index in indexes:
+            found = index.nearest(x, y, max_dist)
+            if found and (best is None or found[1] < best[1]):
+                best = found
+        return (self.annotations[best[0]], best[1]) if best else None
+
+
+class AnnotationStore:
+    """
+    Thread-safe store of ImageAnnotations keyed by image name.
+    With a directory, each image is loaded from / saved to <directory>/<image>.json on first use and on change.
+    """
+    def __init__(self, directory: Optional[str] = None, cells=32):
+        self.directory = directory
+        self.cells = cells
+        self.active_image: Optional[str] = None
+        self._images: Dict[str, ImageAnnotations] = {}
+        self._lock = threading.RLock()
+        self._next_id = itertools.count(1)
+
+    # --- Images ---
+
+    def _path(self, image: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", image).lstrip(".")
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def _get(self, image: str) -> ImageAnnotations:
+        entry = self._images.get(image)
+        metrics.CACHE_REQUESTS.labels("annotations", "hit" if entry is not None else "miss").inc()
+        if entry is None:
+            entry = ImageAnnotations(self.cells)
+            if self.directory and os.path.exists(self._path(image)):
+                with open(self._path(image), "r") as f:
+                    for data in json.load(f)["annotations"]:
+                        entry.add(Annotation.from_dict(data))
+                logger.info(f"Loaded {len(entry.annotations)} annotations for {image}")
+            self._images[image] = entry
+        return entry
+
+    def _save(self, image: str):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(image)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"image": image, "annotations": [a.to_dict() for a in self._images[image].annotations.values()]}, f)
+        os.replace(tmp, path)
+
+    def set_active_image(self, image: str) -> List[Annotation]:
+        """Switch the image deictic commands resolve against. :return: Its stored highlights, for restoring."""
+        with self._lock:
+            self.active_image = image
+            return self._get(image).of_kind(HIGHLIGHT)
+
+    # --- Annotations ---
+
+    def _new_id(self, kind: str) -> str:
+        return f"{kind[0]}{int(time.time() * 1000):x}-{next(self._next_id)}"
+
+    def add(self, image: str, label: str, bbox: Sequence[float], kind: str = STRUCTURE,
+            annotation_id: Optional[str] = None) -> Annotation:
+        return self.add_many(image, [{"id": annotation_id, "label": label, "bbox": bbox, "kind": kind}])[0]
+
+    def add_many(self, image: str, items: Sequence[Dict[str, Any]]) -> List[Annotation]:
+        """Bulk insert (e.g. a study's segmentation export); saved once at the end."""
+        now = time.time()
+        added = []
+        with self._lock:
+            entry = self._get(image)
+            for item in items:
+                x0, y0, x1, y1 = (float(v) for v in item["bbox"])
+                kind = item.get("kind") or STRUCTURE
+                annotation = Annotation(item.get("id") or self._new_id(kind), item.get("label", ""),
+                                        (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)), kind, now)
+                entry.add(annotation)
+                added.append(annotation)
+            self._save(image)
+        return added
+
+    def remove(self, image: str, annotation_id: str) -> bool:
+        with self._lock:
+            removed = self._get(image).remove(annotation_id)
+            if removed:
+                self._save(image)
+            return removed
+
+    def list(self, image: str, kind: Optional[str] = None) -> List[Annotation]:
+        with self._lock:
+            entry = self._get(image)
+            return entry.of_kind(kind) if kind else list(entry.annotations.values())
+
+    def nearest(self, x: float, y: float, image: Optional[str] = None, max_dist: float = 0.1,
+                kind: Optional[str] = STRUCTURE) -> Optional[Tuple[Annotation, float]]:
+        """
+        Nearest annotation to a normalized point on `image` (default: the active image).
+        :param kind: Only consider this kind; None considers all.
+        :return: (annotation, distance) or None.
+        """
+        with self._lock:
+            image = image or self.active_image
+            if image is None:
+                return None
+            return self._get(image).nearest(x, y, max_dist, kind)
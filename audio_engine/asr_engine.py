@@ -3,6 +3,9 @@ import whisper
 import logging
 import torch
 import numpy as np
+import time
+
+from audio_engine import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,16 +28,18 @@ class ASREngine:
             logger.error(f"Failed to load Whisper model: {e}")
             raise
 
-    def transcribe(self, audio_data):
+    def transcribe(self, audio_data, timer=None):
         """
         Transcribe audio data.
         :param audio_data: Numpy array of float32 audio.
+        :param timer: Optional StageTimer; marks 'asr'.
         :return: Dict with 'text', 'confidence', 'language'.
         """
         try:
             # Whisper expects float32 numpy array
             if audio_data is None or len(audio_data) == 0:
                 return {"text": "", "confidence": 0.0}
+            started = time.perf_counter()
 
             # Pad or trim audio to fit 30 seconds if necessary, 
             # but Whisper handle raw audio buffers well usually.
@@ -42,6 +47,8 @@ class ASREngine:
             
             # Use fp16=False for CPU compatibility if needed, though safe to leave auto usually.
             result = self.model.transcribe(audio_data, language=self.language, fp16=False)
+            if timer:
+                timer.mark("asr")
             
             text = result.get("text", "").strip()
             
@@ -56,6 +63,9 @@ class ASREngine:
                 confidences = [np.exp(s.get("avg_logprob", -1)) for s in segments]
                 avg_confidence = sum(confidences) / len(confidences)
             
+            elapsed = time.perf_counter() - started
+            metrics.ASR_SECONDS.observe(elapsed)
+            metrics.ASR_REALTIME_FACTOR.observe(elapsed / (len(audio_data) / 16000.0))
             logger.info(f"Transcribed: '{text}' (Conf: {avg_confidence:.2f})")
             
             return {
@@ -1,48 +1,100 @@
 
 import sounddevice as sd
 import numpy as np
+import time
 import logging
 
+from audio_engine import metrics
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AudioCapture:
-    def __init__(self, sample_rate=16000, duration=3.0, threshold=0.005):
+    def __init__(self, sample_rate=16000, duration=3.0, threshold=0.005, block_duration=0.1, on_speech_start=None,
+                 stream_factory=None, echo_guard=None):
         """
         Initialize AudioCapture.
         :param sample_rate: Sampling rate in Hz (default 16000 for Whisper).
         :param duration: Duration of chunk to record in seconds.
         :param threshold: RMS threshold for silence detection.
+        :param block_duration: Read size in seconds; voice onset is detected per block.
+        :param on_speech_start: Called from the capture thread when the first block above threshold arrives.
+        :param stream_factory: Opens the input stream, called like sd.InputStream(samplerate=, channels=, dtype=);
+                               benchmarks pass one that plays recorded audio. Defaults to the sound card.
+        :param echo_guard: Optional EchoGuard; blocks recorded while the assistant speaks are muted
+                           unless louder than echo_guard.margin x threshold.
         """
         self.sample_rate = sample_rate
         self.duration = duration
         self.threshold = threshold
+        self.block_duration = block_duration
+        self.on_speech_start = on_speech_start
+        self.stream_factory = stream_factory
+        self.echo_guard = echo_guard
         self.channels = 1
+        # Optional SessionRecorder; every captured chunk is appended, silent or not
+        self.recorder = None
 
-    def listen_chunk(self):
+    def listen_chunk(self, timer=None):
         """
         Captures a chunk of audio.
+        :param timer: Optional StageTimer; marks 'capture' and 'vad'.
         :return: Numpy array of audio data or None if silence.
         """
         logger.info(f"Listening for {self.duration} seconds...")
         try:
-            # Record audio
-            audio_data = sd.rec(int(self.duration * self.sample_rate),
-                                samplerate=self.sample_rate,
-                                channels=self.channels,
-                                dtype='float32')
-            sd.wait()  # Wait until recording is finished
+            n_frames = int(self.duration * self.sample_rate)
+            block = max(1, int(self.block_duration * self.sample_rate))
+            audio_flat = np.empty(n_frames, dtype=np.float32)
+            onset = False
+            # (start, end) sample ranges muted as echo
+            gated = []
+            
+            # Record audio block by block so voice onset is known before the chunk ends
+            open_stream = self.stream_factory or sd.InputStream
+            with open_stream(samplerate=self.sample_rate, channels=self.channels, dtype='float32') as stream:
+                started = time.time()
+                pos = 0
+                while pos < n_frames:
+                    data, _ = stream.read(min(block, n_frames - pos))
+                    n = len(data)
+                    audio_flat[pos:pos + n] = data[:, 0]
+                    block_rms = np.sqrt(np.mean(data ** 2))
+                    guard = self.echo_guard
+                    if guard and block_rms < self.threshold * guard.margin and guard.active():
+                        gated.append((pos, pos + n))
+                    elif not onset and block_rms >= self.threshold:
+                        onset = True
+                        if self.on_speech_start:
+                            self.on_speech_start()
+                    pos += n
             
-            # Flatten to 1D array
-            audio_flat = audio_data.flatten()
+            if self.recorder:
+                self.recorder.record_audio(started, audio_flat, self.sample_rate)
+            raw = audio_flat
+            if gated:
+                audio_flat = audio_flat.copy()
+                for start, end in gated:
+                    audio_flat[start:end] = 0.0
+            if timer:
+                timer.mark("capture")
             
             # Calculate RMS (Root Mean Square) for volume
             rms = np.sqrt(np.mean(audio_flat**2))
+            if timer:
+                timer.mark("vad")
             
             if rms < self.threshold:
+                if gated and np.sqrt(np.mean(raw ** 2)) >= self.threshold:
+                    logger.info(f"Echo of own speech (RMS: {rms:.5f} after gating)")
+                    metrics.VAD_DECISIONS.labels("echo").inc()
+                    self.echo_guard.record_gated()
+                    return None
                 logger.info(f"Silence (RMS: {rms:.5f} < {self.threshold})") # Changed to INFO for debugging
+                metrics.VAD_DECISIONS.labels("silence").inc()
                 return None
+            metrics.VAD_DECISIONS.labels("speech").inc()
             
             logger.info(f"Audio captured (RMS: {rms:.4f})")
             return audio_flat
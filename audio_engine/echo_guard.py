@@ -0,0 +1,114 @@
+"""
+Self-echo suppression: keeps the assistant from hearing its own speech.
+
+In continuous listening the microphone picks up "Executing zoom in." from the
+speakers; Whisper transcribes it and the intent engine matches "zoom in" again.
+EchoGuard is shared by the TTS engine, which reports what it plays and when,
+and the capture/ASR path, which uses it twice:
+
+1. Gate (before ASR): while TTS is playing, and for `tail` seconds after it
+   (output latency and room reverberation), AudioCapture mutes blocks quieter
+   than `margin` x its VAD threshold. A chunk that only held echo then reads as
+   silence and is never transcribed. Louder blocks pass, so the user can still
+   talk over the assistant ("stop").
+2. Transcript filter (after ASR): a transcript that closely matches something
+   spoken in the last `window` seconds is dropped before intent parsing.
+
+Gated chunks that would otherwise have gone to Whisper are counted as ASR
+invocations saved (zt_echo_suppressed_total{stage="gate"}; per hour in stats()).
+"""
+
+import collections
+import difflib
+import logging
+import re
+import threading
+import time
+from typing import Any, Deque, Dict, List
+
+from audio_engine import metrics
+
+logger = logging.getLogger("EchoGuard")
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+class EchoGuard:
+    def __init__(self, tail: float = 0.3, window: float = 4.0, similarity: float = 0.75, margin: float = 4.0,
+                 history: int = 8):
+        """
+        :param tail: Seconds after playback ends during which capture is still gated.
+        :param window: Seconds after playback ends during which a matching transcript counts as echo.
+        :param similarity: Minimum difflib ratio between transcript and spoken text ("zoom in" vs
+                           "Executing zoom in." is 0.58, so a user repeating the command is kept).
+        :param margin: Blocks louder than margin x the VAD threshold pass the gate (barge-in).
+        :param history: Spoken phrases remembered for the transcript filter.
+        """
+        self.tail = tail
+        self.window = window
+        self.similarity = similarity
+        self.margin = margin
+        # [normalized text, time playback ended (None while playing)]
+        self._spoken: Deque[List[Any]] = collections.deque(maxlen=history)
+        self._playing = 0
+        self._quiet_at = 0.0
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.gated = 0
+        self.dropped = 0
+
+    # --- TTS side ---
+
+    def playback_started(self, text: str):
+        with self._lock:
+            self._playing += 1
+            self._spoken.append([normalize(text), None])
+
+    def playback_finished(self):
+        now = time.monotonic()
+        with self._lock:
+            self._playing = max(0, self._playing - 1)
+            self._quiet_at = now + self.tail
+            for entry in self._spoken:
+                if entry[1] is None:
+                    entry[1] = now
+
+    # --- Capture side ---
+
+    def active(self) -> bool:
+        """True while TTS is playing or its tail may still reach the microphone."""
+        return self._playing > 0 or time.monotonic() < self._quiet_at
+
+    def record_gated(self):
+        """A chunk that would have been sent to ASR was muted as echo."""
+        self.gated += 1
+        metrics.ECHO_SUPPRESSED.labels("gate").inc()
+
+    def is_echo(self, transcript: str) -> bool:
+        """True (and counted) if transcript matches recently spoken text."""
+        text = normalize(transcript)
+        if not text:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            recent = [spoken for spoken, ended in self._spoken if ended is None or now - ended <= self.window]
+        for spoken in recent:
+            if difflib.SequenceMatcher(None, text, spoken).ratio() >= self.similarity:
+                self.dropped += 1
+                metrics.ECHO_SUPPRESSED.labels("transcript").inc()
+                logger.info(f"Dropped own speech as echo: {transcript!r}")
+                return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        hours = max(time.monotonic() - self.started_at, 1e-9) / 3600
+        return {
+            "gated": self.gated,
+            "dropped_transcripts": self.dropped,
+            "asr_saved_per_hour": self.gated / hours,
+            "active": self.active(),
+        }
@@ -0,0 +1,260 @@
+"""
+Frame sources for VisionManager.
+
+Every source yields BGR frames with a capture timestamp, so the vision loop
+runs the same code whether frames come from a camera, a recorded video, a
+directory of images or a synthetic generator.
+
+File and synthetic sources have a media clock: with realtime=True they are
+paced to it (as a camera would be), with realtime=False they run as fast as
+the consumer reads, still stamping each frame with its media time, so
+results are deterministic and FPS measures processing throughput.
+
+Spec strings (config / API):
+    camera:0
+    video:/path/to/recording.mp4
+    images:/path/to/frames
+    synthetic:640x480@30
+"""
+
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("FrameSources")
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class FrameSource:
+    """Base class. read() returns (ok, frame, timestamp); ok is False when the source is exhausted or fails."""
+    # Seconds the vision loop idles after each frame (sources that block on read need none)
+    poll_delay = 0.0
+    # Rate of a live source that discards frames the loop does not read in time (None: every frame is delivered)
+    nominal_fps: Optional[float] = None
+    # A live source never runs out: a failed read is a device failure, not the end of the stream
+    live = False
+
+    def open(self) -> bool:
+        return True
+
+    def read(self, out: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+
+class _MediaClock:
+    """Maps frame indices to timestamps and paces reads in realtime mode."""
+    def __init__(self, fps: float, realtime: bool):
+        self.fps = fps
+        self.realtime = realtime
+        self.start = None
+
+    def stamp(self, index: int) -> float:
+        if self.start is None:
+            self.start = time.time()
+        t = self.start + index / self.fps
+        if self.realtime:
+            delay = t - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        return t
+
+
+class CameraSource(FrameSource):
+    poll_delay = 0.01  # Small sleep to be CPU friendly, though Mediapipe is the bottleneck
+    live = True
+
+    def __init__(self, camera_id=0, frame_width=1280, frame_height=720, fourcc="MJPG", buffer_size=1):
+        """
+        :param frame_width: Requested capture width (None keeps the driver default).
+        :param frame_height: Requested capture height (None keeps the driver default).
+        :param fourcc: Requested capture codec, e.g. 'MJPG' (None keeps the driver default).
+        :param buffer_size: CAP_PROP_BUFFERSIZE; 1 keeps only the latest frame queued.
+        """
+        self.camera_id = camera_id
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.cap = None
+
+    def open(self) -> bool:
+        cap = cv2.VideoCapture(self.camera_id)
+        if not cap.isOpened():
+            return False
+
+        # Properties are requests; drivers silently ignore the ones they do not support
+        if self.fourcc:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        if self.frame_width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
+        if self.frame_height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
+        if self.buffer_size:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.nominal_fps = fps if fps and fps > 0 else None
+        self.cap = cap
+        return True
+
+    def read(self, out=None):
+        # read() decodes into the previous frame's buffer when the size matches
+        ret, frame = self.cap.read(out)
+        return ret, frame, time.time()
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self) -> str:
+        return f"camera:{self.camera_id}"
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path: str, realtime=True, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.cap = None
+        self._clock = None
+        self._index = 0
+
+    def open(self) -> bool:
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            return False
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.cap = cap
+        self._clock = _MediaClock(fps if fps and fps > 0 else 30.0, self.realtime)
+        self._index = 0
+        return True
+
+    def read(self, out=None):
+        ret, frame = self.cap.read(out)
+        if not ret and self.loop and self._index:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(out)
+        if not ret:
+            return False, None, 0.0
+        # The clock keeps running across loops so timestamps stay monotonic
+        t = self._clock.stamp(self._index)
+        self._index += 1
+        return True, frame, t
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self) -> str:
+        return f"video:{self.path}"
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, directory: str, fps=30.0, realtime=True, loop=False):
+        self.directory = directory
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.files = []
+        self._clock = None
+        self._index = 0
+
+    def open(self) -> bool:
+        if not os.path.isdir(self.directory):
+            return False
+        self.files = sorted(os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                            if f.lower().endswith(IMAGE_EXTENSIONS))
+        self._clock = _MediaClock(self.fps, self.realtime)
+        self._index = 0
+        return bool(self.files)
+
+    def read(self, out=None):
+        if self._index >= len(self.files) and not self.loop:
+            return False, None, 0.0
+        frame = cv2.imread(self.files[self._index % len(self.files)], cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.error(f"Could not read {self.files[self._index % len(self.files)]}")
+            return False, None, 0.0
+        t = self._clock.stamp(self._index)
+        self._index += 1
+        return True, frame, t
+
+    def describe(self) -> str:
+        return f"images:{self.directory}"
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames: a bright disc moving over a gradient."""
+    def __init__(self, width=640, height=480, fps=30.0, frames: Optional[int] = None, realtime=False, seed=0):
+        """
+        :param frames: Number of frames before the source is exhausted; None runs forever.
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frames = frames
+        self.realtime = realtime
+        self.seed = seed
+        self._clock = None
+        self._index = 0
+        self._background = None
+
+    def open(self) -> bool:
+        rng = np.random.default_rng(self.seed)
+        gradient = np.linspace(40, 160, self.width, dtype=np.float32)[None, :, None]
+        noise = rng.integers(0, 16, size=(self.height, self.width, 3))
+        self._background = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+        self._clock = _MediaClock(self.fps, self.realtime)
+        self._index = 0
+        return True
+
+    def read(self, out=None):
+        if self.frames is not None and self._index >= self.frames:
+            return False, None, 0.0
+        if out is None or out.shape != self._background.shape:
+            out = np.empty_like(self._background)
+        np.copyto(out, self._background)
+        phase = 2.0 * np.pi * self._index / (4.0 * self.fps)
+        center = (int(self.width * (0.5 + 0.3 * np.cos(phase))), int(self.height * (0.5 + 0.3 * np.sin(phase))))
+        cv2.circle(out, center, max(self.height // 10, 4), (230, 230, 230), -1)
+        t = self._clock.stamp(self._index)
+        self._index += 1
+        return True, out, t
+
+    def describe(self) -> str:
+        return f"synthetic:{self.width}x{self.height}@{self.fps:g}"
+
+
+def create_source(spec: str, realtime: bool = True, loop: bool = False, **camera_kwargs) -> FrameSource:
+    """
+    Build a source from a spec string (see module docstring).
+    :param realtime: Pace file/synthetic sources to their media clock; False runs them as fast as possible.
+                     Cameras are live and ignore it.
+    :param loop: Restart file sources at the end instead of stopping (cameras and synthetic sources never end).
+    :param camera_kwargs: frame_width, frame_height, fourcc, buffer_size for camera sources.
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "camera":
+        return CameraSource(int(arg or 0), **camera_kwargs)
+    if kind == "video":
+        return VideoFileSource(arg, realtime=realtime, loop=loop)
+    if kind == "images":
+        return ImageDirectorySource(arg, realtime=realtime, loop=loop)
+    if kind == "synthetic":
+        # synthetic[:WxH[@FPS]]
+        size, _, fps = arg.partition("@")
+        width, _, height = size.partition("x")
+        return SyntheticSource(int(width or 640), int(height or 480), float(fps or 30.0), realtime=realtime)
+    raise ValueError(f"Unknown frame source: {spec!r}")
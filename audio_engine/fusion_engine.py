@@ -1,6 +1,9 @@
 import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+from audio_engine.annotation_store import AnnotationStore
+from audio_engine.image_view import ImageView
 
 logger = logging.getLogger("FusionEngine")
 
@@ -9,7 +12,18 @@ class FusionEngine:
     Multimodal Fusion: Combines synchronous voice intents with asynchronous vision state.
     Resolves ambiguities like 'this', 'here', and aligns gestures with speech.
     """
-    def __init__(self):
+    # Half-size of a free highlight box (no annotation near the point), normalized
+    HIGHLIGHT_HALF_SIZE = 0.05
+    # Max distance from the point to an annotation for it to be picked, normalized
+    SNAP_DISTANCE = 0.05
+
+    def __init__(self, annotations: Optional[AnnotationStore] = None, view: Optional[ImageView] = None):
+        """
+        :param annotations: Annotation store of the displayed images; deictic targets snap to its structures.
+        :param view: On-screen placement of the displayed image (zoom/pan); None if it fills the viewport.
+        """
+        self.annotations = annotations
+        self.view = view
         self.context = {
             "current_patient": "John Doe",
             "active_modality": "CT SCAN",
@@ -42,14 +56,28 @@ class FusionEngine:
                 # Use Gaze if no specific pointing gesture
                 gaze_eye = vision_state["gaze"]["eye"]
                 gaze_head = vision_state["gaze"]["head"]
+                gaze_point = vision_state["gaze"].get("point")
                 
-                # Simple mapping of gaze to region
-                region = "CENTER"
-                if gaze_eye == "LEFT" or gaze_head == "LEFT": region = "LEFT_REGION"
-                elif gaze_eye == "RIGHT" or gaze_head == "RIGHT": region = "RIGHT_REGION"
+                if gaze_point:
+                    # Calibrated gaze: continuous viewport coordinates under "point"; "region" stays a
+                    # region name (the third of the viewport the point is in) for callbacks that only know those
+                    x, y = gaze_point["x"], gaze_point["y"]
+                    region = "LEFT_REGION" if x < 1 / 3 else "RIGHT_REGION" if x > 2 / 3 else "CENTER"
+                    fused_packet["parameters"]["point"] = {"x": x, "y": y}
+                    fused_packet["reason"] = f"Action bound to ({x:.2f}, {y:.2f}) via calibrated Gaze"
+                    point = self._to_image(x, y)
+                    annotation = self._resolve_annotation(*point) if point else None
+                    if annotation:
+                        fused_packet["parameters"]["annotation"] = annotation
+                        fused_packet["reason"] += f" on {annotation['label'] or annotation['id']}"
+                else:
+                    # Simple mapping of gaze to region
+                    region = "CENTER"
+                    if gaze_eye == "LEFT" or gaze_head == "LEFT": region = "LEFT_REGION"
+                    elif gaze_eye == "RIGHT" or gaze_head == "RIGHT": region = "RIGHT_REGION"
+                    fused_packet["reason"] = f"Action bound to {region} via Gaze"
                 
                 fused_packet["parameters"]["region"] = region
-                fused_packet["reason"] = f"Action bound to {region} via Gaze"
             else:
                 fused_packet["status"] = "REJECTED"
                 fused_packet["reason"] = "Target required but no user/gaze detected"
@@ -67,7 +95,36 @@ class FusionEngine:
         if intent == "HIGHLIGHT":
             fused_packet["action"] = "HIGHLIGHT_REGION"
             fused_packet["parameters"]["coordinates"] = vision_state["hand"]["cursor"]
-            fused_packet["reason"] = "Highlighting region indicated by hand"
+
+            # Pointer: the fingertip while a hand is in view, else the calibrated gaze point
+            gaze_point = vision_state["gaze"].get("point")
+            if vision_state["hand"].get("present"):
+                pointer, source = vision_state["hand"]["cursor_norm"], "hand"
+            elif gaze_point:
+                pointer, source = (gaze_point["x"], gaze_point["y"]), "gaze"
+            else:
+                pointer, source = None, None
+            point = self._to_image(*pointer) if pointer else None
+
+            # Box to highlight: the annotated structure under the pointer, else a fixed box around it
+            if point is None:
+                fused_packet["status"] = "REJECTED"
+                fused_packet["reason"] = ("Highlight requires a hand or calibrated gaze on the image" if pointer is None
+                                          else f"Highlight target ({source}) is not on the image")
+            else:
+                x, y = point
+                fused_packet["reason"] = f"Highlighting region indicated by {source}"
+                annotation = self._resolve_annotation(x, y)
+                if annotation:
+                    fused_packet["parameters"]["annotation"] = annotation
+                    fused_packet["parameters"]["bbox"] = annotation["bbox"]
+                    fused_packet["reason"] = f"Highlighting {annotation['label'] or annotation['id']} indicated by {source}"
+                else:
+                    half = self.HIGHLIGHT_HALF_SIZE
+                    fused_packet["parameters"]["bbox"] = [max(x - half, 0.0), max(y - half, 0.0),
+                                                          min(x + half, 1.0), min(y + half, 1.0)]
+            if self.annotations and self.annotations.active_image:
+                fused_packet["parameters"]["image"] = self.annotations.active_image
 
         # 4. Contextual lookup
         if intent == "PREVIOUS_PATIENT":
@@ -75,5 +132,18 @@ class FusionEngine:
             
         return fused_packet
 
+    def _to_image(self, x: float, y: float) -> Optional[Tuple[float, float]]:
+        """Viewport point -> image point under the current zoom/pan, or None if it is off the image."""
+        if self.view is None:
+            return x, y
+        return self.view.to_image(x, y)
+
+    def _resolve_annotation(self, x: float, y: float) -> Optional[Dict[str, Any]]:
+        """Nearest annotated structure on the active image, if any is close enough."""
+        if not self.annotations:
+            return None
+        found = self.annotations.nearest(x, y, max_dist=self.SNAP_DISTANCE)
+        return found[0].to_dict() if found else None
+
     def update_context(self, key: str, value: Any):
         self.context[key] = value
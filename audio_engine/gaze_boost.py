@@ -0,0 +1,43 @@
+"""
+Per-utterance gaze boosts for demand-driven gaze.
+
+Each voice onset takes its own boost (a token with a deadline); the gaze path
+runs at full rate while any boost is live. Releasing a token only ends that
+utterance's boost, so with the voice pipeline capturing utterance N+1 while N
+is still being fused, N's release no longer cancels N+1's boost.
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, Optional
+
+
+class GazeBoosts:
+    def __init__(self):
+        self._deadlines: Dict[int, float] = {}
+        self._tokens = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def boost(self, duration: float) -> int:
+        """Start a boost lasting up to `duration` seconds. :return: Token for release()."""
+        with self._lock:
+            token = next(self._tokens)
+            self._deadlines[token] = time.time() + duration
+            return token
+
+    def release(self, token: Optional[int]):
+        """End one boost (None or an unknown/expired token is ignored)."""
+        with self._lock:
+            self._deadlines.pop(token, None)
+
+    def deadline(self) -> float:
+        """time.time() until which the gaze path runs at full rate (0.0 if no boost is live)."""
+        now = time.time()
+        with self._lock:
+            for token in [t for t, d in self._deadlines.items() if d <= now]:
+                del self._deadlines[token]
+            return max(self._deadlines.values(), default=0.0)
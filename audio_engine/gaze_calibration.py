@@ -0,0 +1,179 @@
+"""
+Per-user gaze calibration.
+
+Maps the raw gaze signals (left/right iris ratios, head yaw and pitch) to a
+continuous point in the viewport with a least-squares polynomial fitted while
+the user looks at known targets. The fitted map is stored per user profile
+and applied to every frame as a single feature-vector x coefficient product.
+
+Viewport coordinates are normalized: (0, 0) is the top-left, (1, 1) the
+bottom-right corner.
+
+Usage:
+    session = CalibrationSession()
+    session.add((0.1, 0.1), inputs)      # repeated per target and frame
+    calibration = session.fit()
+    GazeProfileStore("profiles").save("dr_smith", calibration)
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("GazeCalibration")
+
+# Inputs per frame: left iris ratio, right iris ratio, yaw, pitch
+N_INPUTS = 4
+# Head angles are divided by this so all inputs are of order 1 and the fit stays well conditioned
+ANGLE_SCALE = 30.0
+
+
+def polynomial_exponents(n_inputs: int, degree: int) -> np.ndarray:
+    """All monomial exponent vectors of total degree <= degree, constant term first. (T, n_inputs)"""
+    terms = [()]
+    for _ in range(n_inputs):
+        terms = [t + (e,) for t in terms for e in range(degree + 1)]
+    terms = [t for t in terms if sum(t) <= degree]
+    terms.sort(key=lambda t: (sum(t), [-e for e in t]))
+    return np.array(terms, dtype=np.int64)
+
+
+def gaze_inputs(l_ratio: float, r_ratio: float, yaw: float, pitch: float, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Pack one frame's raw gaze signals into the calibration input vector."""
+    if out is None:
+        out = np.empty(N_INPUTS)
+    out[0] = l_ratio
+    out[1] = r_ratio
+    out[2] = yaw / ANGLE_SCALE
+    out[3] = pitch / ANGLE_SCALE
+    return out
+
+
+class GazeCalibration:
+    """Fitted polynomial map from gaze inputs to normalized viewport (x, y)."""
+    def __init__(self, coeffs: np.ndarray, degree: int = 2, rms_error: float = 0.0, samples: int = 0):
+        """
+        :param coeffs: (T, 2) coefficients, one row per polynomial_exponents(N_INPUTS, degree) term.
+        :param rms_error: Fit residual in viewport units, for reporting.
+        """
+        self.degree = degree
+        self.exponents = polynomial_exponents(N_INPUTS, degree)
+        self.coeffs = np.asarray(coeffs, dtype=np.float64)
+        if self.coeffs.shape != (len(self.exponents), 2):
+            raise ValueError(f"Expected {len(self.exponents)}x2 coefficients for degree {degree}, got {self.coeffs.shape}")
+        self.rms_error = rms_error
+        self.samples = samples
+        self._features = np.empty((len(self.exponents),))
+
+    @staticmethod
+    def _design(inputs: np.ndarray, exponents: np.ndarray) -> np.ndarray:
+        """(N, N_INPUTS) -> (N, T) monomial features."""
+        return np.prod(inputs[:, None, :] ** exponents[None, :, :], axis=2)
+
+    @classmethod
+    def fit(cls, inputs: np.ndarray, targets: np.ndarray, degree: int = 2, ridge: float = 1e-3) -> "GazeCalibration":
+        """
+        Least-squares fit with a small ridge penalty (the calibration targets rarely excite every term).
+        :param inputs: (N, N_INPUTS) from gaze_inputs().
+        :param targets: (N, 2) normalized viewport points the user was looking at.
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.float64)
+        exponents = polynomial_exponents(N_INPUTS, degree)
+        design = cls._design(inputs, exponents)
+
+        # Ridge as extra rows; the constant term is not penalized
+        penalty = np.sqrt(ridge) * np.eye(len(exponents))
+        penalty[0, 0] = 0.0
+        a = np.vstack([design, penalty])
+        b = np.vstack([targets, np.zeros((len(exponents), 2))])
+        coeffs, _, _, _ = np.linalg.lstsq(a, b, rcond=None)
+
+        residual = design @ coeffs - targets
+        rms = float(np.sqrt(np.mean(np.sum(residual ** 2, axis=1))))
+        return cls(coeffs, degree, rms, len(inputs))
+
+    def apply(self, inputs: np.ndarray) -> Tuple[float, float]:
+        """Map one input vector to a viewport point, clipped to the viewport."""
+        np.prod(inputs[None, :] ** self.exponents, axis=1, out=self._features)
+        x, y = self._features @ self.coeffs
+        return min(max(float(x), 0.0), 1.0), min(max(float(y), 0.0), 1.0)
+
+    def apply_many(self, inputs: np.ndarray) -> np.ndarray:
+        """(N, N_INPUTS) -> (N, 2), clipped to the viewport."""
+        return np.clip(self._design(np.asarray(inputs, dtype=np.float64), self.exponents) @ self.coeffs, 0.0, 1.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"degree": self.degree, "coeffs": self.coeffs.tolist(), "rms_error": self.rms_error,
+                "samples": self.samples}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GazeCalibration":
+        return cls(np.array(data["coeffs"]), int(data.get("degree", 2)), float(data.get("rms_error", 0.0)),
+                   int(data.get("samples", 0)))
+
+
+class CalibrationSession:
+    """Collects (input, target) pairs while the user fixates a sequence of on-screen targets."""
+    def __init__(self, min_targets=5):
+        self.min_targets = min_targets
+        self._inputs: List[np.ndarray] = []
+        self._targets: List[Tuple[float, float]] = []
+
+    @property
+    def samples(self) -> int:
+        return len(self._inputs)
+
+    @property
+    def targets(self) -> int:
+        return len(set(self._targets))
+
+    def add(self, target: Sequence[float], inputs: np.ndarray):
+        self._targets.append((float(target[0]), float(target[1])))
+        self._inputs.append(np.array(inputs, dtype=np.float64))
+
+    def fit(self, degree: int = 2) -> GazeCalibration:
+        if self.targets < self.min_targets:
+            raise ValueError(f"Need at least {self.min_targets} distinct targets, got {self.targets}")
+        calibration = GazeCalibration.fit(np.stack(self._inputs), np.array(self._targets), degree)
+        logger.info(f"Gaze calibration fitted on {self.samples} samples, RMS error {calibration.rms_error:.3f}")
+        return calibration
+
+
+class GazeProfileStore:
+    """One JSON file per user profile."""
+    def __init__(self, directory: str = "profiles"):
+        self.directory = directory
+
+    def _path(self, user: str) -> str:
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", user) or user.startswith("."):
+            raise ValueError(f"Invalid profile name: {user!r}")
+        return os.path.join(self.directory, f"{user}.json")
+
+    def save(self, user: str, calibration: GazeCalibration):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(user)
+        data = {"user": user, "updated": time.time(), "gaze_calibration": calibration.to_dict()}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        logger.info(f"Saved gaze calibration for {user} to {path}")
+
+    def load(self, user: str) -> Optional[GazeCalibration]:
+        path = self._path(user)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            data = json.load(f)
+        return GazeCalibration.from_dict(data["gaze_calibration"])
+
+    def profiles(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
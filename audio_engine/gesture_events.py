@@ -0,0 +1,136 @@
+import asyncio
+import collections
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from audio_engine.vision_snapshot import VisionSnapshot
+
+logger = logging.getLogger("GestureEvents")
+
+# Event types
+SWIPE_START = "SWIPE_START"
+SWIPE_END = "SWIPE_END"
+GESTURE_START = "GESTURE_START"  # Any other recognizer template
+GESTURE_END = "GESTURE_END"
+PINCH_BEGIN = "PINCH_BEGIN"
+PINCH_UPDATE = "PINCH_UPDATE"
+PINCH_END = "PINCH_END"
+POSE_CHANGE = "POSE_CHANGE"
+
+
+class GestureEvent(NamedTuple):
+    type: str
+    timestamp: float  # Capture time of the frame that produced the event
+    seq: int          # Snapshot seq of that frame
+    data: Dict[str, Any]
+
+
+class GestureEventQueue:
+    """
+    Bounded, thread-safe queue of gesture events.
+    When full, the oldest event is dropped so a stalled consumer never blocks the vision loop.
+    Asyncio code can subscribe to receive its own copy of every event.
+    """
+    def __init__(self, maxsize=256):
+        self._events = collections.deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.dropped = 0
+
+    def put(self, event: GestureEvent):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+            subscribers = list(self._subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Loop already closed
+                self.unsubscribe(queue)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[GestureEvent]:
+        """Block until an event is available. Returns None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._events, timeout):
+                return None
+            return self._events.popleft()
+
+    def subscribe(self, maxsize=64) -> asyncio.Queue:
+        """
+        Subscribe the running event loop. Must be called from a coroutine.
+        :return: asyncio.Queue receiving every event put after this call.
+        """
+        queue = asyncio.Queue(maxsize=maxsize)
+        with self._cond:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._cond:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+    def _deliver(self, queue: asyncio.Queue, event: GestureEvent):
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(event)
+
+
+class GestureEventDetector:
+    """
+    Turns the per-frame snapshot stream into edge-triggered gesture events.
+    Must see every frame (it is fed from the publishing side, not by polling).
+    """
+    def __init__(self, queue: GestureEventQueue, pinch_threshold=10.0, pinch_release_frames=3):
+        """
+        :param pinch_threshold: Minimum |pinch_delta| (px/frame) that counts as pinch motion.
+        :param pinch_release_frames: Frames below threshold before PINCH_END is emitted.
+        """
+        self.queue = queue
+        self.pinch_threshold = pinch_threshold
+        self.pinch_release_frames = pinch_release_frames
+
+        self._gesture = "NONE"
+        self._pose = "UNKNOWN"
+        self._pinching = False
+        self._pinch_idle = 0
+
+    def feed(self, snapshot: VisionSnapshot):
+        emit = self._emit
+
+        # 1. Swipes and other recognized gestures
+        if snapshot.gesture != self._gesture:
+            if self._gesture != "NONE":
+                emit(SWIPE_END if self._gesture.startswith("SWIPE") else GESTURE_END, snapshot,
+                     gesture=self._gesture)
+            if snapshot.gesture != "NONE":
+                emit(SWIPE_START if snapshot.gesture.startswith("SWIPE") else GESTURE_START, snapshot,
+                     gesture=snapshot.gesture, cursor=snapshot.cursor)
+            self._gesture = snapshot.gesture
+
+        # 2. Pose changes
+        if snapshot.pose != self._pose:
+            emit(POSE_CHANGE, snapshot, pose=snapshot.pose, previous=self._pose)
+            self._pose = snapshot.pose
+
+        # 3. Pinch
+        hand_visible = snapshot.pose != "NONE"
+        moving = hand_visible and abs(snapshot.pinch_delta) > self.pinch_threshold
+        if moving:
+            emit(PINCH_UPDATE if self._pinching else PINCH_BEGIN, snapshot,
+                 delta=snapshot.pinch_delta, cursor=snapshot.cursor)
+            self._pinching = True
+            self._pinch_idle = 0
+        elif self._pinching:
+            self._pinch_idle += 1
+            if not hand_visible or self._pinch_idle >= self.pinch_release_frames:
+                emit(PINCH_END, snapshot, cursor=snapshot.cursor)
+                self._pinching = False
+
+    def _emit(self, event_type, snapshot, **data):
+        self.queue.put(GestureEvent(event_type, snapshot.timestamp, snapshot.seq, data))
@@ -0,0 +1,262 @@
+"""
+Temporal gesture recognizer.
+
+Keeps a fixed-length ring buffer of normalized hand landmarks and matches the
+most recent motion against recorded gesture templates with a banded DTW that is
+vectorized across all templates at once.
+
+Landmarks are normalized by palm size (wrist to middle-finger MCP), and the
+buffer is resampled on frame timestamps before matching, so the result does
+not depend on camera resolution, hand distance or frame rate.
+"""
+
+import logging
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("GestureRecognizer")
+
+WRIST = 0
+MIDDLE_MCP = 9
+N_LANDMARKS = 21
+SHAPE_DIM = N_LANDMARKS * 2
+
+
+class GestureTemplate(NamedTuple):
+    name: str
+    motion: np.ndarray     # (L, 2) wrist displacement from window start, in palm sizes
+    shape: np.ndarray      # (L, 42) wrist-relative landmarks, in palm sizes
+    duration: float        # Seconds spanned by the template
+    threshold: float       # Max normalized DTW distance that counts as a match
+    shape_weight: float    # 0 matches on motion only
+
+
+def _smoothstep(n):
+    t = np.linspace(0.0, 1.0, n)
+    return t * t * (3.0 - 2.0 * t)
+
+
+def default_templates(length=16) -> List[GestureTemplate]:
+    """Motion-only swipe templates: the wrist travels ~3 palm sizes sideways in 0.4 s."""
+    templates = []
+    for name, direction in (("SWIPE_RIGHT", 1.0), ("SWIPE_LEFT", -1.0)):
+        motion = np.zeros((length, 2))
+        motion[:, 0] = direction * 3.0 * _smoothstep(length)
+        templates.append(GestureTemplate(name, motion, np.zeros((length, SHAPE_DIM)), 0.4, 0.5, 0.0))
+    return templates
+
+
+def save_templates(path: str, templates: Iterable[GestureTemplate]):
+    templates = list(templates)
+    np.savez(
+        path,
+        names=np.array([t.name for t in templates]),
+        motion=np.stack([t.motion for t in templates]),
+        shape=np.stack([t.shape for t in templates]),
+        duration=np.array([t.duration for t in templates]),
+        threshold=np.array([t.threshold for t in templates]),
+        shape_weight=np.array([t.shape_weight for t in templates]),
+    )
+
+
+def load_templates(path: str) -> List[GestureTemplate]:
+    data = np.load(path)
+    return [
+        GestureTemplate(str(data["names"][k]), data["motion"][k], data["shape"][k],
+                        float(data["duration"][k]), float(data["threshold"][k]), float(data["shape_weight"][k]))
+        for k in range(len(data["names"]))
+    ]
+
+
+class GestureRecognizer:
+    """
+    Per-frame gesture matcher.
+
+    Usage:
+        recognizer.push(hand_pts, timestamp, aspect=w / h)
+        match = recognizer.match()   # (name, distance) or None
+    """
+    def __init__(self, templates: Optional[List[GestureTemplate]] = None, capacity=64, length=16, band=4,
+                 min_interval=0.5):
+        """
+        :param templates: Templates to match; defaults to the built-in swipes.
+        :param capacity: Ring buffer size in frames (64 is ~2 s at 30 FPS).
+        :param length: Samples per resampled window; all templates must use it.
+        :param band: Sakoe-Chiba band half-width for the DTW.
+        :param min_interval: Seconds after a match during which no new match is reported.
+        """
+        self.capacity = capacity
+        self.length = length
+        self.band = band
+        self.min_interval = min_interval
+
+        # Ring buffer (oldest at _head when full)
+        self._ts = np.zeros(capacity)
+        self._wrist = np.zeros((capacity, 2))
+        self._palm = np.ones(capacity)
+        self._shape = np.zeros((capacity, SHAPE_DIM))
+        self._head = 0
+        self._count = 0
+        self._last_match_ts = -np.inf
+
+        # DTW runs on a skewed grid where anti-diagonal d = i + j is one contiguous row, so each
+        # step is plain slicing. Cell (d, i) holds cost[i - 1, j - 1]; these map it back to the
+        # flat (L * L) cost matrix, with cells outside the grid or the band left at +inf.
+        d, i = np.meshgrid(np.arange(2 * length + 1), np.arange(length + 1), indexing="ij")
+        j = d - i
+        in_grid = (i >= 1) & (i <= length) & (j >= 1) & (j <= length) & (np.abs(i - j) <= band)
+        self._skew_cells = np.flatnonzero(in_grid)
+        self._skew_source = ((i - 1) * length + (j - 1))[in_grid]
+        self._unit = np.linspace(0.0, 1.0, length)
+
+        self.templates: List[GestureTemplate] = []
+        self._set_templates(templates if templates is not None else default_templates(length))
+
+    # --- Templates ---
+
+    def add_template(self, template: GestureTemplate):
+        self._set_templates(self.templates + [template])
+
+    def _set_templates(self, templates: List[GestureTemplate]):
+        for t in templates:
+            if t.motion.shape != (self.length, 2) or t.shape.shape != (self.length, SHAPE_DIM):
+                raise ValueError(f"Template {t.name} does not have {self.length} samples")
+        self.templates = list(templates)
+        self._prev_dist = np.full(len(templates), np.inf)
+        if not templates:
+            return
+        self._t_motion = np.stack([t.motion for t in templates])            # (K, L, 2)
+        self._t_shape = np.stack([t.shape for t in templates])              # (K, L, 42)
+        self._t_shape_T = self._t_shape.transpose(0, 2, 1).copy()
+        self._t_shape_sq = np.einsum("kld,kld->kl", self._t_shape, self._t_shape)
+        self._t_duration = np.array([t.duration for t in templates])        # (K,)
+        self._t_threshold = np.array([t.threshold for t in templates])      # (K,)
+        self._t_shape_weight = np.array([t.shape_weight for t in templates]) / N_LANDMARKS
+
+    def capture_template(self, name: str, duration: float, threshold: float, shape_weight=1.0) -> Optional[GestureTemplate]:
+        """Build a template from the last `duration` seconds in the buffer (record a gesture, then call this)."""
+        window = self._resample(np.array([duration]))
+        if window is None:
+            return None
+        motion, shape = window
+        return GestureTemplate(name, motion[0], shape[0], duration, threshold, shape_weight)
+
+    # --- Per-frame API ---
+
+    def reset(self):
+        """Forget buffered motion (hand lost or gesture consumed)."""
+        self._count = 0
+        self._head = 0
+        self._prev_dist = np.full(len(self.templates), np.inf)
+
+    def push(self, pts: np.ndarray, timestamp: float, aspect: float = 1.0):
+        """
+        :param pts: (21, >=2) landmarks in normalized image coordinates.
+        :param timestamp: Frame capture time in seconds.
+        :param aspect: Frame width / height, so x and y are in the same units.
+        """
+        i = self._head
+        wrist = self._wrist[i]
+        wrist[0] = pts[WRIST, 0] * aspect
+        wrist[1] = pts[WRIST, 1]
+
+        shape = self._shape[i].reshape(N_LANDMARKS, 2)
+        shape[:, 0] = pts[:, 0] * aspect
+        shape[:, 1] = pts[:, 1]
+        shape -= wrist
+        palm = np.hypot(shape[MIDDLE_MCP, 0], shape[MIDDLE_MCP, 1]) + 1e-6
+        shape /= palm
+
+        self._palm[i] = palm
+        self._ts[i] = timestamp
+        self._head = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def match(self) -> Optional[Tuple[str, float]]:
+        """
+        Match the buffered motion against all templates.
+        :return: (template name, normalized DTW distance) for the best match under its threshold, or None.
+        """
+        if not self.templates or self._count < 2:
+            return None
+        now = self._ts[(self._head - 1) % self.capacity]
+        if now - self._last_match_ts < self.min_interval:
+            return None
+
+        window = self._resample(self._t_duration)
+        if window is None:
+            return None
+        motion, shape = window
+
+        # Pairwise frame costs for every template at once: (K, L, L)
+        cost = np.linalg.norm(motion[:, :, None, :] - self._t_motion[:, None, :, :], axis=-1)
+        if self._t_shape_weight.any():
+            # |a - b|^2 = |a|^2 + |b|^2 - 2ab as a batched matmul instead of a (K, L, L, 42) temporary
+            sq = np.einsum("kld,kld->kl", shape, shape)[:, :, None] + self._t_shape_sq[:, None, :]
+            sq -= 2.0 * np.matmul(shape, self._t_shape_T)
+            cost += self._t_shape_weight[:, None, None] * np.sqrt(np.maximum(sq, 0.0))
+
+        dist = self._dtw(cost) / self.length
+
+        # Report a template once its distance has bottomed out under the threshold, not on the
+        # first frame it dips under it, so a gesture is matched when it is complete
+        prev = self._prev_dist
+        self._prev_dist = dist
+        valid = (prev <= self._t_threshold) & (dist >= prev)
+        if not valid.any():
+            return None
+
+        k = int(np.argmin(np.where(valid, prev, np.inf)))
+        self._last_match_ts = now
+        self.reset()
+        return self.templates[k].name, float(prev[k])
+
+    # --- Internals ---
+
+    def _ordered(self):
+        """Buffer contents oldest-first."""
+        if self._count < self.capacity:
+            sl = slice(0, self._count)
+            return self._ts[sl], self._wrist[sl], self._palm[sl], self._shape[sl]
+        order = np.roll(np.arange(self.capacity), -self._head)
+        return self._ts[order], self._wrist[order], self._palm[order], self._shape[order]
+
+    def _resample(self, durations: np.ndarray):
+        """
+        Resample the last `duration` seconds of the buffer onto `length` evenly spaced times per duration.
+        Motion is the wrist displacement from the window start divided by the window's mean palm size.
+        :return: (motion (K, L, 2), shape (K, L, 42)) or None if the buffer is too short.
+        """
+        ts, wrist, palm, shape = self._ordered()
+        start = ts[-1] - durations
+        # Windows may start up to one frame interval before the oldest buffered frame
+        frame_dt = (ts[-1] - ts[0]) / max(len(ts) - 1, 1)
+        if start.min() < ts[0] - frame_dt:
+            return None
+
+        grid = start[:, None] + durations[:, None] * self._unit[None, :]      # (K, L)
+        hi = np.clip(np.searchsorted(ts, grid), 1, len(ts) - 1)
+        lo = hi - 1
+        span = ts[hi] - ts[lo]
+        w = np.clip((grid - ts[lo]) / np.where(span > 0, span, 1.0), 0.0, 1.0)[..., None]
+
+        motion = wrist[lo] * (1.0 - w) + wrist[hi] * w
+        motion -= motion[:, :1, :]
+        motion /= (palm[lo] * (1.0 - w[..., 0]) + palm[hi] * w[..., 0]).mean(axis=1)[:, None, None]
+        shape_out = shape[lo] * (1.0 - w) + shape[hi] * w
+        return motion, shape_out
+
+    def _dtw(self, cost: np.ndarray) -> np.ndarray:
+        """Banded DTW over anti-diagonals, vectorized across templates. cost: (K, L, L) -> (K,)"""
+        k, n, _ = cost.shape
+        skewed = np.full((k, 2 * n + 1, n + 1), np.inf)
+        skewed.reshape(k, -1)[:, self._skew_cells] = cost.reshape(k, -1)[:, self._skew_source]
+
+        acc = np.full((k, 2 * n + 1, n + 1), np.inf)
+        acc[:, 0, 0] = 0.0
+        for d in range(2, 2 * n + 1):
+            # Predecessors of (i, j): (i-1, j-1) on d-2, (i-1, j) and (i, j-1) on d-1
+            best = np.minimum(np.minimum(acc[:, d - 2, :-1], acc[:, d - 1, :-1]), acc[:, d - 1, 1:])
+            np.add(skewed[:, d, 1:], best, out=acc[:, d, 1:])
+        return acc[:, 2 * n, n]
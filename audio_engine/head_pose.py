@@ -0,0 +1,184 @@
+import json
+import logging
+import math
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("HeadPose")
+
+# Generic 3D face model (nose, chin, eye corners, mouth corners), arbitrary units
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0), (0.0, -330.0, -65.0), (-225.0, 170.0, -135.0),
+    (225.0, 170.0, -135.0), (-150.0, -150.0, -125.0), (150.0, -150.0, -125.0)
+])
+
+
+class OneEuroFilter:
+    """
+    Speed-adaptive low-pass filter (Casiez et al., "1€ Filter").
+    Heavy smoothing while the value is steady, little lag while it moves.
+    """
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = None
+        self._dx = 0.0
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self._x = None
+        self._t = None
+
+    def __call__(self, x: float, t: float) -> float:
+        if self._x is None or t <= self._t:
+            self._x, self._dx, self._t = x, 0.0, t
+            return x
+        dt = t - self._t
+        dx = (x - self._x) / dt
+        self._dx += self._alpha(self.d_cutoff, dt) * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * abs(self._dx)
+        self._x += self._alpha(cutoff, dt) * (x - self._x)
+        self._t = t
+        return self._x
+
+
+def load_calibration(path: str) -> Tuple[np.ndarray, np.ndarray, Optional[Tuple[int, int]]]:
+    """
+    Load camera intrinsics from a .json ({"camera_matrix", "dist_coeffs", "image_size"})
+    or an .npz written by cv2.calibrateCamera tooling with the same keys.
+    :return: (camera_matrix 3x3, dist_coeffs, (width, height) the calibration was done at, or None)
+    """
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            data = json.load(f)
+    else:
+        data = dict(np.load(path))
+    size = data.get("image_size")
+    return (np.asarray(data["camera_matrix"], dtype="double"),
+            np.asarray(data.get("dist_coeffs", np.zeros(4)), dtype="double").reshape(-1, 1),
+            (int(size[0]), int(size[1])) if size is not None else None)
+
+
+class HeadPoseTracker:
+    """
+    Head pose from six face landmarks with solvePnP.
+
+    - Intrinsics come from the actual frame size (focal length ~ frame width) or a calibration file.
+    - Each solve is seeded with the previous rotation/translation (useExtrinsicGuess).
+    - The solve is skipped when the landmarks have barely moved since the last one.
+    - Yaw/pitch/roll are smoothed with a 1€ filter, and the LEFT/CENTER/RIGHT label uses hysteresis.
+    """
+    def __init__(self, calibration_path=None, min_motion_px=0.75, min_cutoff=1.0, beta=0.05,
+                 yaw_enter=8.0, yaw_exit=4.0):
+        """
+        :param calibration_path: Optional intrinsics file (see load_calibration).
+        :param min_motion_px: Mean landmark displacement below which the previous pose is reused.
+        :param min_cutoff: 1€ filter cutoff (Hz) at rest; lower is smoother.
+        :param beta: 1€ filter speed coefficient; higher follows fast turns more closely.
+        :param yaw_enter: |yaw| in degrees needed to switch from CENTER to LEFT/RIGHT.
+        :param yaw_exit: |yaw| in degrees below which LEFT/RIGHT falls back to CENTER.
+        """
+        self.min_motion_px = min_motion_px
+        self.yaw_enter = yaw_enter
+        self.yaw_exit = yaw_exit
+
+        self._calibration = load_calibration(calibration_path) if calibration_path else None
+        self._frame_size = None
+        self.camera_matrix = None
+        self.dist_coeffs = np.zeros((4, 1))
+
+        self._rvec = None
+        self._tvec = None
+        self._last_pts = np.zeros((len(MODEL_POINTS), 2))
+        self._filters = [OneEuroFilter(min_cutoff, beta) for _ in range(3)]
+        self.angles = (0.0, 0.0, 0.0)  # Smoothed (yaw, pitch, roll) in degrees
+        self.label = "CENTER"
+
+        # Counters for benchmarking
+        self.solves = 0
+        self.skips = 0
+
+    def reset(self):
+        """Drop the warm start and filter history (face lost)."""
+        self._rvec = None
+        self._tvec = None
+        for f in self._filters:
+            f.reset()
+
+    def _intrinsics(self, w, h):
+        if self._frame_size == (w, h):
+            return
+        self._frame_size = (w, h)
+        if self._calibration:
+            matrix, dist, size = self._calibration
+            matrix = matrix.copy()
+            if size and size != (w, h):
+                # Calibrated at another resolution: scale focal lengths and principal point
+                matrix[0] *= w / size[0]
+                matrix[1] *= h / size[1]
+            self.camera_matrix, self.dist_coeffs = matrix, dist
+        else:
+            focal = float(w)
+            self.camera_matrix = np.array([[focal, 0, w / 2.0], [0, focal, h / 2.0], [0, 0, 1]], dtype="double")
+            self.dist_coeffs = np.zeros((4, 1))
+        # Intrinsics changed, so the previous extrinsics are no longer a valid seed
+        self._rvec = None
+        self._tvec = None
+        logger.info(f"Head pose intrinsics set for {w}x{h}")
+
+    def update(self, image_pts: np.ndarray, w: int, h: int, timestamp: float) -> Tuple[float, float, float]:
+        """
+        :param image_pts: (6, 2) float64 pixel coordinates in MODEL_POINTS order.
+        :return: Smoothed (yaw, pitch, roll) in degrees.
+        """
+        self._intrinsics(w, h)
+
+        if self._rvec is not None:
+            motion = np.abs(image_pts - self._last_pts).mean()
+            if motion < self.min_motion_px:
+                self.skips += 1
+                return self.angles
+
+        if self._rvec is not None:
+            ok, rvec, tvec = cv2.solvePnP(MODEL_POINTS, image_pts, self.camera_matrix, self.dist_coeffs,
+                                          rvec=self._rvec, tvec=self._tvec, useExtrinsicGuess=True,
+                                          flags=cv2.SOLVEPNP_ITERATIVE)
+        else:
+            ok, rvec, tvec = cv2.solvePnP(MODEL_POINTS, image_pts, self.camera_matrix, self.dist_coeffs,
+                                          flags=cv2.SOLVEPNP_ITERATIVE)
+        self.solves += 1
+        if not ok or tvec[2, 0] <= 0:
+            # Degenerate solution (behind the camera): start cold next frame
+            self._rvec = self._tvec = None
+            return self.angles
+
+        self._rvec, self._tvec = rvec, tvec
+        self._last_pts[:] = image_pts
+
+        rmat, _ = cv2.Rodrigues(rvec)
+        angles, _, _, _, _, _ = cv2.RQDecomp3x3(rmat)
+        # The model is y-up and the image y-down, so a frontal face decomposes to pitch ~ +/-180
+        pitch = ((angles[0] + 360.0) % 360.0) - 180.0
+        raw = (angles[1], pitch, angles[2])
+        self.angles = tuple(f(a, timestamp) for f, a in zip(self._filters, raw))
+        self._update_label(self.angles[0])
+        return self.angles
+
+    def _update_label(self, yaw):
+        if self.label == "CENTER":
+            if yaw > self.yaw_enter: self.label = "LEFT"
+            elif yaw < -self.yaw_enter: self.label = "RIGHT"
+        elif abs(yaw) < self.yaw_exit:
+            self.label = "CENTER"
+        elif yaw > self.yaw_enter:
+            self.label = "LEFT"
+        elif yaw < -self.yaw_enter:
+            self.label = "RIGHT"
@@ -0,0 +1,51 @@
+"""
+Where the displayed image sits on screen, as reported by the dashboard viewer.
+
+Calibrated gaze points and the hand cursor are viewport coordinates (the
+camera frame is mirrored, so the normalized fingertip works as a pointer over
+the viewport), while annotations and highlight boxes are normalized to the
+image. They only coincide while the image fills the viewport unzoomed; after
+ZOOM_IN or a scroll the same point on screen is a different place on the image.
+
+The dashboard sends {"type": "VIEW_STATE", "image": ..., "rect": [left, top,
+right, bottom]} with the image's on-screen rectangle (viewport-normalized)
+whenever its zoom/pan changes, and ImageView maps viewport points into it.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+# Image filling the viewport: viewport and image coordinates are the same
+FULL_VIEW = (0.0, 0.0, 1.0, 1.0)
+
+
+class ImageView:
+    def __init__(self):
+        # (image, rect) swapped as one tuple: the WebSocket handler writes, fusion reads
+        self._view: Tuple[Optional[str], Tuple[float, float, float, float]] = (None, FULL_VIEW)
+
+    @property
+    def image(self) -> Optional[str]:
+        return self._view[0]
+
+    @property
+    def rect(self) -> Tuple[float, float, float, float]:
+        return self._view[1]
+
+    def update(self, rect: Sequence[float], image: Optional[str] = None):
+        """
+        :param rect: On-screen [left, top, right, bottom] of the image, normalized to the viewport.
+        :param image: Image the rectangle belongs to.
+        """
+        left, top, right, bottom = (float(v) for v in rect)
+        if not (right > left and bottom > top):
+            raise ValueError(f"Empty view rectangle: {list(rect)}")
+        self._view = (image, (left, top, right, bottom))
+
+    def to_image(self, x: float, y: float) -> Optional[Tuple[float, float]]:
+        """Viewport point -> normalized image point, or None if it is not over the image."""
+        left, top, right, bottom = self._view[1]
+        u = (x - left) / (right - left)
+        v = (y - top) / (bottom - top)
+        if not (0.0 <= u <= 1.0 and 0.0 <= v <= 1.0):
+            return None
+        return u, v
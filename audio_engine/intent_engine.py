@@ -2,6 +2,9 @@
 import logging
 import json
 import re
+import time
+
+from audio_engine import metrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -37,14 +40,20 @@ class IntentEngine:
         rule_intent = self._rule_based_parse(text)
         if rule_intent:
             logger.info(f"Rule match: {rule_intent}")
+            metrics.INTENTS.labels("RULE").inc()
             return rule_intent
 
         # 2. LLM Fallback (Slow Path)
         if self.llm:
-            return self._llm_parse(text)
+            started = time.perf_counter()
+            result = self._llm_parse(text)
+            metrics.LLM_SECONDS.observe(time.perf_counter() - started)
+            metrics.INTENTS.labels("LLM" if result.get("source") == "LLM" else "NONE").inc()
+            return result
         
         # 3. Fail
         logger.warning("No intent matched.")
+        metrics.INTENTS.labels("NONE").inc()
         return {"intent": "UNKNOWN", "confidence": 0.0}
 
     def _rule_based_parse(self, text):
@@ -0,0 +1,147 @@
+"""
+Listen requests (/voice/listen) as jobs on a small worker pool.
+
+submit() returns a ListenJob at once; a worker captures a chunk and runs it
+through the pipeline. Requests that arrive while a job is still queued or
+capturing join that job instead of starting another capture, so concurrent
+callers share one microphone recording and one result. A job stops accepting
+requests once its audio is captured; the next request starts a new job, whose
+capture can overlap the previous job's transcription.
+
+Results are kept for the most recent `history` jobs and can be awaited from a
+thread (ListenJob.wait) or from the event loop (ListenJobQueue.wait_async).
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from audio_engine import metrics
+
+logger = logging.getLogger("ListenJobs")
+
+QUEUED = "queued"
+CAPTURING = "capturing"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+
+class ListenJob:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.state = QUEUED
+        # Number of /voice/listen requests served by this job
+        self.requests = 1
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.future: Optional[concurrent.futures.Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job has finished. :return: False on timeout."""
+        try:
+            self.future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"job_id": self.job_id, "status": self.state, "requests": self.requests,
+                "created_at": self.created_at, "finished_at": self.finished_at}
+        if self.state == DONE:
+            data["result"] = self.result
+        elif self.state == FAILED:
+            data["error"] = self.error
+        return data
+
+
+class ListenJobQueue:
+    def __init__(self, listen: Callable[..., Dict[str, Any]], workers: int = 2, history: int = 256,
+                 on_done: Optional[Callable[[ListenJob], None]] = None):
+        """
+        :param listen: Runs one capture + pipeline cycle; called as listen(on_captured=callback),
+                       and must call on_captured() once the audio has been recorded.
+        :param workers: Worker threads. Captures are serialized by `listen` itself; more than one
+                        worker lets a capture overlap the previous job's processing.
+        :param history: Finished jobs kept for lookup by ID.
+        :param on_done: Called on the worker thread with each finished job (e.g. to broadcast it).
+        """
+        self.listen = listen
+        self.on_done = on_done
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ListenWorker")
+        self._jobs: "collections.OrderedDict[str, ListenJob]" = collections.OrderedDict()
+        self._history = history
+        # The job new requests join (queued or capturing), if any
+        self._open: Optional[ListenJob] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._prefix = f"{int(time.time()) & 0xffffff:06x}"
+
+    def submit(self) -> ListenJob:
+        with self._lock:
+            job = self._open
+            if job is not None:
+                job.requests += 1
+                metrics.LISTEN_JOBS.labels("coalesced").inc()
+                return job
+            job = self._open = ListenJob(f"{self._prefix}-{next(self._ids)}")
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self._history and next(iter(self._jobs.values())).finished:
+                self._jobs.popitem(last=False)
+            job.future = self._executor.submit(self._run, job)
+        metrics.LISTEN_JOBS.labels("new").inc()
+        return job
+
+    def get(self, job_id: str) -> Optional[ListenJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait_async(self, job: ListenJob, timeout: float) -> bool:
+        """Await a job from the event loop without holding a thread. :return: False on timeout."""
+        try:
+            # shield: a timeout must not cancel the job for other waiters
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _close(self, job: ListenJob):
+        with self._lock:
+            if self._open is job:
+                self._open = None
+
+    def _captured(self, job: ListenJob):
+        self._close(job)
+        job.state = PROCESSING
+
+    def _run(self, job: ListenJob):
+        job.state = CAPTURING
+        try:
+            job.result = self.listen(on_captured=lambda: self._captured(job))
+            job.state = DONE
+        except Exception as e:
+            logger.error(f"Listen job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.state = FAILED
+        finally:
+            self._close(job)
+            job.finished_at = time.time()
+        if self.on_done:
+            try:
+                self.on_done(job)
+            except Exception as e:
+                logger.error(f"Listen job callback failed: {e}")
@@ -0,0 +1,332 @@
+"""
+Process-wide metrics in Prometheus text format (served at /metrics).
+
+Instruments are updated from the vision loop at frame rate and from the voice,
+gesture and event-loop threads, so updates take no lock: every thread writes to
+its own shard of an instrument and a scrape sums the shards. A lock is only
+taken the first time a thread (or a new label combination) touches an
+instrument. Values read mid-update may lag by one observation, never tear.
+
+    from audio_engine import metrics
+    metrics.ASR_SECONDS.observe(0.42)
+    metrics.ACTIONS.labels("ZOOM_IN", "ok").inc()
+    text = metrics.REGISTRY.render()
+
+The instruments the engines export are defined at the bottom of this module.
+In ZT_VISION_MODE=process the frame loop runs in the worker process, so the
+per-frame vision instruments stay empty in the API process.
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds (1 ms .. 10 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if v == int(v) and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Sharded:
+    """Per-thread shards: the owning thread is the only writer of its shard."""
+    def __init__(self):
+        self._shards: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> list:
+        raise NotImplementedError
+
+    def _shard(self) -> list:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._lock:
+                shard = self._shards[ident] = self._new_shard()
+        return shard
+
+    def _all_shards(self) -> List[list]:
+        with self._lock:
+            return list(self._shards.values())
+
+
+class _CounterChild(_Sharded):
+    def _new_shard(self):
+        return [0.0]
+
+    def inc(self, amount: float = 1.0):
+        self._shard()[0] += amount
+
+    def value(self) -> float:
+        return sum(s[0] for s in self._all_shards())
+
+
+class _GaugeChild(_Sharded):
+    """set() replaces the value; inc()/dec() add per-thread deltas on top of it."""
+    def __init__(self):
+        super().__init__()
+        self._base = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_shard(self):
+        return [0.0]
+
+    def set(self, value: float):
+        with self._lock:
+            self._base = float(value)
+            for shard in self._shards.values():
+                shard[0] = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self._shard()[0] += amount
+
+    def dec(self, amount: float = 1.0):
+        self._shard()[0] -= amount
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Read the value from `function` at scrape time (e.g. a queue's length)."""
+        self._function = function
+
+    def value(self) -> float:
+        function = self._function
+        if function is not None:
+            try:
+                return float(function())
+            except Exception:
+                return math.nan
+        return self._base + sum(s[0] for s in self._all_shards())
+
+
+class _HistogramChild(_Sharded):
+    def __init__(self, buckets: Tuple[float, ...]):
+        super().__init__()
+        self.buckets = buckets
+
+    def _new_shard(self):
+        # Per-bucket counts (last is +Inf), then the sum
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, value: float):
+        shard = self._shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """(cumulative bucket counts, count, sum)"""
+        n = len(self.buckets) + 1
+        counts = [0] * n
+        total = 0.0
+        for shard in self._all_shards():
+            for i in range(n):
+                counts[i] += shard[i]
+            total += shard[-1]
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, running, total
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._unlabelled = self._child(())
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _make_child(self):
+        raise NotImplementedError
+
+    def _child(self, values: Tuple[str, ...]):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._make_child()
+        return child
+
+    def labels(self, *values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        return self._child(tuple(str(v) for v in values))
+
+    def _label_str(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._render_samples()
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        return [f"{self.name}{self._label_str(values)} {_format_value(child.value())}"
+                for values, child in self._items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _make_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled.inc(amount)
+
+    def value(self) -> float:
+        return self._unlabelled.value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _make_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._unlabelled.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled.dec(amount)
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        self._unlabelled.set_function(function)
+
+    def value(self) -> float:
+        return self._unlabelled.value()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _make_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabelled.observe(value)
+
+    def snapshot(self):
+        return self._unlabelled.snapshot()
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for values, child in self._items():
+            cumulative, count, total = child.snapshot()
+            for bound, c in zip(bounds, cumulative):
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{self._label_str(values, le)} {c}")
+            lines.append(f"{self.name}_sum{self._label_str(values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_str(values)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Vision ---
+VISION_FPS = Gauge("zt_vision_fps", "Vision loop frames per second (moving average over ~10 frames)")
+VISION_FRAMES = Counter("zt_vision_frames_total", "Frames processed by the vision loop")
+VISION_FRAME_SECONDS = Histogram("zt_vision_frame_seconds", "Vision loop time per frame by stage", ["stage"],
+                                 buckets=(0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.066, 0.1, 0.25, 0.5))
+VISION_DROPPED_FRAMES = Counter("zt_vision_dropped_frames_total",
+                                "Camera frames skipped because the loop fell behind (estimated from frame intervals)")
+GESTURE_ACTIONS = Counter("zt_gesture_actions_total",
+                          "Gesture actions merged into a pending one or dispatched to VisionBridge", ["result"])
+VISION_PUSH = Counter("zt_vision_push_total", "Vision state messages queued for WebSocket subscribers by kind", ["kind"])
+
+# --- Voice ---
+ECHO_SUPPRESSED = Counter("zt_echo_suppressed_total",
+                          "Captures recognized as the assistant's own speech, muted before ASR (gate) or "
+                          "matched after it (transcript)", ["stage"])
+VAD_DECISIONS = Counter("zt_vad_decisions_total", "Captured chunks by voice-activity decision", ["decision"])
+ASR_SECONDS = Histogram("zt_asr_seconds", "Whisper transcription time per chunk")
+ASR_REALTIME_FACTOR = Histogram("zt_asr_realtime_factor", "Transcription time / audio duration",
+                                buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0))
+INTENTS = Counter("zt_intent_total", "Parsed utterances by the tier that resolved them", ["tier"])
+LLM_SECONDS = Histogram("zt_intent_llm_seconds", "LLM fallback parse time")
+LISTEN_JOBS = Counter("zt_listen_jobs_total", "/voice/listen requests by whether they started a capture or joined one",
+                      ["result"])
+VOICE_STAGE_SECONDS = Histogram("zt_voice_stage_seconds", "Voice pipeline time per utterance by stage", ["stage"])
+TTS_REQUESTS = Counter("zt_tts_requests_total", "Speech requests by outcome (done, superseded, preempted, cancelled, failed)",
+                       ["outcome"])
+TTS_SYNTHESIS_SECONDS = Histogram("zt_tts_synthesis_seconds", "Time to synthesize one phrase (cache misses and warm-up)")
+TTS_SYNTHESIS_SAVED = Counter("zt_tts_synthesis_saved_seconds_total",
+                              "Synthesis time avoided by phrase cache hits (as measured when each phrase was made)")
+TTS_FIRST_AUDIO_SECONDS = Histogram("zt_tts_first_audio_seconds",
+                                    "Time from starting a speech request to its first audio reaching the output")
+TTS_REQUEST_SYNTHESIS_SECONDS = Histogram("zt_tts_request_synthesis_seconds",
+                                          "Total synthesis time per speech request (all chunks)")
+VOICE_QUEUE_DEPTH = Gauge("zt_voice_pipeline_queue_depth", "Utterances waiting in front of each voice pipeline stage",
+                          ["stage"])
+VOICE_STAGE_ITEMS = Counter("zt_voice_pipeline_items_total", "Utterances processed by each voice pipeline stage",
+                            ["stage"])
+VOICE_STAGE_BUSY = Counter("zt_voice_pipeline_busy_seconds_total", "Time each voice pipeline worker spent processing",
+                           ["stage"])
+
+# --- Caches ---
+CACHE_REQUESTS = Counter("zt_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+
+# --- Actions and clients ---
+ACTIONS = Counter("zt_actions_total", "VisionBridge dispatches by intent and result", ["intent", "result"])
+BRIDGE_DISPATCH_SECONDS = Histogram("zt_bridge_dispatch_seconds",
+                                    "VisionBridge.execute_action time by intent (callback included, listeners not)",
+                                    ["intent"])
+WS_CLIENTS = Gauge("zt_ws_clients", "Connected WebSocket clients")
+WS_SEND_SECONDS = Histogram("zt_ws_send_seconds", "Time to hand one message to a WebSocket client")
+WS_QUEUE_DEPTH = Gauge("zt_ws_queue_depth", "Messages queued for WebSocket clients and not yet sent")
+WS_EVICTIONS = Counter("zt_ws_evictions_total", "WebSocket clients disconnected for being too slow")
+WS_COALESCED = Counter("zt_ws_coalesced_total", "Queued state messages replaced by a newer one before sending")
@@ -0,0 +1,164 @@
+"""
+Waveform cache for TTS phrases.
+
+Nearly everything the assistant says comes from a small fixed set
+("Executing zoom in.", "No image loaded.", ...), so synthesized waveforms are
+kept in an in-memory LRU and, optionally, on disk as .npz files keyed by
+model, voice and text. warm() synthesizes a list of phrases on a background
+thread, so the first time a confirmation is needed it only has to be played.
+Each entry remembers how long it took to synthesize; hits add that time to
+zt_tts_synthesis_saved_seconds_total.
+"""
+
+import collections
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from audio_engine import metrics
+
+logger = logging.getLogger("PhraseCache")
+
+
+class PhraseCache:
+    def __init__(self, synthesize: Callable[[str], np.ndarray], model: str, voice: str = "",
+                 capacity: int = 128, directory: Optional[str] = None):
+        """
+        :param synthesize: text -> float32 waveform (called on a miss, possibly from the warm-up thread).
+        :param model: Model name; part of the disk key so switching models never plays stale audio.
+        :param voice: Speaker/voice name, also part of the disk key.
+        :param capacity: Phrases kept in memory (least recently used are dropped first).
+        :param directory: Optional on-disk cache; None keeps phrases in memory only.
+        """
+        self._synthesize = synthesize
+        self.model = model
+        self.voice = voice
+        self.capacity = capacity
+        self.directory = directory
+        # text -> (waveform, seconds it took to synthesize)
+        self._entries: "collections.OrderedDict[str, Tuple[np.ndarray, float]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._warmup: Optional[threading.Thread] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, text: str):
+        return text in self._entries
+
+    def _path(self, text: str) -> str:
+        key = hashlib.sha1(f"{self.model}\n{self.voice}\n{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _remember(self, text: str, wav: np.ndarray, seconds: float):
+        with self._lock:
+            self._entries[text] = (wav, seconds)
+            self._entries.move_to_end(text)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def _load(self, text: str) -> Optional[Tuple[np.ndarray, float]]:
+        if not self.directory:
+            return None
+        path = self._path(text)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return data["wav"].astype(np.float32, copy=False), float(data["seconds"])
+        except Exception as e:
+            logger.warning(f"Unreadable cached phrase {path}: {e}")
+            return None
+
+    def _store(self, text: str, wav: np.ndarray, seconds: float):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(text)
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, wav=wav, seconds=np.float64(seconds))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write phrase cache: {e}")
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Cached waveform (memory, then disk) or None; counts as a hit or miss."""
+        with self._lock:
+            entry = self._entries.get(text)
+            if entry is not None:
+                self._entries.move_to_end(text)
+        if entry is None:
+            entry = self._load(text)
+            if entry is not None:
+                self._remember(text, *entry)
+        if entry is None:
+            self.misses += 1
+            metrics.CACHE_REQUESTS.labels("tts_phrases", "miss").inc()
+            return None
+        self.hits += 1
+        self.saved_seconds += entry[1]
+        metrics.CACHE_REQUESTS.labels("tts_phrases", "hit").inc()
+        metrics.TTS_SYNTHESIS_SAVED.inc(entry[1])
+        return entry[0]
+
+    def synthesize(self, text: str) -> np.ndarray:
+        """Cached waveform, synthesizing (and caching) it on a miss."""
+        wav = self.get(text)
+        if wav is None:
+            wav = self._add(text)
+        return wav
+
+    def _add(self, text: str) -> np.ndarray:
+        started = time.perf_counter()
+        wav = np.asarray(self._synthesize(text), dtype=np.float32)
+        seconds = time.perf_counter() - started
+        metrics.TTS_SYNTHESIS_SECONDS.observe(seconds)
+        self._remember(text, wav, seconds)
+        self._store(text, wav, seconds)
+        return wav
+
+    def warm(self, phrases: Iterable[str]) -> threading.Thread:
+        """Load or synthesize phrases on a background thread (not counted as hits or misses)."""
+        phrases = list(dict.fromkeys(phrases))
+
+        def run():
+            started = time.perf_counter()
+            synthesized = 0
+            for text in phrases:
+                if text in self._entries:
+                    continue
+                entry = self._load(text)
+                if entry is not None:
+                    self._remember(text, *entry)
+                    continue
+                try:
+                    self._add(text)
+                    synthesized += 1
+                except Exception as e:
+                    logger.error(f"Warm-up synthesis failed for {text!r}: {e}")
+            logger.info(f"Phrase cache warm: {len(phrases)} phrases ({synthesized} synthesized) "
+                        f"in {time.perf_counter() - started:.1f} s")
+
+        self._warmup = threading.Thread(target=run, name="TTSWarmup", daemon=True)
+        self._warmup.start()
+        return self._warmup
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": sum(wav.nbytes for wav, _ in list(self._entries.values())),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "synthesis_saved_seconds": self.saved_seconds,
+        }
@@ -0,0 +1,173 @@
+"""
+On-demand profiling of the running assistant (served under /debug when ZT_PROFILING=1).
+
+SamplingProfiler samples the Python stacks of every thread (vision loop, voice
+loop, gesture loop, event loop, executor workers) from a background thread at a
+fixed interval, so nothing has to be instrumented or restarted. The cost is one
+stack walk per thread per sample (about 2% of one core with ten threads at
+the default 100 Hz), paid only while a profile runs. Output is either collapsed stacks (one
+"thread;frame;frame count" line per stack, for flamegraph.pl / speedscope) or
+a speedscope JSON file with one sampled profile per thread.
+
+memory_diff() takes two tracemalloc snapshots an interval apart and returns the
+allocation sites that grew the most. tracemalloc slows allocation while
+tracing, so it is only enabled for the interval unless it was already on.
+"""
+
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("Profiler")
+
+# (filename, function, first line) identifies a frame; line-level keys would split functions apart
+FrameKey = Tuple[str, str, int]
+
+
+def _short_path(filename: str) -> str:
+    """Repo-relative path for our code, package-relative for site-packages."""
+    cwd = os.getcwd()
+    if filename.startswith(cwd + os.sep):
+        return os.path.relpath(filename, cwd)
+    marker = "site-packages" + os.sep
+    i = filename.find(marker)
+    return filename[i + len(marker):] if i >= 0 else filename
+
+
+class Profile:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.duration = 0.0
+        self.samples_taken = 0
+        # CPU seconds the sampler itself used
+        self.sampler_cpu = 0.0
+        # Thread name -> stack (root first) -> sample count
+        self.stacks: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+
+    @staticmethod
+    def _label(key: FrameKey) -> str:
+        filename, function, line = key
+        return f"{function} ({_short_path(filename)}:{line})"
+
+    def to_collapsed(self) -> str:
+        lines = []
+        for thread, stacks in sorted(self.stacks.items()):
+            for stack, count in stacks.most_common():
+                frames = ";".join(self._label(k).replace(";", ":") for k in stack)
+                lines.append(f"{thread};{frames} {count}" if frames else f"{thread} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, name: str = "zero-touch") -> Dict[str, Any]:
+        frames: List[Dict[str, Any]] = []
+        index: Dict[FrameKey, int] = {}
+        profiles = []
+        for thread, stacks in sorted(self.stacks.items()):
+            samples, weights = [], []
+            for stack, count in stacks.items():
+                ids = []
+                for key in stack:
+                    i = index.get(key)
+                    if i is None:
+                        i = index[key] = len(frames)
+                        frames.append({"name": key[1], "file": _short_path(key[0]), "line": key[2]})
+                    ids.append(i)
+                samples.append(ids)
+                weights.append(count * self.interval)
+            profiles.append({"type": "sampled", "name": thread, "unit": "seconds", "startValue": 0,
+                             "endValue": self.duration, "samples": samples, "weights": weights})
+        return {"$schema": "https://www.speedscope.app/file-format-schema.json", "name": name,
+                "exporter": "zero-touch profiler", "shared": {"frames": frames}, "profiles": profiles}
+
+    def summary(self) -> Dict[str, Any]:
+        return {"duration": self.duration, "interval": self.interval, "samples": self.samples_taken,
+                "threads": {t: sum(s.values()) for t, s in self.stacks.items()},
+                "sampler_cpu_pct": 100.0 * self.sampler_cpu / self.duration if self.duration else 0.0}
+
+
+class SamplingProfiler:
+    """One profile at a time per process; run() blocks the calling thread for the duration."""
+    _busy = threading.Lock()
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        """
+        :param interval: Seconds between samples.
+        :param max_depth: Frames kept per stack (innermost are kept).
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+
+    def run(self, duration: float) -> Profile:
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            return self._run(duration)
+        finally:
+            self._busy.release()
+
+    def _run(self, duration: float) -> Profile:
+        profile = Profile(self.interval)
+        own = threading.get_ident()
+        logger.info(f"Sampling all threads every {1000 * self.interval:.0f} ms for {duration:.1f} s")
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        deadline = start + duration
+        next_sample = start
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_sample:
+                time.sleep(next_sample - now)
+            self._sample(profile, own)
+            # Fell behind (e.g. GIL contention): skip the missed samples instead of bursting
+            next_sample = max(next_sample + self.interval, time.perf_counter())
+        profile.duration = time.perf_counter() - start
+        profile.sampler_cpu = time.thread_time() - cpu_start
+        return profile
+
+    def _sample(self, profile: Profile, own: int):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            profile.stacks[names.get(ident, f"thread-{ident}")][tuple(stack)] += 1
+        profile.samples_taken += 1
+
+
+def memory_diff(duration: float, top: int = 30, frames: int = 10) -> Dict[str, Any]:
+    """
+    Allocation growth by source line over `duration` seconds (blocks the calling thread).
+    :param frames: Traceback depth tracemalloc records when it has to be started here.
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(duration)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return {
+        "duration": duration,
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": [{"file": _short_path(s.traceback[0].filename), "line": s.traceback[0].lineno,
+                 "size_diff": s.size_diff, "count_diff": s.count_diff, "size": s.size} for s in stats[:top]],
+    }
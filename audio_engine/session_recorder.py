@@ -0,0 +1,411 @@
+"""
+Multimodal session recorder and replay.
+
+A recording is one append-only file of chunks. Every chunk is a fixed
+24-byte header (magic, version, stream id, row count, payload bytes) followed
+by the rows of one stream as a packed numpy array:
+
+    frames       FRAME_DTYPE    per-frame face/hand landmarks (normalized) and frame size
+    states       STATE_DTYPE    published vision states (same layout as the shared ring)
+    audio        int16          raw mono PCM
+    audio_index  AUDIO_DTYPE    one row per captured chunk: time, rate, offset/count into `audio`
+    events       EVENT_DTYPE    transcripts, intents, fusion decisions, actions: offset/length into `event_data`
+    event_data   uint8          JSON payloads
+    metadata     uint8          JSON, first chunk of the file
+
+Producers only copy into preallocated column buffers under a short lock. A
+background thread writes full buffers (and every `flush_interval` seconds the
+partial ones) and hands them back, so memory is bounded by the buffer pool;
+if the writer falls behind, rows are dropped and counted instead of blocking
+the vision or audio threads. A crash loses at most the unflushed tail; the
+reader ignores a truncated last chunk.
+
+Usage:
+    recorder = SessionRecorder("session.ztrec")
+    vision_manager.recorder = recorder
+    ...
+    recorder.close()
+
+    reader = SessionReader("session.ztrec")
+    snapshots = replay_vision(reader, VisionManager(source="synthetic"))
+"""
+
+import collections
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from audio_engine.vision_process import STATE_DTYPE, fill_record, record_to_snapshot
+from audio_engine.vision_snapshot import VisionSnapshot
+
+logger = logging.getLogger("SessionRecorder")
+
+MAGIC = b"ZTRC"
+VERSION = 1
+# Rows in VisionManager._GAZE_INDICES: 8 iris, 4 eye corners, 6 head-pose points
+N_GAZE_POINTS = 18
+
+CHUNK_DTYPE = np.dtype([("magic", "S4"), ("version", "<u2"), ("stream", "<u2"), ("count", "<u8"), ("nbytes", "<u8")])
+
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("seq", "<u8"),
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("gaze_ran", "u1"),
+    ("face_present", "u1"),
+    ("hand_present", "u1"),
+    ("gaze_pts", "<f4", (N_GAZE_POINTS, 2)),
+    ("hand_pts", "<f4", (21, 3)),
+])
+AUDIO_DTYPE = np.dtype([("timestamp", "<f8"), ("sample_rate", "<u4"), ("offset", "<u8"), ("count", "<u4")])
+EVENT_DTYPE = np.dtype([("timestamp", "<f8"), ("kind", "S16"), ("offset", "<u8"), ("length", "<u4")])
+
+# Event kinds
+TRANSCRIPT = "TRANSCRIPT"
+INTENT = "INTENT"
+FUSION = "FUSION"
+ACTION = "ACTION"
+
+# stream id -> (name, dtype)
+STREAMS = {
+    0: ("metadata", np.dtype(np.uint8)),
+    1: ("frames", FRAME_DTYPE),
+    2: ("states", STATE_DTYPE),
+    3: ("audio", np.dtype("<i2")),
+    4: ("audio_index", AUDIO_DTYPE),
+    5: ("events", EVENT_DTYPE),
+    6: ("event_data", np.dtype(np.uint8)),
+}
+STREAM_IDS = {name: sid for sid, (name, _) in STREAMS.items()}
+
+
+class _Column:
+    """Preallocated row buffers for one stream. Not thread-safe; the recorder holds its lock."""
+    def __init__(self, stream_id: int, capacity: int, pool: int):
+        self.stream_id = stream_id
+        self.capacity = capacity
+        self.free = collections.deque(np.zeros(capacity, dtype=STREAMS[stream_id][1]) for _ in range(pool))
+        self.buf = self.free.popleft()
+        self.n = 0
+        self.total = 0      # Rows accepted so far (offsets for variable-length streams)
+        self.dropped = 0
+
+    def room(self, count: int, flush) -> bool:
+        """Make room for `count` rows, handing a full buffer to `flush`. False if no buffer is free."""
+        if self.n + count <= self.capacity:
+            return True
+        if self.n:
+            if not self.free:
+                return False
+            flush(self, self.buf, self.n)
+            self.buf = self.free.popleft()
+            self.n = 0
+        return count <= self.capacity
+
+
+class SessionRecorder:
+    """Opt-in recorder; every record_* call is cheap and never blocks on disk."""
+    def __init__(self, path: str, flush_interval=0.5, frame_rows=256, audio_samples=16000 * 4, pool=4,
+                 metadata: Optional[Dict[str, Any]] = None):
+        """
+        :param path: Output file (created, or appended to).
+        :param flush_interval: Seconds between writes of partially filled buffers.
+        :param frame_rows: Rows per frame/state buffer (~8 s at 30 FPS).
+        :param audio_samples: Samples per audio buffer.
+        :param pool: Buffers per stream; bounds memory together with the sizes above.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[_Column, np.ndarray, int]]]" = queue.Queue()
+        self._columns = {
+            "frames": _Column(1, frame_rows, pool),
+            "states": _Column(2, frame_rows, pool),
+            "audio": _Column(3, audio_samples, pool),
+            "audio_index": _Column(4, 64, pool),
+            "events": _Column(5, 256, pool),
+            "event_data": _Column(6, 64 * 1024, pool),
+        }
+        self._state_scratch = np.zeros((), dtype=STATE_DTYPE)
+
+        # Writer statistics
+        self.bytes_written = 0
+        self.writer_cpu = 0.0
+        self.started = time.time()
+        self.closed = False
+
+        meta = {"version": VERSION, "started": self.started, **(metadata or {})}
+        self._write_chunk(0, np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+
+        self._writer = threading.Thread(target=self._writer_loop, name="SessionRecorder", daemon=True)
+        self._writer.start()
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        return {name: c.dropped for name, c in self._columns.items() if c.dropped}
+
+    # --- Producers ---
+
+    def record_frame(self, timestamp, seq, width, height, gaze_ran, gaze_pts=None, hand_pts=None):
+        """Landmarks as seen by VisionManager post-processing (normalized, before scaling)."""
+        with self._lock:
+            col = self._columns["frames"]
+            if not col.room(1, self._enqueue):
+                col.dropped += 1
+                return
+            row = col.buf[col.n]
+            row["timestamp"] = timestamp
+            row["seq"] = seq
+            row["width"] = width
+            row["height"] = height
+            row["gaze_ran"] = gaze_ran
+            row["face_present"] = gaze_pts is not None
+            row["hand_present"] = hand_pts is not None
+            if gaze_pts is not None:
+                row["gaze_pts"] = gaze_pts
+            if hand_pts is not None:
+                row["hand_pts"] = hand_pts
+            col.n += 1
+
+    def record_state(self, snapshot: VisionSnapshot):
+        with self._lock:
+            col = self._columns["states"]
+            if not col.room(1, self._enqueue):
+                col.dropped += 1
+                return
+            fill_record(self._state_scratch, snapshot)
+            col.buf[col.n] = self._state_scratch
+            col.n += 1
+
+    def record_audio(self, timestamp: float, samples: np.ndarray, sample_rate: int):
+        """Mono float32 PCM in [-1, 1]; stored as int16."""
+        count = len(samples)
+        with self._lock:
+            col, index = self._columns["audio"], self._columns["audio_index"]
+            # The samples may span buffers (the stream is contiguous); every buffer filled on the way needs
+            # a free one after it. All or nothing, so the offsets in the index stay valid.
+            filled = (col.n + count - 1) // col.capacity if count else 0
+            if filled > len(col.free) or not index.room(1, self._enqueue):
+                col.dropped += count
+                return
+            done = 0
+            while done < count:
+                if col.n == col.capacity:
+                    self._enqueue(col, col.buf, col.n)
+                    col.buf = col.free.popleft()
+                    col.n = 0
+                take = min(count - done, col.capacity - col.n)
+                self._to_pcm(samples[done:done + take], col.buf[col.n:col.n + take])
+                col.n += take
+                done += take
+            row = index.buf[index.n]
+            row["timestamp"] = timestamp
+            row["sample_rate"] = sample_rate
+            row["offset"] = col.total
+            row["count"] = count
+            index.n += 1
+            col.total += count
+
+    @staticmethod
+    def _to_pcm(samples, out):
+        np.multiply(np.clip(samples, -1.0, 1.0), 32767.0, out=out, casting="unsafe")
+
+    def record_event(self, kind: str, data: Dict[str, Any], timestamp: Optional[float] = None):
+        """Transcripts, intent packets, fusion decisions and executed actions (JSON-serializable dicts)."""
+        payload = np.frombuffer(json.dumps(data, default=str).encode(), dtype=np.uint8)
+        with self._lock:
+            col, blob = self._columns["events"], self._columns["event_data"]
+            if not col.room(1, self._enqueue) or not blob.room(len(payload), self._enqueue):
+                col.dropped += 1
+                return
+            blob.buf[blob.n:blob.n + len(payload)] = payload
+            row = col.buf[col.n]
+            row["timestamp"] = time.time() if timestamp is None else timestamp
+            row["kind"] = kind.encode()
+            row["offset"] = blob.total
+            row["length"] = len(payload)
+            blob.n += len(payload)
+            blob.total += len(payload)
+            col.n += 1
+
+    # --- Writer ---
+
+    def _enqueue(self, col: _Column, buf: np.ndarray, n: int):
+        self._queue.put((col, buf, n))
+
+    def _flush_all(self):
+        with self._lock:
+            for col in self._columns.values():
+                if col.n and col.free:
+                    self._enqueue(col, col.buf, col.n)
+                    col.buf = col.free.popleft()
+                    col.n = 0
+
+    def _write_chunk(self, stream_id: int, rows: np.ndarray):
+        header = np.zeros((), dtype=CHUNK_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["stream"] = stream_id
+        header["count"] = len(rows)
+        header["nbytes"] = rows.nbytes
+        self._file.write(header.tobytes())
+        self._file.write(memoryview(np.ascontiguousarray(rows)).cast("B"))
+        self.bytes_written += CHUNK_DTYPE.itemsize + rows.nbytes
+
+    def _writer_loop(self):
+        cpu_start = time.thread_time()
+        next_flush = time.time() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(next_flush - time.time(), 0.0))
+            except queue.Empty:
+                self._flush_all()
+                self._file.flush()
+                next_flush = time.time() + self.flush_interval
+                self.writer_cpu = time.thread_time() - cpu_start
+                continue
+            if item is None:
+                break
+            col, buf, n = item
+            self._write_chunk(col.stream_id, buf[:n])
+            with self._lock:
+                col.free.append(buf)
+        self._file.flush()
+        self.writer_cpu = time.thread_time() - cpu_start
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._flush_all()
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+        if self.dropped:
+            logger.warning(f"Recording {self.path} dropped rows: {self.dropped}")
+        logger.info(f"Recording {self.path} closed ({self.bytes_written / 1e6:.1f} MB)")
+
+
+class SessionReader:
+    """Memory-maps a recording; columns are zero-copy views when a stream was written in one chunk."""
+    def __init__(self, path: str):
+        self.path = path
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r")
+        self._chunks: Dict[int, List[Tuple[int, int]]] = collections.defaultdict(list)
+
+        pos, size = 0, len(self._mm)
+        while pos + CHUNK_DTYPE.itemsize <= size:
+            header = np.frombuffer(self._mm, dtype=CHUNK_DTYPE, count=1, offset=pos)[0]
+            if header["magic"] != MAGIC:
+                raise ValueError(f"{path}: bad chunk header at byte {pos}")
+            start = pos + CHUNK_DTYPE.itemsize
+            end = start + int(header["nbytes"])
+            if end > size:
+                logger.warning(f"{path}: truncated final chunk ignored")
+                break
+            self._chunks[int(header["stream"])].append((start, int(header["count"])))
+            pos = end
+
+        meta = self.column("metadata")
+        self.metadata = json.loads(bytes(meta)) if len(meta) else {}
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        sid = STREAM_IDS[name]
+        dtype = STREAMS[sid][1]
+        views = [np.frombuffer(self._mm, dtype=dtype, count=count, offset=start) for start, count in self._chunks[sid]]
+        if not views:
+            return np.zeros(0, dtype=dtype)
+        return views[0] if len(views) == 1 else np.concatenate(views)
+
+    def _cached(self, name: str) -> np.ndarray:
+        if name not in self._cache:
+            self._cache[name] = self.column(name)
+        return self._cache[name]
+
+    @property
+    def frames(self) -> np.ndarray:
+        return self._cached("frames")
+
+    @property
+    def states(self) -> np.ndarray:
+        return self._cached("states")
+
+    def snapshots(self) -> Iterator[VisionSnapshot]:
+        for record in self.states:
+            yield record_to_snapshot(record)
+
+    def state_at(self, timestamp: float) -> Optional[VisionSnapshot]:
+        """Last recorded vision state at or before `timestamp`."""
+        states = self.states
+        i = int(np.searchsorted(states["timestamp"], timestamp, side="right")) - 1
+        return record_to_snapshot(states[i]) if i >= 0 else None
+
+    def audio_chunks(self) -> Iterator[Tuple[float, int, np.ndarray]]:
+        """(timestamp, sample_rate, float32 samples) per captured chunk."""
+        audio = self._cached("audio")
+        for row in self._cached("audio_index"):
+            start = int(row["offset"])
+            pcm = audio[start:start + int(row["count"])]
+            yield float(row["timestamp"]), int(row["sample_rate"]), pcm.astype(np.float32) / 32767.0
+
+    def events(self, kind: Optional[str] = None) -> List[Tuple[float, str, Dict[str, Any]]]:
+        data = self._cached("event_data")
+        out = []
+        for row in self._cached("events"):
+            k = row["kind"].decode()
+            if kind and k != kind:
+                continue
+            start = int(row["offset"])
+            out.append((float(row["timestamp"]), k, json.loads(bytes(data[start:start + int(row["length"])]))))
+        return out
+
+    def close(self):
+        self._cache.clear()
+        self._mm = None
+
+
+def replay_vision(reader: SessionReader, vision_manager) -> List[VisionSnapshot]:
+    """
+    Run recorded landmarks through VisionManager post-processing (gaze, head pose, hands, gestures).
+    The manager's own camera loop must not be running.
+    :return: The snapshot published for each recorded frame.
+    """
+    out = []
+    gaze_buf, hand_buf = vision_manager._gaze_pts, vision_manager._hand_pts
+    for row in reader.frames:
+        gaze = hand = None
+        if row["face_present"]:
+            gaze_buf[:] = row["gaze_pts"]
+            gaze = gaze_buf
+        if row["hand_present"]:
+            hand_buf[:] = row["hand_pts"]
+            hand = hand_buf
+        vision_manager._process_landmarks(gaze, hand, int(row["width"]), int(row["height"]),
+                                          float(row["timestamp"]), bool(row["gaze_ran"]))
+        out.append(vision_manager.get_snapshot())
+    return out
+
+
+def replay_voice(reader: SessionReader, asr, intent_parser, fusion_engine) -> List[Dict[str, Any]]:
+    """
+    Run recorded audio through ASR -> intent -> fusion, fusing with the vision state recorded
+    when each chunk finished.
+    """
+    results = []
+    for timestamp, sample_rate, samples in reader.audio_chunks():
+        text = asr.transcribe(samples).get("text", "").strip()
+        if len(text) < 2:
+            continue
+        voice_intent = intent_parser.parse(text)
+        snapshot = reader.state_at(timestamp + len(samples) / sample_rate)
+        fused = fusion_engine.fuse(voice_intent, snapshot.to_dict()) if snapshot else None
+        results.append({"timestamp": timestamp, "text": text, "intent": voice_intent, "fused": fused})
+    return results
@@ -0,0 +1,46 @@
+"""
+Per-utterance stage timings for the voice -> action path.
+
+A StageTimer is created when a command starts (capture) and handed down the
+pipeline; each component calls mark(stage) when it finishes its part, so a
+stage's duration is the time since the previous mark. Components accept
+timer=None and skip timing entirely in that case.
+
+    timer = StageTimer()
+    audio = capture.listen_chunk(timer)       # capture, vad
+    asr.transcribe(audio, timer)              # asr
+    ...
+    timer.durations_ms()  # {"capture": 3001.2, "vad": 0.1, "asr": 180.0, ...}
+"""
+
+import time
+from typing import Callable, Dict
+
+# Stages in pipeline order (reports list them in this order); queue_* is time waiting for a voice pipeline worker
+STAGES = ("capture", "vad", "queue_asr", "asr", "queue_interpret", "intent", "fusion",
+          "queue_dispatch", "validation", "dispatch", "broadcast", "queue_speak", "tts")
+
+
+class StageTimer:
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """
+        :param clock: Monotonic clock in seconds; benchmarks may substitute a controllable one.
+        """
+        self.clock = clock
+        self.start = clock()
+        self.last = self.start
+        # Stage -> seconds; a stage marked twice accumulates
+        self.durations: Dict[str, float] = {}
+        # Stage -> clock value when it finished
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, stage: str) -> float:
+        """End `stage` now; it lasted since the previous mark (or the timer's start)."""
+        now = self.clock()
+        self.durations[stage] = self.durations.get(stage, 0.0) + now - self.last
+        self.marks[stage] = now
+        self.last = now
+        return now
+
+    def durations_ms(self) -> Dict[str, float]:
+        return {stage: 1000.0 * seconds for stage, seconds in self.durations.items()}
@@ -0,0 +1,136 @@
+"""
+Per-utterance tracing for the voice -> action path.
+
+Every utterance gets a Trace: a StageTimer with an ID that also keeps each
+stage's monotonic start/end. Finished traces go into a bounded ring (the most
+recent N) and into per-stage histograms, both served by /debug/traces.
+The trace ID is included in the WebSocket payloads and logs of its utterance,
+so a slow command seen on the dashboard can be looked up.
+
+Disabled, Tracer.start() hands out plain StageTimers and finish() returns
+immediately, so the pipeline runs the same code at the cost of a few clock reads.
+"""
+
+import bisect
+import collections
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from audio_engine.stage_timer import STAGES, StageTimer
+
+logger = logging.getLogger("Tracing")
+
+
+class Trace(StageTimer):
+    def __init__(self, trace_id: str, kind: str = "voice", clock=time.perf_counter):
+        super().__init__(clock)
+        self.trace_id = trace_id
+        self.kind = kind
+        self.started_at = time.time()
+        # (stage, start, end) in clock seconds, in the order stages finished
+        self.spans: List[tuple] = []
+        self.attributes: Dict[str, Any] = {}
+
+    def mark(self, stage: str) -> float:
+        start = self.last
+        now = super().mark(stage)
+        self.spans.append((stage, start, now))
+        return now
+
+    def total_ms(self) -> float:
+        return 1000.0 * (self.last - self.start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms(),
+            "attributes": self.attributes,
+            # Offsets from the trace start, in milliseconds
+            "spans": [{"stage": stage, "start_ms": 1000.0 * (start - self.start), "end_ms": 1000.0 * (end - self.start)}
+                      for stage, start, end in self.spans],
+        }
+
+
+class StageHistogram:
+    """Cumulative duration histogram of one stage over fixed millisecond buckets."""
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        bounds = [str(b) for b in self.BUCKETS_MS] + ["+Inf"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            # Upper bound (ms) -> number of observations in that bucket
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+class Tracer:
+    def __init__(self, capacity: int = 256, enabled: bool = True):
+        """
+        :param capacity: Number of finished traces kept for inspection.
+        """
+        self.enabled = enabled
+        self._traces = collections.deque(maxlen=capacity)
+        self._histograms: Dict[str, StageHistogram] = collections.defaultdict(StageHistogram)
+        self._lock = threading.Lock()
+        self._prefix = f"{int(time.time()) & 0xffffff:06x}"
+        self._ids = itertools.count(1)
+
+    def start(self, kind: str = "voice") -> StageTimer:
+        if not self.enabled:
+            return StageTimer()
+        return Trace(f"{self._prefix}-{next(self._ids)}", kind)
+
+    def finish(self, timer: StageTimer, result: Optional[Dict[str, Any]] = None):
+        """Store a finished trace with the outcome's status/intent; plain StageTimers are ignored."""
+        if not isinstance(timer, Trace):
+            return
+        if result:
+            for key in ("status", "intent", "reason", "tier", "heard_text"):
+                if key in result:
+                    timer.attributes[key] = result[key]
+        with self._lock:
+            self._traces.append(timer)
+            for stage, ms in timer.durations_ms().items():
+                self._histograms[stage].add(ms)
+            self._histograms["total"].add(timer.total_ms())
+        if timer.total_ms() > 5000.0:
+            logger.warning(f"Slow trace {timer.trace_id}: {timer.total_ms():.0f} ms {timer.durations_ms()}")
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest first."""
+        with self._lock:
+            traces = list(self._traces)[-limit:] if limit > 0 else []
+        return [t.to_dict() for t in reversed(traces)]
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for trace in reversed(self._traces):
+                if trace.trace_id == trace_id:
+                    return trace.to_dict()
+        return None
+
+    def stage_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            order = [s for s in STAGES if s in self._histograms]
+            order += sorted(s for s in self._histograms if s not in STAGES)
+            return {stage: self._histograms[stage].to_dict() for stage in order}
@@ -1,58 +1,301 @@
-
+import concurrent.futures
+import heapq
+import itertools
 import logging
 import os
+import re
+import threading
+import time
 import sounddevice as sd
 import numpy as np
 
+from audio_engine import metrics
+from audio_engine.phrase_cache import PhraseCache
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Speech priorities (lower is spoken first)
+SAFETY = 0        # Rejections and safety warnings: preempt whatever is playing
+CONFIRMATION = 1  # "Executing zoom in.": a newer one supersedes any still queued
+CHAT = 2          # Conversational replies
+
+QUEUED = "queued"
+PLAYING = "playing"
+DONE = "done"
+SUPERSEDED = "superseded"
+PREEMPTED = "preempted"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+# Longer responses are synthesized a chunk at a time so playback can start after the first one
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+_CLAUSE_END = re.compile(r"(?<=,)\s+")
+MAX_CHUNK_CHARS = 120
+MIN_CHUNK_CHARS = 12
+
+
+def split_sentences(text):
+    """
+    Split text into chunks for streaming synthesis: sentences, and clauses of sentences
+    longer than MAX_CHUNK_CHARS. Fragments shorter than MIN_CHUNK_CHARS join the next chunk
+    (very short inputs synthesize with odd prosody). Single sentences stay whole, so fixed
+    phrases keep hitting the phrase cache.
+    """
+    pieces = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if len(sentence) > MAX_CHUNK_CHARS:
+            pieces.extend(_CLAUSE_END.split(sentence))
+        elif sentence:
+            pieces.append(sentence)
+    chunks = []
+    carry = ""
+    for piece in pieces:
+        piece = f"{carry} {piece}" if carry else piece
+        if len(piece) < MIN_CHUNK_CHARS:
+            carry = piece
+        else:
+            chunks.append(piece)
+            carry = ""
+    if carry:
+        if chunks:
+            chunks[-1] = f"{chunks[-1]} {carry}"
+        else:
+            chunks.append(carry)
+    return chunks
+
+
+class SpeechHandle:
+    """Returned by TTSEngine.speak(); wait() only if the caller needs the speech to have finished."""
+    def __init__(self, text, priority):
+        self.text = text
+        self.priority = priority
+        self.status = QUEUED
+        # Seconds from the worker picking this up to the first audio written, and spent synthesizing
+        self.first_audio = None
+        self.synthesis = 0.0
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """:return: True if finished (played or dropped) within timeout."""
+        return self._done.wait(timeout)
+
+    def _finish(self, status):
+        self.status = status
+        metrics.TTS_REQUESTS.labels(status).inc()
+        self._done.set()
+
+
 class TTSEngine:
-    def __init__(self, use_coqui=False):
+    MODEL_NAME = "tts_models/en/ljspeech/glow-tts"
+    # Samples written to the output per call; also how often an interrupt is checked (~46 ms)
+    BLOCK = 1024
+    # Overlap between consecutive chunks, and the fade applied when playback is cut
+    CROSSFADE = 0.01
+
+    def __init__(self, use_coqui=False, cache_dir=None, cache_size=128, echo_guard=None):
         """
         Initialize TTS Engine.
-        :param use_coqui: If True, tries to use Coqui TTS (heavy). 
+        Speech is synthesized and played on a worker thread; speak() only queues it.
+        Multi-sentence text is streamed: chunk N+1 is synthesized while chunk N plays.
+        :param use_coqui: If True, tries to use Coqui TTS (heavy).
                           If False, uses pyttsx3 (offline, fast) if available, or mock.
+        :param cache_dir: Optional directory for synthesized phrases (see PhraseCache); memory only if None.
+        :param cache_size: Phrases kept in memory.
+        :param echo_guard: Optional EchoGuard told what is played and when, so capture can ignore it.
         """
         self.engine = None
         self.use_coqui = use_coqui
-        
+        self.sample_rate = 22050  # Default sample rate for GlowTTS/LJSPEECH
+        self.echo_guard = echo_guard
+        # The model is not safe to call from two threads (worker and cache warm-up)
+        self._synth_lock = threading.Lock()
+        self.cache = PhraseCache(self._generate, model=self.MODEL_NAME, capacity=cache_size, directory=cache_dir)
+
         if self.use_coqui:
             try:
                 from TTS.api import TTS
                 # specific model or default
                 logger.info("Initializing Coqui TTS...")
-                self.engine = TTS(model_name="tts_models/en/ljspeech/glow-tts", progress_bar=False, gpu=False)
+                self.engine = TTS(model_name=self.MODEL_NAME, progress_bar=False, gpu=False)
                 logger.info("Coqui TTS initialized.")
             except ImportError:
                 logger.warning("TTS library not found. Falling back to simple print/logging.")
             except Exception as e:
                 logger.error(f"Error initializing Coqui TTS: {e}")
-        
-    def speak(self, text):
+
+        # (priority, order, handle) heap; order keeps equal priorities first-in first-out
+        self._queue = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._current = None
+        # Set to cut the current playback short (stop() or a preempting SAFETY message)
+        self._interrupt = threading.Event()
+        self._running = True
+        # Opened on first use and kept open, so chunks (and requests) play back to back
+        self._stream = None
+        # Synthesizes the next chunk while the worker plays the current one
+        self._synth_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="TTSSynth")
+        self._worker = threading.Thread(target=self._run, name="TTSWorker", daemon=True)
+        self._worker.start()
+
+    def speak(self, text, priority=CONFIRMATION):
         """
-        Speak the text.
+        Queue text to be spoken and return at once.
+        :param priority: SAFETY preempts current playback; CONFIRMATION replaces queued confirmations.
+        :return: SpeechHandle to wait on if needed.
         """
         logger.info(f"🗣️ TTS: {text}")
-        
+        handle = SpeechHandle(text, priority)
+        with self._cond:
+            if priority == CONFIRMATION:
+                # A newer confirmation makes the queued ones stale
+                kept = []
+                for entry in self._queue:
+                    if entry[2].priority == CONFIRMATION:
+                        entry[2]._finish(SUPERSEDED)
+                    else:
+                        kept.append(entry)
+                if len(kept) != len(self._queue):
+                    self._queue = kept
+                    heapq.heapify(self._queue)
+            current = self._current
+            if current is not None and priority < current.priority:
+                current.status = PREEMPTED
+                self._interrupt.set()
+            heapq.heappush(self._queue, (priority, next(self._order), handle))
+            self._cond.notify()
+        return handle
+
+    def warm(self, phrases):
+        """Synthesize phrases in the background so they play without synthesis delay (no-op without a model)."""
         if self.engine:
+            self.cache.warm(phrases)
+
+    def stop(self):
+        """Cut the current speech and drop everything queued (e.g. on a STOP command)."""
+        with self._cond:
+            for _, _, handle in self._queue:
+                handle._finish(CANCELLED)
+            self._queue = []
+            if self._current is not None:
+                self._current.status = CANCELLED
+                self._interrupt.set()
+
+    def close(self):
+        self.stop()
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._worker.join(1.0)
+        self._synth_pool.shutdown(wait=False, cancel_futures=True)
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                _, _, handle = heapq.heappop(self._queue)
+                handle.status = PLAYING
+                self._current = handle
+                self._interrupt.clear()
+            status = DONE
             try:
-                # Generate audio (returns list of floats)
-                wav = self.engine.tts(text=text)
-                
-                # Convert to numpy array
-                wav_np = np.array(wav, dtype=np.float32)
-                
-                # Play
-                # Default sample rate for GlowTTS/LJSPEECH is often 22050
-                sd.play(wav_np, samplerate=22050)
-                sd.wait()
+                if self.engine:
+                    self._speak_chunks(handle)
+                else:
+                    # Fallback for now: print to console is enough for logic verification
+                    print(f"[SYSTEM SPEAKS]: {handle.text}")
             except Exception as e:
                 logger.error(f"TTS Error: {e}")
-        else:
-            # Fallback for now: print to console is enough for logic verification
-            print(f"[SYSTEM SPEAKS]: {text}")
+                status = FAILED
+            with self._cond:
+                self._current = None
+                if handle.status != PLAYING:
+                    status = handle.status
+            handle._finish(status)
+
+    def _generate(self, text):
+        with self._synth_lock:
+            # Generate audio (returns list of floats)
+            return np.array(self.engine.tts(text=text), dtype=np.float32)
+
+    def _synthesize(self, handle, text):
+        started = time.perf_counter()
+        wav = self.cache.synthesize(text)
+        handle.synthesis += time.perf_counter() - started
+        return wav
+
+    def _speak_chunks(self, handle):
+        """Synthesize and play handle.text chunk by chunk until done, preempted or stopped."""
+        started = time.perf_counter()
+        chunks = split_sentences(handle.text)
+        overlap = int(self.CROSSFADE * self.sample_rate)
+        tail = None
+        pending = self._synth_pool.submit(self._synthesize, handle, chunks[0])
+        if self.echo_guard:
+            self.echo_guard.playback_started(handle.text)
+        try:
+            for i in range(len(chunks)):
+                wav = pending.result()
+                if i + 1 < len(chunks):
+                    pending = self._synth_pool.submit(self._synthesize, handle, chunks[i + 1])
+                # stop() or a preempting message may have arrived during synthesis
+                if handle.status != PLAYING:
+                    return
+                if tail is not None:
+                    n = min(overlap, len(tail), len(wav))
+                    ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+                    wav = np.concatenate([tail[:len(tail) - n], tail[len(tail) - n:] * (1.0 - ramp) + wav[:n] * ramp, wav[n:]])
+                # Hold back the end of all but the last chunk to blend with the next one
+                if i + 1 < len(chunks) and len(wav) > overlap:
+                    wav, tail = wav[:-overlap], wav[-overlap:]
+                else:
+                    tail = None
+                if not self._play(wav, handle, started):
+                    return
+            if tail is not None:
+                self._play(tail, handle, started)
+        finally:
+            pending.cancel()
+            if self.echo_guard:
+                self.echo_guard.playback_finished()
+            metrics.TTS_REQUEST_SYNTHESIS_SECONDS.observe(handle.synthesis)
+            if handle.first_audio is not None:
+                logger.debug(f"TTS {len(chunks)} chunk(s): first audio {handle.first_audio * 1000:.0f} ms, "
+                             f"synthesis {handle.synthesis * 1000:.0f} ms")
+
+    def _output(self):
+        if self._stream is None:
+            self._stream = sd.OutputStream(samplerate=self.sample_rate, channels=1, dtype="float32")
+            self._stream.start()
+        return self._stream
+
+    def _play(self, wav, handle, started):
+        """Write wav to the output stream block by block. :return: False if playback was interrupted."""
+        stream = self._output()
+        for offset in range(0, len(wav), self.BLOCK):
+            if self._interrupt.is_set():
+                # Fade out instead of cutting mid-sample (avoids a click)
+                fade = wav[offset:offset + int(self.CROSSFADE * self.sample_rate)]
+                stream.write(fade * np.linspace(1.0, 0.0, len(fade), dtype=np.float32))
+                logger.info("TTS playback interrupted")
+                return False
+            if handle.first_audio is None:
+                handle.first_audio = time.perf_counter() - started
+                metrics.TTS_FIRST_AUDIO_SECONDS.observe(handle.first_audio)
+            stream.write(wav[offset:offset + self.BLOCK])
+        return True
 
 if __name__ == "__main__":
     tts = TTSEngine(use_coqui=False)
-    tts.speak("Zooming in.")
+    tts.speak("Zooming in.").wait()
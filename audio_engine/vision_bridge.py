@@ -10,15 +10,83 @@ Usage:
     3. Audio engine calls execute_action() which triggers vision callbacks
 """
 
+import asyncio
+import concurrent.futures
+import functools
 import logging
+import threading
+import time
+
+from audio_engine import metrics
 
 logger = logging.getLogger(__name__)
 
+
+# Parameter normalizers: action parameters -> callback keyword arguments
+
+def _zoom(default_factor):
+    def normalize(parameters):
+        kwargs = {"factor": parameters.get("factor", default_factor)}
+        # Only passed when given, so callbacks without these arguments still work
+        if parameters.get("region") is not None:
+            kwargs["region"] = parameters["region"]
+        if parameters.get("point") is not None:
+            kwargs["point"] = parameters["point"]
+        return kwargs
+    return normalize
+
+
+def _scroll(direction):
+    def normalize(parameters):
+        return {"direction": direction, "amount": parameters.get("amount", 50)}
+    return normalize
+
+
+def _no_arguments(parameters):
+    return {}
+
+
+def _load_image(parameters):
+    return {"image_path": parameters.get("image_path")}
+
+
+def _highlight(parameters):
+    return {"direction": "center", "amount": 0}  # Mock for now
+
+
+# Intent -> (callback name, parameter normalizer)
+ACTIONS = {
+    "ZOOM_IN": ("zoom_in", _zoom(1.2)),
+    "ZOOM_OUT": ("zoom_out", _zoom(0.8)),
+    "SCROLL_LEFT": ("scroll", _scroll("left")),
+    "SCROLL_RIGHT": ("scroll", _scroll("right")),
+    "SCROLL_UP": ("scroll", _scroll("up")),
+    "SCROLL_DOWN": ("scroll", _scroll("down")),
+    "NEXT_IMAGE": ("next_image", _no_arguments),
+    "PREV_IMAGE": ("prev_image", _no_arguments),
+    "RESET_VIEW": ("reset_view", _no_arguments),
+    "LOAD_IMAGE": ("load_image", _load_image),
+    "HIGHLIGHT_REGION": ("scroll", _highlight),
+}
+
+
 class VisionBridge:
     """
     Bridge between voice commands and vision system.
+
+    The intent -> (callback, normalizer) table is rebuilt when callbacks are registered,
+    not per action. Action listeners run in order on a single background thread, so a slow
+    listener never delays the action. Callbacks run one at a time, in order, on a single callback
+    thread (see register_vision_callbacks()); the action reports the callback's real outcome. One
+    that takes longer than callback_timeout is logged and counted as slow, and while it keeps the
+    callback thread past that, further actions fail at once as busy instead of queueing behind it.
+    execute_action() may be called from any thread; coroutines use execute_action_async().
     """
-    def __init__(self):
+    def __init__(self, callback_timeout=2.0):
+        """
+        :param callback_timeout: Seconds after which a running vision callback counts as slow (None: never,
+                                 and callbacks run on the caller's thread).
+        """
         self.callbacks = {
             "load_image": None,
             "zoom_in": None,
@@ -28,12 +96,25 @@ class VisionBridge:
             "prev_image": None,
             "reset_view": None,
         }
+        self.callback_timeout = callback_timeout
+        # Callback names registered with blocking=False
+        self._non_blocking = set()
+        # perf_counter() when the callback on the callback thread started (None while it is idle)
+        self._callback_started = None
         self.state_manager = None
         self.action_listeners = [] # For WebSocket broadcasting
+        self._lock = threading.Lock()
+        # Intent -> (callback or None, normalizer); replaced as a whole, never mutated
+        self._dispatch = {}
+        self._compile()
+        self._listener_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="BridgeListeners")
+        # One worker: callbacks never run concurrently and keep the order of their actions
+        self._callback_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="BridgeCallback")
     
     def register_action_listener(self, listener):
-        """Register a function to be called on every action execution."""
-        self.action_listeners.append(listener)
+        """Register a function to be called (off the dispatch path) on every action execution."""
+        with self._lock:
+            self.action_listeners = self.action_listeners + [listener]
 
     def register_state_manager(self, state_manager):
         """
@@ -42,29 +123,50 @@ class VisionBridge:
         self.state_manager = state_manager
         logger.info("State manager registered with VisionBridge")
     
-    def register_vision_callbacks(self, callbacks_dict):
+    def register_vision_callbacks(self, callbacks_dict, blocking=True):
         """
         Register callbacks from the vision system.
         
         Expected callbacks:
         {
             "load_image": function(image_path) -> bool,
-            "zoom_in": function(factor=1.2) -> bool,
-            "zoom_out": function(factor=0.8) -> bool,
+            "zoom_in": function(factor=1.2, region=None, point=None) -> bool,  # region/point only passed when known
+            "zoom_out": function(factor=0.8, region=None, point=None) -> bool,
             "scroll": function(direction, amount) -> bool,  # direction: 'left', 'right', 'up', 'down'
             "next_image": function() -> bool,
             "prev_image": function() -> bool,
             "reset_view": function() -> bool,
         }
+        region is always a region name ('LEFT_REGION', 'CENTER', 'RIGHT_REGION'); point is the
+        calibrated gaze point {"x", "y"} in [0, 1] viewport coordinates, passed only when calibrated.
         
         Each callback should return True on success, False on failure.
+
+        Threading: callbacks run one at a time, in the order of their actions, on the bridge's
+        callback thread, whichever threads call execute_action(). A callback tied to another thread
+        (e.g. a GUI toolkit's main thread) must hand its work over to that thread itself.
+        Callbacks registered with blocking=False, and all callbacks while callback_timeout is None,
+        run on the calling thread instead, so they may run concurrently and must be thread-safe.
+
+        :param blocking: False for callbacks that return at once (e.g. only update in-memory view state);
+                         they run inline on the caller's thread, skipping the callback thread.
         """
-        for key, func in callbacks_dict.items():
-            if key in self.callbacks:
-                self.callbacks[key] = func
-                logger.info(f"Registered vision callback: {key}")
-            else:
-                logger.warning(f"Unknown callback key: {key}")
+        with self._lock:
+            for key, func in callbacks_dict.items():
+                if key in self.callbacks:
+                    self.callbacks[key] = func
+                    if blocking:
+                        self._non_blocking.discard(key)
+                    else:
+                        self._non_blocking.add(key)
+                    logger.info(f"Registered vision callback: {key}")
+                else:
+                    logger.warning(f"Unknown callback key: {key}")
+            self._compile()
+
+    def _compile(self):
+        self._dispatch = {intent: (self.callbacks.get(name), normalize, name in self._non_blocking)
+                          for intent, (name, normalize) in ACTIONS.items()}
     
     def execute_action(self, intent, parameters=None):
         """
@@ -74,49 +176,136 @@ class VisionBridge:
         :param parameters: Optional parameters dict
         :return: (success: bool, message: str)
         """
-        parameters = parameters or {}
-        
-        # Broadcast to listeners (WebSockets)
-        for listener in self.action_listeners:
+        started = time.perf_counter()
+        call, inline, result = self._prepare(intent, parameters or {})
+        if call is not None:
             try:
-                listener(intent, parameters)
+                if inline or self.callback_timeout is None:
+                    result = self._result(intent, call())
+                else:
+                    future = self._submit(call)
+                    if future is None:
+                        result = self._busy(intent)
+                    else:
+                        try:
+                            success = future.result(self.callback_timeout)
+                        except concurrent.futures.TimeoutError:
+                            # Still running and will still change the display: report what it returns
+                            self._slow(intent)
+                            success = future.result()
+                        result = self._result(intent, success)
             except Exception as e:
-                logger.error(f"Error in action listener: {e}")
+                result = self._error(intent, e)
+        metrics.BRIDGE_DISPATCH_SECONDS.labels(intent).observe(time.perf_counter() - started)
+        return result
 
-        # Map intents to callbacks
-        action_map = {
-            "ZOOM_IN": ("zoom_in", {"factor": parameters.get("factor", 1.2), "region": parameters.get("region")}),
-            "ZOOM_OUT": ("zoom_out", {"factor": parameters.get("factor", 0.8), "region": parameters.get("region")}),
-            "SCROLL_LEFT": ("scroll", {"direction": "left", "amount": parameters.get("amount", 50)}),
-            "SCROLL_RIGHT": ("scroll", {"direction": "right", "amount": parameters.get("amount", 50)}),
-            "SCROLL_UP": ("scroll", {"direction": "up", "amount": parameters.get("amount", 50)}),
-            "SCROLL_DOWN": ("scroll", {"direction": "down", "amount": parameters.get("amount", 50)}),
-            "NEXT_IMAGE": ("next_image", {}),
-            "PREV_IMAGE": ("prev_image", {}),
-            "RESET_VIEW": ("reset_view", {}),
-            "LOAD_IMAGE": ("load_image", {"image_path": parameters.get("image_path")}),
-            "HIGHLIGHT_REGION": ("scroll", {"direction": "center", "amount": 0}), # Mock for now
-        }
-        
-        if intent not in action_map:
-            return False, f"Unknown intent: {intent}"
-        
-        callback_name, callback_params = action_map[intent]
-        callback = self.callbacks.get(callback_name)
+    async def execute_action_async(self, intent, parameters=None):
+        """
+        execute_action() for coroutines: only non-blocking callbacks run on the event loop,
+        the others on the callback thread (also while callback_timeout is None).
+        """
+        started = time.perf_counter()
+        call, inline, result = self._prepare(intent, parameters or {})
+        if call is not None:
+            try:
+                if inline:
+                    result = self._result(intent, call())
+                else:
+                    future = self._submit(call)
+                    if future is None:
+                        result = self._busy(intent)
+                    else:
+                        waiting = asyncio.wrap_future(future)
+                        try:
+                            success = await asyncio.wait_for(asyncio.shield(waiting), self.callback_timeout)
+                        except asyncio.TimeoutError:
+                            self._slow(intent)
+                            success = await waiting
+                        result = self._result(intent, success)
+            except Exception as e:
+                result = self._error(intent, e)
+        metrics.BRIDGE_DISPATCH_SECONDS.labels(intent).observe(time.perf_counter() - started)
+        return result
+
+    def drain_listeners(self, timeout=None):
+        """Wait until listeners have seen every action executed so far. :return: False on timeout."""
+        try:
+            self._listener_pool.submit(lambda: None).result(timeout)
+        except concurrent.futures.TimeoutError:
+            return False
+        return True
+
+    def _submit(self, call):
+        """Queue call on the callback thread. :return: Its future, or None if that thread is stuck on a slow callback."""
+        started, timeout = self._callback_started, self.callback_timeout
+        if started is not None and timeout is not None and time.perf_counter() - started > timeout:
+            return None
+        return self._callback_pool.submit(self._run_callback, call)
+
+    def _run_callback(self, call):
+        self._callback_started = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self._callback_started = None
+
+    def _prepare(self, intent, parameters):
+        """
+        Queue the listeners and look up the callback.
+        :return: (call, inline, None) with the callback bound to its arguments and whether it is non-blocking,
+                 or (None, False, result) if there is nothing to call.
+        """
+        # Broadcast to listeners (WebSockets); a copy, since they run after the caller has moved on
+        listeners = self.action_listeners
+        if listeners:
+            self._listener_pool.submit(self._notify, listeners, intent, dict(parameters))
+
+        entry = self._dispatch.get(intent)
+        if entry is None:
+            metrics.ACTIONS.labels(intent, "unknown").inc()
+            return None, False, (False, f"Unknown intent: {intent}")
         
+        callback, normalize, inline = entry
         if callback is None:
             # We treat this as success because the WebSocket listener will handle it in the frontend
-            return True, f"Action {intent} broadcasted to listeners."
-        
+            metrics.ACTIONS.labels(intent, "broadcast").inc()
+            return None, False, (True, f"Action {intent} broadcasted to listeners.")
         try:
-            success = callback(**callback_params)
-            if success:
-                return True, f"Executed {intent}"
-            else:
-                return False, f"Failed to execute {intent}"
+            return functools.partial(callback, **normalize(parameters)), inline, None
         except Exception as e:
-            logger.error(f"Error executing {intent}: {e}")
-            return False, f"Error: {e}"
+            return None, False, self._error(intent, e)
+
+    @staticmethod
+    def _notify(listeners, intent, parameters):
+        for listener in listeners:
+            try:
+                listener(intent, parameters)
+            except Exception as e:
+                logger.error(f"Error in action listener: {e}")
+
+    @staticmethod
+    def _result(intent, success):
+        metrics.ACTIONS.labels(intent, "ok" if success else "failed").inc()
+        if success:
+            return True, f"Executed {intent}"
+        else:
+            return False, f"Failed to execute {intent}"
+
+    def _slow(self, intent):
+        logger.warning(f"Vision callback for {intent} still running after {self.callback_timeout} s")
+        metrics.ACTIONS.labels(intent, "slow").inc()
+
+    def _busy(self, intent):
+        logger.error(f"Vision callback for {intent} not run: an earlier callback has been running for over "
+                     f"{self.callback_timeout} s")
+        metrics.ACTIONS.labels(intent, "busy").inc()
+        return False, f"Vision system busy, {intent} not executed"
+
+    @staticmethod
+    def _error(intent, e):
+        logger.error(f"Error executing {intent}: {e}")
+        metrics.ACTIONS.labels(intent, "error").inc()
+        return False, f"Error: {e}"
 
 # Global singleton instance
 _bridge = VisionBridge()
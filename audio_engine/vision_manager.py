@@ -6,8 +6,26 @@ import time
 import logging
 from typing import Dict, Any, Optional
 
+from audio_engine import metrics
+from audio_engine.frame_sources import CameraSource, FrameSource, create_source
+from audio_engine.gaze_boost import GazeBoosts
+from audio_engine.gaze_calibration import GazeCalibration, gaze_inputs
+from audio_engine.gesture_events import GestureEventDetector, GestureEventQueue
+from audio_engine.gesture_recognizer import GestureRecognizer, load_templates
+from audio_engine.head_pose import HeadPoseTracker
+from audio_engine.vision_snapshot import VisionSnapshot
+
 logger = logging.getLogger("VisionManager")
 
+# Per-stage frame time instruments, bound once (the loop observes them every frame)
+_READ_SECONDS = metrics.VISION_FRAME_SECONDS.labels("read")
+_PREPARE_SECONDS = metrics.VISION_FRAME_SECONDS.labels("prepare")
+_FACE_SECONDS = metrics.VISION_FRAME_SECONDS.labels("face_mesh")
+_HANDS_SECONDS = metrics.VISION_FRAME_SECONDS.labels("hands")
+_POST_SECONDS = metrics.VISION_FRAME_SECONDS.labels("postprocess")
+# Weight of the newest frame interval in the smoothed FPS (exponential moving average)
+_FPS_SMOOTHING = 0.1
+
 try:
     from mediapipe.python.solutions import face_mesh as mp_face_mesh
     from mediapipe.python.solutions import hands as mp_hands
@@ -17,24 +35,110 @@ except ImportError:
     import mediapipe.solutions.hands as mp_hands
     import mediapipe.solutions.drawing_utils as mp_drawing
 
+class _TrackingState:
+    """
+    Frame-to-frame tracking state.
+    Updated in place by the vision loop so the hot path does not build new dicts every frame.
+    """
+    __slots__ = (
+        "eye", "head", "yaw", "pitch", "roll", "iris_l", "iris_r", "gaze_point",
+        "pose", "gesture", "pinch_delta", "cursor_x", "cursor_y", "cursor_nx", "cursor_ny",
+        "user_present", "hand_present", "fps", "timestamp",
+        "prev_pinch_dist",
+    )
+
+    def __init__(self):
+        self.eye = "CENTER"
+        self.head = "CENTER"
+        self.yaw = 0.0
+        self.pitch = 0.0
+        self.roll = 0.0
+        self.iris_l = 0.5
+        self.iris_r = 0.5
+        self.gaze_point = None
+        self.pose = "UNKNOWN"
+        self.gesture = "NONE"
+        self.pinch_delta = 0.0
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self.cursor_nx = 0.5
+        self.cursor_ny = 0.5
+        self.user_present = False
+        self.hand_present = False
+        self.fps = 0.0
+        self.timestamp = 0.0
+        self.prev_pinch_dist = 0.0
+
+    def snapshot(self, seq: int) -> VisionSnapshot:
+        return VisionSnapshot(
+            seq, self.timestamp, self.user_present, self.fps,
+            self.eye, self.head, self.yaw, self.pitch, self.roll,
+            self.pose, self.gesture, self.pinch_delta, (self.cursor_x, self.cursor_y),
+            (self.iris_l, self.iris_r), self.gaze_point, (self.cursor_nx, self.cursor_ny),
+            self.hand_present
+        )
+
 class VisionManager:
     """
     Combines Eye Gaze and Hand Gesture tracking into a single unified stream.
     Runs in a background thread to maintain high FPS regardless of ASR/LLM load.
     """
-    def __init__(self, camera_id=0):
+    def __init__(self, camera_id=0, frame_width=1280, frame_height=720, fourcc="MJPG", buffer_size=1,
+                 emit_events=True, gesture_templates=None, camera_calibration=None, gaze_background_hz=5.0,
+                 source=None, realtime=True, loop=False):
+        """
+        :param camera_id: OpenCV camera index.
+        :param frame_width: Requested capture width (None keeps the driver default).
+        :param frame_height: Requested capture height (None keeps the driver default).
+        :param fourcc: Requested capture codec, e.g. 'MJPG' (None keeps the driver default).
+        :param buffer_size: CAP_PROP_BUFFERSIZE; 1 keeps only the latest frame queued.
+        :param emit_events: Push edge-triggered gesture events into self.events.
+        :param gesture_templates: Path to recorded templates (.npz); None uses the built-in swipes.
+        :param camera_calibration: Path to camera intrinsics (.json/.npz); None derives them from the frame size.
+        :param gaze_background_hz: Rate of the face mesh / gaze path while no voice command is pending.
+            boost_gaze() raises it to the full frame rate. None always runs it at full rate.
+        :param source: FrameSource or spec string (see frame_sources); None opens camera_id with the
+            capture settings above.
+        :param realtime: For spec strings: pace file/synthetic sources to their media clock.
+        :param loop: For spec strings: restart file sources at the end.
+        """
         self.camera_id = camera_id
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.gaze_background_hz = gaze_background_hz
+        self.source = source
+        self.realtime = realtime
+        self.loop = loop
         self.running = False
         self.thread = None
+        # Set when the last loop stopped because the source failed (open, or a live source's read)
+        self.source_failed = False
+        
+        # Demand-driven gaze: full rate only until _gaze_boost_until (time.time()), the latest live boost
+        self._gaze_boosts = GazeBoosts()
+        self._gaze_boost_until = 0.0
+        self._last_gaze_time = 0.0
+        self.frames = 0
+        self.gaze_frames = 0
         
-        # State
-        self.current_state = {
-            "gaze": {"eye": "CENTER", "head": "CENTER", "yaw": 0.0},
-            "hand": {"pose": "UNKNOWN", "gesture": "NONE", "pinch_delta": 0.0, "cursor": [0, 0]},
-            "user_present": False,
-            "fps": 0.0,
-            "timestamp": 0.0
-        }
+        # State: the loop mutates _state, readers only ever see published snapshots
+        self._state = _TrackingState()
+        self._snapshot = self._state.snapshot(0)
+        self._snapshot_cond = threading.Condition()
+        self._last_frame_time = time.time()
+        # Smoothed seconds between published frames (None until the first frame)
+        self._frame_interval = None
+
+        # Gesture events (swipe/pinch/pose edges), fed from every published frame
+        self.events = GestureEventQueue()
+        self._event_detector = GestureEventDetector(self.events) if emit_events else None
+        self._recognizer = GestureRecognizer(load_templates(gesture_templates) if gesture_templates else None)
+        self._head_pose = HeadPoseTracker(camera_calibration)
+        self._gaze_calibration: Optional[GazeCalibration] = None
+        # Optional SessionRecorder; landmarks and published states are appended per frame
+        self.recorder = None
         
         # MediaPipe Setup
         self.face_mesh = mp_face_mesh.FaceMesh(
@@ -56,24 +160,27 @@ class VisionManager:
         self.LEFT_EYE_CORNERS = [33, 133]
         self.RIGHT_EYE_CORNERS = [362, 263]
         
+        # Order matches head_pose.MODEL_POINTS
         self.POSE_LANDMARKS = {"nose": 1, "chin": 152, "left_eye": 33, "right_eye": 263, "left_mouth": 61, "right_mouth": 291}
-        self.MODEL_POINTS = np.array([
-            (0.0, 0.0, 0.0), (0.0, -330.0, -65.0), (-225.0, 170.0, -135.0), 
-            (225.0, 170.0, -135.0), (-150.0, -150.0, -125.0), (150.0, -150.0, -125.0)
-        ])
-        self.FOCAL_LENGTH = 800
-        self.CENTER = (640, 360)
-        self.CAM_MATRIX = np.array([[self.FOCAL_LENGTH, 0, self.CENTER[0]], [0, self.FOCAL_LENGTH, self.CENTER[1]], [0, 0, 1]], dtype="double")
-        self.DIST_COEFFS = np.zeros((4, 1))
-
-        # Internal tracking
-        self._prev_pinch_dist = 0
-        self._prev_hand_x = 0
+
+        # Landmark rows copied out of MediaPipe each frame: iris, eye corners, then pose points
+        self._GAZE_INDICES = (self.LEFT_IRIS + self.RIGHT_IRIS + self.LEFT_EYE_CORNERS + self.RIGHT_EYE_CORNERS
+                              + [self.POSE_LANDMARKS[k] for k in ["nose", "chin", "left_eye", "right_eye", "left_mouth", "right_mouth"]])
+        self._TIPS = [4, 8, 12, 16, 20]
+        self._PIPS = [3, 6, 10, 14, 18]
+
+        # Reusable buffers (frame buffers are sized on the first frame)
+        self._raw_buf = None
+        self._flip_buf = None
+        self._rgb_buf = None
+        self._gaze_pts = np.zeros((len(self._GAZE_INDICES), 2))
+        self._hand_pts = np.zeros((21, 3))
+        self._gaze_in = np.zeros(4)
 
     def start(self):
         if self.running: return
         self.running = True
-        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread = threading.Thread(target=self._run_loop, name="VisionLoop", daemon=True)
         self.thread.start()
         logger.info("Vision Manager started background thread.")
 
@@ -84,138 +191,307 @@ class VisionManager:
         logger.info("Vision Manager stopped.")
 
     def get_state(self) -> Dict[str, Any]:
-        return self.current_state.copy()
+        """Latest state as a fresh dict (safe for callers to mutate or serialize)."""
+        return self._snapshot.to_dict()
+
+    def get_snapshot(self) -> VisionSnapshot:
+        """Latest immutable snapshot."""
+        return self._snapshot
+
+    def wait_for_snapshot(self, after_seq: int, timeout: Optional[float] = None) -> Optional[VisionSnapshot]:
+        """
+        Block until a snapshot newer than after_seq is published.
+        :return: The newest snapshot, or None on timeout.
+        """
+        with self._snapshot_cond:
+            if not self._snapshot_cond.wait_for(lambda: self._snapshot.seq > after_seq, timeout):
+                return None
+            return self._snapshot
+
+    def boost_gaze(self, duration=10.0):
+        """
+        Run the gaze path at full frame rate for up to `duration` seconds.
+        Called at voice onset; release_gaze(token) ends this boost once the command has been fused.
+        :return: Token for release_gaze(); other boosts stay live until released or expired.
+        """
+        token = self._gaze_boosts.boost(duration)
+        self._gaze_boost_until = self._gaze_boosts.deadline()
+        return token
+
+    def release_gaze(self, token):
+        self._gaze_boosts.release(token)
+        self._gaze_boost_until = self._gaze_boosts.deadline()
+
+    def set_gaze_calibration(self, calibration: Optional[GazeCalibration]):
+        """Apply a per-user gaze calibration from the next frame on (None reverts to labels only)."""
+        self._gaze_calibration = calibration
+
+    def _gaze_boost_deadline(self) -> float:
+        return self._gaze_boost_until
+
+    def _gaze_due(self, now) -> bool:
+        """:param now: Frame timestamp (the media clock for file sources); boosts are on the wall clock."""
+        if self.gaze_background_hz is None or time.time() < self._gaze_boost_deadline():
+            return True
+        return now - self._last_gaze_time >= 1.0 / self.gaze_background_hz
+
+    def _publish(self):
+        snapshot = self._state.snapshot(self._snapshot.seq + 1)
+        with self._snapshot_cond:
+            self._snapshot = snapshot
+            self._snapshot_cond.notify_all()
+        if self.recorder:
+            self.recorder.record_state(snapshot)
+        if self._event_detector:
+            self._event_detector.feed(snapshot)
+
+    def set_source(self, source, realtime=None, loop=None):
+        """
+        Switch the frame source (FrameSource or spec string); restarts the loop if it is running.
+        :param realtime: Replaces the spec-string pacing given to __init__ (None keeps it).
+        :param loop: Replaces the spec-string looping given to __init__ (None keeps it).
+        """
+        was_running = self.running
+        if was_running:
+            self.stop()
+        self.source = source
+        if realtime is not None:
+            self.realtime = realtime
+        if loop is not None:
+            self.loop = loop
+        if was_running:
+            self.start()
+
+    def _make_source(self) -> FrameSource:
+        if self.source is None:
+            return CameraSource(self.camera_id, self.frame_width, self.frame_height, self.fourcc, self.buffer_size)
+        if isinstance(self.source, str):
+            return create_source(self.source, realtime=self.realtime, loop=self.loop,
+                                 frame_width=self.frame_width, frame_height=self.frame_height,
+                                 fourcc=self.fourcc, buffer_size=self.buffer_size)
+        return self.source
 
     def _run_loop(self):
-        cap = cv2.VideoCapture(self.camera_id)
-        if not cap.isOpened():
-            logger.error("Could not open camera.")
+        source = self._make_source()
+        self.source_failed = False
+        if not source.open():
+            logger.error(f"Could not open frame source {source.describe()}.")
+            self.source_failed = True
             self.running = False
             return
 
-        last_time = time.time()
+        self._last_frame_time = time.time()
+        self._frame_interval = None
         
+        last_timestamp = None
         while self.running:
-            ret, frame = cap.read()
-            if not ret: break
+            # Sources decode into the previous frame's buffer when the size matches
+            t0 = time.perf_counter()
+            ret, frame, timestamp = source.read(self._raw_buf)
+            _READ_SECONDS.observe(time.perf_counter() - t0)
+            if not ret:
+                if source.live:
+                    logger.error(f"Frame source {source.describe()} stopped delivering frames.")
+                    self.source_failed = True
+                else:
+                    logger.info(f"Frame source {source.describe()} ended.")
+                break
+            self._raw_buf = frame
+            if source.nominal_fps and last_timestamp is not None:
+                # A live source keeps producing while we work; whole frame periods between reads were discarded
+                skipped = int((timestamp - last_timestamp) * source.nominal_fps + 0.5) - 1
+                if skipped > 0:
+                    metrics.VISION_DROPPED_FRAMES.inc(skipped)
+            last_timestamp = timestamp
             
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            self._process_frame(frame, timestamp)
             
-            # Process Face and Hands
+            if source.poll_delay:
+                time.sleep(source.poll_delay)
+
+        source.close()
+        self.running = False
+
+    def _prepare_frame(self, frame):
+        """Mirror and convert a BGR frame into the reusable RGB buffer."""
+        if self._rgb_buf is None or self._rgb_buf.shape != frame.shape:
+            self._flip_buf = np.empty_like(frame)
+            self._rgb_buf = np.empty_like(frame)
+
+        self._rgb_buf.flags.writeable = True
+        cv2.flip(frame, 1, dst=self._flip_buf)
+        cv2.cvtColor(self._flip_buf, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        # Read-only lets MediaPipe take the buffer by reference instead of copying it
+        self._rgb_buf.flags.writeable = False
+        return self._rgb_buf
+
+    def _process_frame(self, frame, timestamp=None):
+        """:param timestamp: Capture time from the frame source; defaults to now."""
+        t0 = time.perf_counter()
+        rgb = self._prepare_frame(frame)
+        h, w, _ = rgb.shape
+        if timestamp is None:
+            timestamp = time.time()
+        t1 = time.perf_counter()
+        _PREPARE_SECONDS.observe(t1 - t0)
+
+        # Process Face (only when gaze is due) and Hands
+        run_gaze = self._gaze_due(timestamp)
+        face_results = None
+        if run_gaze:
             face_results = self.face_mesh.process(rgb)
-            hand_results = self.hands.process(rgb)
-            
-            new_state = {
-                "gaze": self.current_state["gaze"],
-                "hand": self.current_state["hand"],
-                "user_present": False,
-                "fps": 0.0,
-                "timestamp": time.time()
-            }
-
-            # 1. Handle Gaze (Face Mesh)
-            if face_results.multi_face_landmarks:
-                new_state["user_present"] = True
-                face = face_results.multi_face_landmarks[0]
-                self._process_gaze(face, w, h, new_state["gaze"])
-
-            # 2. Handle Hands
-            if hand_results.multi_hand_landmarks:
-                hand = hand_results.multi_hand_landmarks[0]
-                self._process_hand(hand, w, h, new_state["hand"])
+            t2 = time.perf_counter()
+            _FACE_SECONDS.observe(t2 - t1)
+            t1 = t2
+        hand_results = self.hands.process(rgb)
+        t2 = time.perf_counter()
+        _HANDS_SECONDS.observe(t2 - t1)
+
+        gaze_pts = hand_pts = None
+        if run_gaze and face_results.multi_face_landmarks:
+            self._fill_points(face_results.multi_face_landmarks[0].landmark, self._GAZE_INDICES, self._gaze_pts)
+            gaze_pts = self._gaze_pts
+        if hand_results.multi_hand_landmarks:
+            self._fill_points(hand_results.multi_hand_landmarks[0].landmark, range(21), self._hand_pts)
+            hand_pts = self._hand_pts
+
+        self._process_landmarks(gaze_pts, hand_pts, w, h, timestamp, run_gaze)
+        _POST_SECONDS.observe(time.perf_counter() - t2)
+        metrics.VISION_FRAMES.inc()
+
+    def _process_landmarks(self, gaze_pts, hand_pts, w, h, timestamp, run_gaze=True):
+        """
+        Post-processing after MediaPipe, shared by the live loop and session replay.
+        :param gaze_pts: Normalized face landmarks in _GAZE_INDICES order, or None if no face.
+        :param hand_pts: (21, 3) normalized hand landmarks, or None if no hand.
+        :param run_gaze: Whether the face mesh ran on this frame (demand-driven gaze).
+        """
+        state = self._state
+        state.timestamp = timestamp
+        self.frames += 1
+
+        recorder = self.recorder
+        if recorder:
+            # Before _process_gaze scales the points in place
+            recorder.record_frame(timestamp, self._snapshot.seq + 1, w, h, run_gaze, gaze_pts, hand_pts)
+
+        # 1. Handle Gaze (Face Mesh); between background samples the last gaze state is kept
+        if run_gaze:
+            self._last_gaze_time = timestamp
+            self.gaze_frames += 1
+            state.user_present = gaze_pts is not None
+            if state.user_present:
+                self._process_gaze(gaze_pts, w, h, state)
             else:
-                new_state["hand"]["pose"] = "NONE"
-                new_state["hand"]["gesture"] = "NONE"
+                state.gaze_point = None
+                self._head_pose.reset()
 
-            # Compute FPS
-            now = time.time()
-            new_state["fps"] = 1.0 / (now - last_time + 1e-6)
-            last_time = now
-            
-            self.current_state = new_state
-            
-            # Small sleep to be CPU friendly, though Mediapipe is the bottleneck
-            time.sleep(0.01)
+        # 2. Handle Hands
+        state.hand_present = hand_pts is not None
+        if state.hand_present:
+            self._process_hand(hand_pts, w, h, state)
+        else:
+            state.pose = "NONE"
+            state.gesture = "NONE"
+            # A stale delta would otherwise keep reading as an active pinch after the hand leaves
+            state.pinch_delta = 0.0
+            state.prev_pinch_dist = 0.0
+            self._recognizer.reset()
 
-        cap.release()
+        # Compute FPS, smoothed over recent frames so one slow frame does not read as a collapse
+        now = time.time()
+        interval = now - self._last_frame_time
+        if self._frame_interval is None:
+            self._frame_interval = interval
+        else:
+            self._frame_interval += _FPS_SMOOTHING * (interval - self._frame_interval)
+        state.fps = 1.0 / (self._frame_interval + 1e-6)
+        self._last_frame_time = now
+
+        self._publish()
+
+    @staticmethod
+    def _fill_points(landmarks, indices, out):
+        """Copy normalized landmark coordinates into a preallocated (N, 2) or (N, 3) array."""
+        with_z = out.shape[1] == 3
+        for row, i in enumerate(indices):
+            lm = landmarks[i]
+            out[row, 0] = lm.x
+            out[row, 1] = lm.y
+            if with_z:
+                out[row, 2] = lm.z
+
+    def _process_gaze(self, pts, w, h, state):
+        """
+        :param pts: Normalized landmarks in _GAZE_INDICES order; scaled to pixels in place.
+        """
+        pts[:, 0] *= w
+        pts[:, 1] *= h
 
-    def _process_gaze(self, face, w, h, gaze_state):
         # Iris Logic
-        li = np.mean([[face.landmark[i].x * w, face.landmark[i].y * h] for i in self.LEFT_IRIS], axis=0)
-        ri = np.mean([[face.landmark[i].x * w, face.landmark[i].y * h] for i in self.RIGHT_IRIS], axis=0)
+        li_x = pts[0:4, 0].mean()
+        ri_x = pts[4:8, 0].mean()
         
         # Ratios (simplified)
-        ll = face.landmark[self.LEFT_EYE_CORNERS[0]].x * w
-        lr = face.landmark[self.LEFT_EYE_CORNERS[1]].x * w
-        rl = face.landmark[self.RIGHT_EYE_CORNERS[0]].x * w
-        rr = face.landmark[self.RIGHT_EYE_CORNERS[1]].x * w
+        ll, lr = pts[8, 0], pts[9, 0]
+        rl, rr = pts[10, 0], pts[11, 0]
         
-        l_ratio = (li[0] - ll) / (lr - ll + 1e-6)
-        r_ratio = (ri[0] - rl) / (rr - rl + 1e-6)
+        l_ratio = (li_x - ll) / (lr - ll + 1e-6)
+        r_ratio = (ri_x - rl) / (rr - rl + 1e-6)
         ratio = (l_ratio + r_ratio) / 2
         
-        if ratio < 0.4: gaze_state["eye"] = "LEFT"
-        elif ratio > 0.6: gaze_state["eye"] = "RIGHT"
-        else: gaze_state["eye"] = "CENTER"
-
-        # Head Logic
-        image_pts = np.array([(face.landmark[self.POSE_LANDMARKS[k]].x * w, face.landmark[self.POSE_LANDMARKS[k]].y * h) for k in ["nose", "chin", "left_eye", "right_eye", "left_mouth", "right_mouth"]], dtype="double")
-        _, rv, _ = cv2.solvePnP(self.MODEL_POINTS, image_pts, self.CAM_MATRIX, self.DIST_COEFFS, flags=cv2.SOLVEPNP_ITERATIVE)
-        rmat, _ = cv2.Rodrigues(rv)
-        angles, _, _, _, _, _ = cv2.RQDecomp3x3(rmat)
-        yaw = angles[1]
-        gaze_state["yaw"] = yaw
-        
-        if yaw > 6: gaze_state["head"] = "LEFT"
-        elif yaw < -6: gaze_state["head"] = "RIGHT"
-        else: gaze_state["head"] = "CENTER"
+        if ratio < 0.4: state.eye = "LEFT"
+        elif ratio > 0.6: state.eye = "RIGHT"
+        else: state.eye = "CENTER"
 
-    def _process_hand(self, hand, w, h, hand_state):
-        landmarks = hand.landmark
-        
+        # Head Logic (warm-started, smoothed solvePnP; LEFT/RIGHT with hysteresis)
+        state.yaw, state.pitch, state.roll = self._head_pose.update(pts[12:18], w, h, state.timestamp)
+        state.head = self._head_pose.label
+
+        # Continuous gaze point (per-user calibration)
+        state.iris_l, state.iris_r = float(l_ratio), float(r_ratio)
+        calibration = self._gaze_calibration
+        if calibration:
+            gaze_inputs(l_ratio, r_ratio, state.yaw, state.pitch, out=self._gaze_in)
+            state.gaze_point = calibration.apply(self._gaze_in)
+        else:
+            state.gaze_point = None
+
+    def _process_hand(self, pts, w, h, state):
+        """
+        :param pts: (21, 3) normalized hand landmarks.
+        """
         # Pose Detection (Simplified from hand1_test.py)
         # Thumb, Index, Middle, Ring, Pinky
-        tips = [4, 8, 12, 16, 20]
-        pips = [3, 6, 10, 14, 18]
-        p0 = landmarks[0]
-        
-        fingers = []
-        for i in range(5):
-            d_tip = np.hypot(landmarks[tips[i]].x - p0.x, landmarks[tips[i]].y - p0.y)
-            d_pip = np.hypot(landmarks[pips[i]].x - p0.x, landmarks[pips[i]].y - p0.y)
-            fingers.append(d_tip > d_pip)
+        dist = np.hypot(pts[:, 0] - pts[0, 0], pts[:, 1] - pts[0, 1])
+        fingers = dist[self._TIPS] > dist[self._PIPS]
             
-        all_open = all(fingers)
-        all_closed = not any(fingers)
-        l_shape = fingers[0] and fingers[1] and not any(fingers[2:])
+        all_open = fingers.all()
+        all_closed = not fingers.any()
+        l_shape = fingers[0] and fingers[1] and not fingers[2:].any()
         
         pose = "UNKNOWN"
         if all_open: pose = "OPEN_PALM"
         elif all_closed: pose = "FIST"
         elif l_shape: pose = "L_SHAPE"
-        hand_state["pose"] = pose
+        state.pose = pose
 
         # Gestures
-        idx_tip = landmarks[8]
-        hand_state["cursor"] = [int(idx_tip.x * w), int(idx_tip.y * h)]
-        
-        # Swipe Velocity
-        vx = (idx_tip.x * w) - self._prev_hand_x
-        self._prev_hand_x = idx_tip.x * w
+        state.cursor_nx = float(pts[8, 0])
+        state.cursor_ny = float(pts[8, 1])
+        state.cursor_x = int(state.cursor_nx * w)
+        state.cursor_y = int(state.cursor_ny * h)
         
-        if abs(vx) > 30:
-            hand_state["gesture"] = "SWIPE_RIGHT" if vx > 0 else "SWIPE_LEFT"
-        else:
-            hand_state["gesture"] = "NONE"
+        # Temporal template match over the recent landmark window (reported on the frame it completes)
+        self._recognizer.push(pts, state.timestamp, aspect=w / h)
+        match = self._recognizer.match()
+        state.gesture = match[0] if match else "NONE"
 
         # Pinch
-        p4 = landmarks[4]
-        pinch_dist = np.hypot(p4.x - idx_tip.x, p4.y - idx_tip.y) * w
-        if self._prev_pinch_dist > 0:
-            hand_state["pinch_delta"] = pinch_dist - self._prev_pinch_dist
-        self._prev_pinch_dist = pinch_dist
+        pinch_dist = float(np.hypot(pts[4, 0] - pts[8, 0], pts[4, 1] - pts[8, 1]) * w)
+        if state.prev_pinch_dist > 0:
+            state.pinch_delta = pinch_dist - state.prev_pinch_dist
+        state.prev_pinch_dist = pinch_dist
 
 if __name__ == "__main__":
     # Test
@@ -223,8 +499,12 @@ if __name__ == "__main__":
     vm = VisionManager()
     vm.start()
     try:
+        seq = 0
         for _ in range(50):
-            print(vm.get_state())
+            snapshot = vm.wait_for_snapshot(seq, timeout=1.0)
+            if snapshot:
+                seq = snapshot.seq
+                print(snapshot.to_dict())
             time.sleep(0.5)
     finally:
         vm.stop()
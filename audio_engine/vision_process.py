@@ -0,0 +1,385 @@
+"""
+Out-of-process vision mode.
+
+The capture + MediaPipe loop runs in a worker process so its Python
+post-processing does not compete with Whisper/LLM/TTS/FastAPI for the GIL.
+The worker publishes fixed-layout state records (and optionally hand
+landmarks) into a multiprocessing.shared_memory ring guarded by a per-slot
+seqlock. The main process reads the ring directly, without IPC round-trips.
+
+Usage:
+    vm = ProcessVisionManager(with_landmarks=True)
+    vm.start()
+    state = vm.get_state()   # same shape as VisionManager.get_state()
+"""
+
+import logging
+import multiprocessing as mp
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from audio_engine.gaze_boost import GazeBoosts
+from audio_engine.gaze_calibration import GazeCalibration, gaze_inputs
+from audio_engine.gesture_events import GestureEventDetector, GestureEventQueue
+from audio_engine.vision_snapshot import EMPTY_SNAPSHOT, VisionSnapshot
+
+logger = logging.getLogger("VisionProcess")
+
+# One published frame. Strings are fixed-width so the layout never changes.
+STATE_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("timestamp", "<f8"),
+    ("fps", "<f4"),
+    ("yaw", "<f4"),
+    ("pitch", "<f4"),
+    ("roll", "<f4"),
+    ("pinch_delta", "<f4"),
+    ("cursor", "<i4", (2,)),
+    ("cursor_norm", "<f4", (2,)),
+    ("user_present", "u1"),
+    ("hand_present", "u1"),
+    ("has_landmarks", "u1"),
+    ("eye", "S16"),
+    ("head", "S16"),
+    ("pose", "S16"),
+    ("gesture", "S16"),
+    ("iris", "<f4", (2,)),
+    ("gaze_point", "<f4", (2,)),  # NaN when not calibrated
+    ("hand_landmarks", "<f4", (21, 3)),
+])
+
+# Seqlock counter first: odd while the writer is inside the slot
+SLOT_DTYPE = np.dtype([("lock", "<u8"), ("record", STATE_DTYPE)])
+# gaze_boost_until is written by the parent and read by the worker (demand-driven gaze)
+HEADER_DTYPE = np.dtype([("latest", "<u8"), ("capacity", "<u8"), ("gaze_boost_until", "<f8")])
+
+# Worker exit code when its frame source failed (camera missing or unplugged); 0 means the source ended
+EXIT_SOURCE_FAILED = 3
+
+
+def record_to_snapshot(record) -> VisionSnapshot:
+    gx, gy = float(record["gaze_point"][0]), float(record["gaze_point"][1])
+    return VisionSnapshot(
+        int(record["seq"]), float(record["timestamp"]), bool(record["user_present"]), float(record["fps"]),
+        record["eye"].decode(), record["head"].decode(),
+        float(record["yaw"]), float(record["pitch"]), float(record["roll"]),
+        record["pose"].decode(), record["gesture"].decode(), float(record["pinch_delta"]),
+        (int(record["cursor"][0]), int(record["cursor"][1])),
+        (float(record["iris"][0]), float(record["iris"][1])),
+        None if gx != gx else (gx, gy),
+        (float(record["cursor_norm"][0]), float(record["cursor_norm"][1])),
+        bool(record["hand_present"])
+    )
+
+
+def fill_record(rec, snapshot: VisionSnapshot, hand_landmarks=None):
+    """Write a snapshot into a STATE_DTYPE record in place."""
+    rec["seq"] = snapshot.seq
+    rec["timestamp"] = snapshot.timestamp
+    rec["fps"] = snapshot.fps
+    rec["yaw"] = snapshot.yaw
+    rec["pitch"] = snapshot.pitch
+    rec["roll"] = snapshot.roll
+    rec["pinch_delta"] = snapshot.pinch_delta
+    rec["cursor"] = snapshot.cursor
+    rec["cursor_norm"] = snapshot.cursor_norm
+    rec["user_present"] = snapshot.user_present
+    rec["hand_present"] = snapshot.hand_present
+    rec["has_landmarks"] = hand_landmarks is not None
+    rec["eye"] = snapshot.eye.encode()
+    rec["head"] = snapshot.head.encode()
+    rec["pose"] = snapshot.pose.encode()
+    rec["gesture"] = snapshot.gesture.encode()
+    rec["iris"] = snapshot.iris
+    rec["gaze_point"] = snapshot.gaze_point if snapshot.gaze_point else (np.nan, np.nan)
+    if hand_landmarks is not None:
+        rec["hand_landmarks"] = hand_landmarks
+
+
+class SharedStateRing:
+    """
+    Single-writer, multi-reader ring of STATE_DTYPE records in shared memory.
+    Readers never block the writer; a torn read is detected by the slot seqlock and retried.
+    """
+    def __init__(self, name: Optional[str] = None, capacity: int = 64, create: bool = False):
+        size = HEADER_DTYPE.itemsize + capacity * SLOT_DTYPE.itemsize
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=size, name=name)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._owner = create
+
+        self.header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if create:
+            self.header[0] = (0, capacity, 0.0)
+        self.capacity = int(self.header[0]["capacity"])
+        self.slots = np.ndarray((self.capacity,), dtype=SLOT_DTYPE, buffer=self.shm.buf, offset=HEADER_DTYPE.itemsize)
+        if create:
+            self.slots["lock"] = 0
+
+        # Preallocated scratch record for the writer
+        self._scratch = np.zeros((), dtype=STATE_DTYPE)
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self.header[0]["latest"])
+
+    @property
+    def gaze_boost_until(self) -> float:
+        return float(self.header[0]["gaze_boost_until"])
+
+    @gaze_boost_until.setter
+    def gaze_boost_until(self, value: float):
+        self.header[0]["gaze_boost_until"] = value
+
+    def write(self, snapshot: VisionSnapshot, hand_landmarks=None):
+        rec = self._scratch
+        fill_record(rec, snapshot, hand_landmarks)
+
+        slot = self.slots[snapshot.seq % self.capacity]
+        slot["lock"] += 1
+        slot["record"] = rec
+        slot["lock"] += 1
+        self.header[0]["latest"] = snapshot.seq
+
+    def read(self, seq: int, retries: int = 8):
+        """
+        Copy the record with the given seq.
+        :return: Record copy, or None if it was overwritten (reader lapped) or never written.
+        """
+        slot = self.slots[seq % self.capacity]
+        for _ in range(retries):
+            before = int(slot["lock"])
+            if before & 1:
+                continue
+            record = slot["record"].copy()
+            if int(slot["lock"]) == before:
+                return record if int(record["seq"]) == seq else None
+        return None
+
+    def read_latest(self):
+        seq = self.latest_seq
+        return self.read(seq) if seq else None
+
+    def close(self):
+        # Views must be released before the mapping can be closed
+        self.header = self.slots = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _worker_main(ring_name: str, start_seq: int, with_landmarks: bool, stop_event, vision_kwargs: Dict[str, Any]):
+    """Entry point of the vision worker process."""
+    from audio_engine.vision_manager import VisionManager
+
+    logging.basicConfig(level=logging.INFO)
+    # Spawned children share the parent's resource tracker, so attaching here does not
+    # hand ownership of the segment to this process
+    ring = SharedStateRing(name=ring_name)
+
+    # Gesture events are detected on the parent side from the ring records
+    vm = VisionManager(emit_events=False, **vision_kwargs)
+    vm._snapshot = vm._state.snapshot(start_seq)
+    publish = vm._publish
+
+    def publish_to_ring():
+        publish()
+        landmarks = vm._hand_pts if (with_landmarks and vm._state.hand_present) else None
+        ring.write(vm.get_snapshot(), landmarks)
+
+    vm._publish = publish_to_ring
+    vm._gaze_boost_deadline = lambda: ring.gaze_boost_until
+
+    def watch_stop():
+        stop_event.wait()
+        vm.running = False
+
+    threading.Thread(target=watch_stop, daemon=True).start()
+    vm.running = True
+    try:
+        vm._run_loop()
+    finally:
+        ring.close()
+    if vm.source_failed:
+        sys.exit(EXIT_SOURCE_FAILED)
+
+
+class ProcessVisionManager:
+    """
+    Drop-in replacement for VisionManager that runs capture and MediaPipe in a worker process.
+    The worker is restarted automatically if it dies.
+    """
+    def __init__(self, capacity=64, with_landmarks=False, restart_delay=1.0, poll_interval=0.002, **vision_kwargs):
+        """
+        :param capacity: Number of records kept in the shared ring.
+        :param with_landmarks: Also publish the (21, 3) hand landmark array per frame.
+        :param restart_delay: Seconds to wait before restarting a dead worker.
+        :param poll_interval: How often the local pump checks the ring for new records.
+            The pump replays every record in order, so gesture events are not lost between polls.
+        :param vision_kwargs: Passed to VisionManager in the worker (camera_id, frame_width, ...).
+        """
+        self.capacity = capacity
+        self.with_landmarks = with_landmarks
+        self.restart_delay = restart_delay
+        self.poll_interval = poll_interval
+        self.vision_kwargs = vision_kwargs
+
+        self.running = False
+        self.restarts = 0
+        self._ctx = mp.get_context("spawn")
+        self._ring: Optional[SharedStateRing] = None
+        self._process = None
+        self._stop_event = None
+        self._pump_thread = None
+
+        self._snapshot = EMPTY_SNAPSHOT
+        self._snapshot_cond = threading.Condition()
+        # Applied on this side to the raw iris/head signals in each record
+        self._gaze_calibration: Optional[GazeCalibration] = None
+        # Live boosts; their latest deadline is written to the ring for the worker
+        self._gaze_boosts = GazeBoosts()
+        # Optional SessionRecorder; only states are available on this side of the ring
+        self.recorder = None
+
+        self.events = GestureEventQueue()
+        self._event_detector = GestureEventDetector(self.events)
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self._ring = SharedStateRing(capacity=self.capacity, create=True)
+        self._spawn_worker()
+        self._pump_thread = threading.Thread(target=self._pump_loop, name="VisionPump", daemon=True)
+        self._pump_thread.start()
+        logger.info(f"Vision worker process started (pid {self._process.pid}).")
+
+    def stop(self):
+        self.running = False
+        # Setting an mp.Event whose waiter has already exited blocks, so only signal a live worker
+        if self._stop_event and self._process and self._process.is_alive():
+            self._stop_event.set()
+        if self._process:
+            self._process.join(timeout=5.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        if self._pump_thread:
+            self._pump_thread.join()
+        if self._ring:
+            self._ring.close()
+            self._ring = None
+        logger.info("Vision worker process stopped.")
+
+    def get_state(self) -> Dict[str, Any]:
+        return self.get_snapshot().to_dict()
+
+    def get_snapshot(self) -> VisionSnapshot:
+        """Latest snapshot, read straight from shared memory."""
+        ring = self._ring
+        record = ring.read_latest() if ring else None
+        if record is None:
+            return self._snapshot
+        return self._to_snapshot(record)
+
+    def get_hand_landmarks(self) -> Optional[np.ndarray]:
+        """Latest (21, 3) normalized hand landmarks, or None if disabled or no hand in view."""
+        ring = self._ring
+        record = ring.read_latest() if (ring and self.with_landmarks) else None
+        if record is None or not record["has_landmarks"]:
+            return None
+        return record["hand_landmarks"]
+
+    def set_gaze_calibration(self, calibration: Optional[GazeCalibration]):
+        self._gaze_calibration = calibration
+
+    def set_source(self, source, realtime=None, loop=None):
+        """Switch the worker's frame source (FrameSource or spec string) by restarting it. See VisionManager.set_source."""
+        was_running = self.running
+        if was_running:
+            self.stop()
+        self.vision_kwargs["source"] = source
+        if realtime is not None:
+            self.vision_kwargs["realtime"] = realtime
+        if loop is not None:
+            self.vision_kwargs["loop"] = loop
+        if was_running:
+            self.start()
+
+    def _to_snapshot(self, record) -> VisionSnapshot:
+        snapshot = record_to_snapshot(record)
+        calibration = self._gaze_calibration
+        if calibration and snapshot.user_present:
+            point = calibration.apply(gaze_inputs(snapshot.iris[0], snapshot.iris[1], snapshot.yaw, snapshot.pitch))
+            snapshot = snapshot._replace(gaze_point=point)
+        return snapshot
+
+    def boost_gaze(self, duration=10.0):
+        token = self._gaze_boosts.boost(duration)
+        self._write_gaze_boost()
+        return token
+
+    def release_gaze(self, token):
+        self._gaze_boosts.release(token)
+        self._write_gaze_boost()
+
+    def _write_gaze_boost(self):
+        ring = self._ring
+        if ring:
+            ring.gaze_boost_until = self._gaze_boosts.deadline()
+
+    def wait_for_snapshot(self, after_seq: int, timeout: Optional[float] = None) -> Optional[VisionSnapshot]:
+        with self._snapshot_cond:
+            if not self._snapshot_cond.wait_for(lambda: self._snapshot.seq > after_seq, timeout):
+                return None
+            return self._snapshot
+
+    def _spawn_worker(self):
+        # Fresh event per worker: a process that died while waiting leaves an mp.Event unusable
+        self._stop_event = self._ctx.Event()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(self._ring.name, self._ring.latest_seq, self.with_landmarks, self._stop_event, self.vision_kwargs),
+            name="VisionWorker",
+            daemon=True
+        )
+        self._process.start()
+
+    def _pump_loop(self):
+        """Mirror new ring records into local waiters and restart the worker if it dies."""
+        last_seq = 0
+        while self.running:
+            latest = self._ring.latest_seq
+            if latest > last_seq:
+                # Oldest record still in the ring if we fell behind by more than a lap
+                for seq in range(max(last_seq + 1, latest - self.capacity + 1), latest + 1):
+                    record = self._ring.read(seq)
+                    if record is not None:
+                        self._publish(self._to_snapshot(record))
+                last_seq = latest
+            elif not self._process.is_alive() and self.running:
+                if self._process.exitcode == 0:
+                    # File/synthetic source ran out: nothing to restart (a failed camera exits non-zero)
+                    logger.info("Vision worker finished (frame source ended).")
+                    self.running = False
+                    return
+                logger.error(f"Vision worker exited (code {self._process.exitcode}); restarting in {self.restart_delay}s.")
+                time.sleep(self.restart_delay)
+                if self.running:
+                    self.restarts += 1
+                    self._spawn_worker()
+                continue
+            time.sleep(self.poll_interval)
+
+    def _publish(self, snapshot: VisionSnapshot):
+        with self._snapshot_cond:
+            self._snapshot = snapshot
+            self._snapshot_cond.notify_all()
+        if self.recorder:
+            self.recorder.record_state(snapshot)
+        self._event_detector.feed(snapshot)
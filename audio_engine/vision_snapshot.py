@@ -0,0 +1,43 @@
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+
+class VisionSnapshot(NamedTuple):
+    """
+    Immutable vision state for one processed frame.
+    Published by reference swap, so readers never observe a half-updated frame.
+    """
+    seq: int
+    timestamp: float  # Capture time of the frame (time.time())
+    user_present: bool
+    fps: float
+    eye: str
+    head: str
+    yaw: float
+    pitch: float
+    roll: float
+    pose: str
+    gesture: str
+    pinch_delta: float
+    cursor: Tuple[int, int]
+    iris: Tuple[float, float] = (0.5, 0.5)          # Left/right iris ratio within the eye
+    gaze_point: Optional[Tuple[float, float]] = None  # Calibrated viewport (x, y) in [0, 1]
+    cursor_norm: Tuple[float, float] = (0.5, 0.5)     # Index fingertip in normalized frame coordinates
+    hand_present: bool = False                        # cursor/cursor_norm are stale while False
+
+    def to_dict(self) -> Dict[str, Any]:
+        point = {"x": self.gaze_point[0], "y": self.gaze_point[1]} if self.gaze_point else None
+        return {
+            "gaze": {"eye": self.eye, "head": self.head, "yaw": self.yaw, "pitch": self.pitch, "roll": self.roll,
+                     "iris": list(self.iris), "point": point},
+            "hand": {"pose": self.pose, "gesture": self.gesture, "pinch_delta": self.pinch_delta,
+                     "cursor": list(self.cursor), "cursor_norm": list(self.cursor_norm),
+                     "present": self.hand_present},
+            "user_present": self.user_present,
+            "fps": self.fps,
+            "timestamp": self.timestamp,
+            "seq": self.seq
+        }
+
+
+# State reported before the first frame has been processed
+EMPTY_SNAPSHOT = VisionSnapshot(0, 0.0, False, 0.0, "CENTER", "CENTER", 0.0, 0.0, 0.0, "UNKNOWN", "NONE", 0.0, (0, 0))
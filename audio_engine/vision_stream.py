@@ -0,0 +1,163 @@
+"""
+Vision state pushed to WebSocket clients (replaces polling GET /vision/state).
+
+A client subscribes over /ws at its own rate, optionally overriding thresholds:
+
+    {"type": "VISION_SUBSCRIBE", "hz": 10, "thresholds": {"hand.cursor": 20}}
+
+It then receives one full snapshot, followed by deltas that carry only the
+fields whose value moved past the field's threshold since the value last sent
+to that client:
+
+    {"type": "VISION_STATE", "seq": 812, "timestamp": ..., "state": {...}}
+    {"type": "VISION_DELTA", "seq": 815, "base": 812, "timestamp": ...,
+     "changes": {"gaze.eye": "LEFT", "hand.cursor": [412, 230]}}
+
+Field names are dotted paths into VisionSnapshot.to_dict(); `base` is the seq
+the delta applies on top of. hz=0 unsubscribes, and a new VISION_SUBSCRIBE
+starts over with a full snapshot (e.g. when a client sees a base it does not have).
+
+A client's next message is only built once its previous one has been sent, and
+against the values it was actually sent, so a slow client gets fewer, larger
+deltas instead of a queue of stale ones, and never misses a change.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from audio_engine import metrics
+from audio_engine.ws_hub import COALESCE_LATEST
+
+logger = logging.getLogger("VisionStream")
+
+# Minimum change per field before it is sent again; fields not listed are sent on any change
+FIELD_THRESHOLDS: Dict[str, float] = {
+    "gaze.yaw": 1.0,              # degrees
+    "gaze.pitch": 1.0,
+    "gaze.roll": 1.0,
+    "gaze.iris": 0.02,            # ratio within the eye
+    "gaze.point": 0.01,           # normalized viewport
+    "hand.cursor": 4,             # pixels
+    "hand.cursor_norm": 0.005,
+    "hand.pinch_delta": 2.0,      # pixels
+    "fps": 1.0,
+}
+
+# Carried in the message envelope rather than as fields
+_ENVELOPE = ("seq", "timestamp")
+
+
+def flatten(state: Dict[str, Any]) -> Dict[str, Any]:
+    """{"gaze": {"eye": ...}} -> {"gaze.eye": ...}, one level deep like VisionSnapshot.to_dict()."""
+    flat = {}
+    for key, value in state.items():
+        if key in _ENVELOPE:
+            continue
+        if isinstance(value, dict) and key in ("gaze", "hand"):
+            for sub, v in value.items():
+                flat[f"{key}.{sub}"] = v
+        else:
+            flat[key] = value
+    return flat
+
+
+def changed(old: Any, new: Any, threshold: Optional[float]) -> bool:
+    if threshold is None or old is None or new is None or isinstance(new, (str, bool)):
+        return old != new
+    if isinstance(new, dict):
+        return old.keys() != new.keys() or any(abs(new[k] - old[k]) >= threshold for k in new)
+    if isinstance(new, (list, tuple)):
+        return len(old) != len(new) or any(abs(b - a) >= threshold for a, b in zip(old, new))
+    return abs(new - old) >= threshold
+
+
+class VisionSubscription:
+    def __init__(self, client, hz: float, thresholds: Dict[str, float]):
+        self.client = client
+        self.interval = 1.0 / hz
+        self.thresholds = thresholds
+        # Field values as last sent to this client (None until the full snapshot)
+        self.sent: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        self.next_due = 0.0
+
+    def message(self, seq: int, timestamp: float, state: Dict[str, Any], flat: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Full snapshot or delta for this client; None if nothing moved past its threshold."""
+        if self.sent is None:
+            self.sent = dict(flat)
+            self.seq = seq
+            return {"type": "VISION_STATE", "seq": seq, "timestamp": timestamp, "state": state}
+        changes = {k: v for k, v in flat.items() if changed(self.sent.get(k), v, self.thresholds.get(k))}
+        if not changes:
+            return None
+        message = {"type": "VISION_DELTA", "seq": seq, "base": self.seq, "timestamp": timestamp, "changes": changes}
+        self.sent.update(changes)
+        self.seq = seq
+        return message
+
+
+class VisionPublisher:
+    # Hub coalescing key: at most one vision message waits in a client's queue
+    KEY = "VISION"
+
+    def __init__(self, get_snapshot, max_hz: float = 30.0, thresholds: Optional[Dict[str, float]] = None):
+        """
+        :param get_snapshot: Returns the latest VisionSnapshot (e.g. VisionManager.get_snapshot).
+        :param max_hz: Highest rate a client may subscribe at; also the publisher's tick rate.
+        :param thresholds: Field -> minimum change, merged over FIELD_THRESHOLDS.
+        """
+        self.get_snapshot = get_snapshot
+        self.max_hz = max_hz
+        self.thresholds = dict(FIELD_THRESHOLDS, **(thresholds or {}))
+        self._subscriptions: Dict[int, VisionSubscription] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, client, hz: float = 10.0, thresholds: Optional[Dict[str, float]] = None):
+        """(Re)subscribe a hub client; must be called on the event loop. hz <= 0 unsubscribes."""
+        if hz <= 0:
+            self.unsubscribe(client)
+            return
+        merged = dict(self.thresholds, **(thresholds or {}))
+        self._subscriptions[id(client)] = VisionSubscription(client, min(hz, self.max_hz), merged)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def unsubscribe(self, client):
+        self._subscriptions.pop(id(client), None)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._subscriptions:
+            try:
+                self.tick(loop.time())
+            except Exception as e:
+                logger.error(f"Vision push failed: {e}")
+            await asyncio.sleep(1.0 / self.max_hz)
+
+    def tick(self, now: float):
+        """Queue a message for every subscriber that is due and has nothing still waiting to be sent."""
+        snapshot = None
+        state = flat = None
+        for key, sub in list(self._subscriptions.items()):
+            client = sub.client
+            if client.closed:
+                del self._subscriptions[key]
+                continue
+            if now < sub.next_due or client.pending(self.KEY):
+                continue
+            sub.next_due = now + sub.interval
+            if snapshot is None:
+                snapshot = self.get_snapshot()
+            if snapshot.seq == sub.seq and sub.sent is not None:
+                continue
+            if state is None:
+                state = snapshot.to_dict()
+                flat = flatten(state)
+            message = sub.message(snapshot.seq, snapshot.timestamp, state, flat)
+            if message is not None:
+                metrics.VISION_PUSH.labels("full" if message["type"] == "VISION_STATE" else "delta").inc()
+                client.send(message, COALESCE_LATEST, self.KEY)
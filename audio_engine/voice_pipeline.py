@@ -0,0 +1,137 @@
+"""
+Staged pipeline: a source thread feeding a chain of worker threads through bounded queues.
+
+The voice loop uses it so the microphone records the next utterance while the
+previous one is still being transcribed, fused, dispatched and spoken:
+
+    capture/VAD -> [asr] -> [interpret] -> [dispatch] -> [speak]
+
+Every stage has one worker and FIFO queues, so items leave in the order they
+were captured (commands are never reordered). Queues are bounded: when a stage
+falls behind, the ones before it block instead of piling up stale audio.
+A stage returning None drops the item; an exception is logged and drops it too.
+
+Items with a `timer` (StageTimer/Trace) get a `queue_<stage>` mark when a
+worker picks them up, so the stage's own marks measure its work only and the
+time spent waiting between stages is reported separately.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from audio_engine import metrics
+
+logger = logging.getLogger("VoicePipeline")
+
+_STOP = object()
+
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable[[Any], Any], queue_size: int):
+        self.name = name
+        self.fn = fn
+        self.queue_stage = f"queue_{name}"
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.next: Optional["_Stage"] = None
+        self.thread: Optional[threading.Thread] = None
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0
+        self._items = metrics.VOICE_STAGE_ITEMS.labels(name)
+        self._busy = metrics.VOICE_STAGE_BUSY.labels(name)
+        metrics.VOICE_QUEUE_DEPTH.labels(name).set_function(self.queue.qsize)
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                if self.next:
+                    self.next.queue.put(_STOP)
+                return
+            timer = getattr(item, "timer", None)
+            if timer is not None:
+                timer.mark(self.queue_stage)
+            started = time.perf_counter()
+            try:
+                item = self.fn(item)
+            except Exception as e:
+                logger.error(f"Stage {self.name} failed: {e}")
+                self.errors += 1
+                item = None
+            elapsed = time.perf_counter() - started
+            self.busy += elapsed
+            self.processed += 1
+            self._busy.inc(elapsed)
+            self._items.inc()
+            if item is not None and self.next:
+                self.next.queue.put(item)
+
+
+class StagedPipeline:
+    def __init__(self, source: Callable[[], Any], stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+                 queue_size: int = 2, name: str = "Voice"):
+        """
+        :param source: Called in a loop on its own thread; returns the next item, or None for nothing.
+        :param stages: (name, fn) in order; fn takes an item and returns it (or None to drop it).
+        :param queue_size: Items that may wait in front of each stage.
+        :param name: Thread name prefix.
+        """
+        self.source = source
+        self.name = name
+        self.stages = [_Stage(stage_name, fn, queue_size) for stage_name, fn in stages]
+        for stage, following in zip(self.stages, self.stages[1:]):
+            stage.next = following
+        self.running = False
+        self.produced = 0
+        self.started_at = 0.0
+        self._source_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.running = True
+        self.started_at = time.perf_counter()
+        for stage in self.stages:
+            stage.thread = threading.Thread(target=stage.run, name=f"{self.name}-{stage.name}", daemon=True)
+            stage.thread.start()
+        self._source_thread = threading.Thread(target=self._produce, name=f"{self.name}-source", daemon=True)
+        self._source_thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the source's current item; queued items are still processed."""
+        self.running = False
+        threads = [self._source_thread] + [s.thread for s in self.stages]
+        for thread in threads:
+            if thread:
+                thread.join(timeout)
+
+    def _produce(self):
+        first = self.stages[0]
+        while self.running:
+            try:
+                item = self.source()
+            except Exception as e:
+                logger.error(f"Pipeline source failed: {e}")
+                time.sleep(1)
+                continue
+            if item is not None:
+                self.produced += 1
+                first.queue.put(item)
+        first.queue.put(_STOP)
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = max(time.perf_counter() - self.started_at, 1e-9) if self.started_at else 0.0
+        stages: List[Dict[str, Any]] = []
+        for stage in self.stages:
+            stages.append({
+                "stage": stage.name,
+                "queued": stage.queue.qsize(),
+                "capacity": stage.queue.maxsize,
+                "processed": stage.processed,
+                "errors": stage.errors,
+                "busy_seconds": stage.busy,
+                "per_second": stage.processed / uptime if uptime else 0.0,
+                "utilization": stage.busy / uptime if uptime else 0.0,
+            })
+        return {"running": self.running, "uptime": uptime, "produced": self.produced, "stages": stages}
@@ -0,0 +1,194 @@
+"""
+WebSocket broadcast hub with a bounded queue and a sender task per client.
+
+broadcast() serializes a payload once and appends it to every client's queue
+without awaiting anything, so a slow dashboard only delays itself. Each
+message type has a delivery policy:
+
+    RELIABLE         Queued in order and never dropped (actions, messages). A
+                     client whose queue is full of them is evicted as too slow.
+    COALESCE_LATEST  Only the newest message of the type waits in the queue;
+                     a newer one replaces it in place (periodic state).
+
+A client whose send does not complete within send_timeout is evicted too; one
+watchdog task checks the in-flight sends, so a send costs no timer of its own.
+All methods must be called on the event loop (other threads use
+loop.call_soon_threadsafe(hub.broadcast, payload)).
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from audio_engine import metrics
+
+logger = logging.getLogger("WebSocketHub")
+
+RELIABLE = "reliable"
+COALESCE_LATEST = "coalesce_latest"
+
+
+class HubClient:
+    def __init__(self, hub: "BroadcastHub", websocket):
+        self.hub = hub
+        self.websocket = websocket
+        # (message, None) for RELIABLE, (None, key) for a coalesced slot whose message is in self.latest
+        self.queue: collections.deque = collections.deque()
+        self.latest: Dict[str, str] = {}
+        self.reliable = 0
+        self.sent = 0
+        # perf_counter() when the in-flight send started, None between sends
+        self.send_started: Optional[float] = None
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self.queue)
+
+    def pending(self, key: str) -> bool:
+        """True while a COALESCE_LATEST message with this key is waiting to be sent."""
+        return key in self.latest
+
+    def enqueue(self, message: str, policy: str = RELIABLE, key: Optional[str] = None) -> bool:
+        """:return: False if the client is too slow and must be evicted."""
+        if self.closed:
+            return True
+        if policy == COALESCE_LATEST:
+            if key in self.latest:
+                metrics.WS_COALESCED.inc()
+            else:
+                self.queue.append((None, key))
+            self.latest[key] = message
+        else:
+            if self.reliable >= self.hub.queue_size:
+                return False
+            self.queue.append((message, None))
+            self.reliable += 1
+        self._wakeup.set()
+        return True
+
+    def send(self, payload: Dict[str, Any], policy: str = RELIABLE, key: Optional[str] = None):
+        """Queue a message for this client only (e.g. a reply to its request)."""
+        if not self.enqueue(json.dumps(payload), policy, key):
+            self.hub.evict(self, "queue full")
+
+    async def run(self):
+        hub = self.hub
+        while not self.closed:
+            if not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            message, key = self.queue.popleft()
+            if key is not None:
+                message = self.latest.pop(key)
+            else:
+                self.reliable -= 1
+            started = self.send_started = time.perf_counter()
+            try:
+                await self.websocket.send_text(message)
+            except asyncio.CancelledError:
+                if self.closed:
+                    # Evicted by the watchdog mid-send
+                    return
+                raise
+            except Exception as e:
+                hub.evict(self, f"send failed: {e!r}")
+                return
+            self.send_started = None
+            metrics.WS_SEND_SECONDS.observe(time.perf_counter() - started)
+            self.sent += 1
+
+
+class BroadcastHub:
+    # Message type -> policy; unlisted types are RELIABLE. COALESCE_LATEST types coalesce per type.
+    DEFAULT_POLICIES: Dict[str, str] = {"ACTION": RELIABLE, "MESSAGE": RELIABLE, "HIGHLIGHTS": RELIABLE}
+
+    def __init__(self, queue_size: int = 256, send_timeout: float = 5.0, policies: Optional[Dict[str, str]] = None):
+        """
+        :param queue_size: Undelivered RELIABLE messages a client may have before it is evicted.
+        :param send_timeout: Seconds one send may take before the client is evicted.
+        :param policies: Message type -> RELIABLE / COALESCE_LATEST, merged over DEFAULT_POLICIES.
+        """
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.policies = dict(self.DEFAULT_POLICIES, **(policies or {}))
+        self._clients: Dict[int, HubClient] = {}
+        self._watchdog: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._clients)
+
+    @property
+    def clients(self):
+        return list(self._clients.values())
+
+    def queue_depth(self) -> int:
+        return sum(len(c) for c in list(self._clients.values()))
+
+    def add(self, websocket) -> HubClient:
+        """Start delivering broadcasts to an accepted websocket."""
+        loop = asyncio.get_running_loop()
+        client = HubClient(self, websocket)
+        client.task = loop.create_task(client.run())
+        self._clients[id(websocket)] = client
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = loop.create_task(self._watch())
+        return client
+
+    def remove(self, websocket):
+        client = self._clients.pop(id(websocket), None)
+        if client is not None:
+            client.closed = True
+            client._wakeup.set()
+
+    def evict(self, client: HubClient, reason: str):
+        if client.closed:
+            return
+        logger.warning(f"Evicting slow WebSocket client ({reason}, {len(client)} queued)")
+        metrics.WS_EVICTIONS.inc()
+        self.remove(client.websocket)
+        if client.send_started is not None and client.task is not None:
+            client.task.cancel()
+        # Closing may itself block on a stuck client; do it in the background
+        asyncio.get_running_loop().create_task(self._close(client.websocket))
+
+    async def _watch(self):
+        """Evict clients whose in-flight send has exceeded send_timeout; exits when the last client leaves."""
+        while self._clients:
+            await asyncio.sleep(self.send_timeout / 4)
+            now = time.perf_counter()
+            for client in list(self._clients.values()):
+                started = client.send_started
+                if started is not None and now - started > self.send_timeout:
+                    self.evict(client, f"send took over {self.send_timeout:g} s")
+
+    @staticmethod
+    async def _close(websocket):
+        try:
+            # 1013: try again later
+            await asyncio.wait_for(websocket.close(code=1013), 1.0)
+        except Exception:
+            pass
+
+    def broadcast(self, payload: Dict[str, Any], policy: Optional[str] = None) -> int:
+        """
+        Serialize once and queue for every client.
+        :param policy: Overrides the type's configured policy.
+        :return: Number of clients the message was queued for.
+        """
+        kind = payload.get("type", "")
+        policy = policy or self.policies.get(kind, RELIABLE)
+        message = json.dumps(payload)
+        slow = []
+        clients = list(self._clients.values())
+        for client in clients:
+            if not client.enqueue(message, policy, kind):
+                slow.append(client)
+        for client in slow:
+            self.evict(client, "queue full")
+        return len(clients) - len(slow)
@@ -31,7 +31,7 @@ def _allowed(filename: str) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @app.get("/vision")
-async def vision_endpoint():
+def vision_endpoint():
     """Proxy to Zero-Touch Assistant Vision State"""
     try:
         res = requests.get(f"{AUDIO_API_URL}/vision/state", timeout=0.5)
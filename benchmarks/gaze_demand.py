@@ -0,0 +1,77 @@
+"""
+Demand-driven gaze vs. always-on gaze.
+
+Runs the VisionManager frame path on a background thread at camera pace and,
+on the main thread, times a fixed CPU-bound Python workload standing in for
+the voice path (ASR/LLM glue). Reports face-mesh calls per second and the
+workload latency with gaze always on, at the background rate, and boosted.
+
+Usage:
+    python -m benchmarks.gaze_demand --seconds 5 --fps 30
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from audio_engine.vision_manager import VisionManager
+
+
+def _voice_proxy(n=200_000):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def _measure(vm, seconds, fps, boosted):
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    stop = threading.Event()
+
+    def vision_loop():
+        interval = 1.0 / fps
+        while not stop.is_set():
+            start = time.perf_counter()
+            if boosted:
+                vm.boost_gaze(1.0)
+            vm._process_frame(frame)
+            time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+    vm.frames = vm.gaze_frames = 0
+    thread = threading.Thread(target=vision_loop, daemon=True)
+    thread.start()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        _voice_proxy()
+        latencies.append(1000.0 * (time.perf_counter() - start))
+    stop.set()
+    thread.join()
+
+    latencies.sort()
+    return {
+        "gaze_per_s": vm.gaze_frames / seconds,
+        "frames_per_s": vm.frames / seconds,
+        "voice_ms_p50": latencies[len(latencies) // 2],
+        "voice_ms_p95": latencies[int(len(latencies) * 0.95)],
+    }
+
+
+def run(seconds=5.0, fps=30.0, background_hz=5.0):
+    return {
+        "always_on": _measure(VisionManager(gaze_background_hz=None), seconds, fps, False),
+        "background": _measure(VisionManager(gaze_background_hz=background_hz), seconds, fps, False),
+        "boosted": _measure(VisionManager(gaze_background_hz=background_hz), seconds, fps, True),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--background-hz", type=float, default=5.0)
+    args = parser.parse_args()
+    print(run(args.seconds, args.fps, args.background_hz))
@@ -0,0 +1,121 @@
+"""
+Pinch-zoom dispatch load: ActionCoalescer vs one execute_action per frame.
+
+Generates held pinches (--pinch seconds of motion at --fps, separated by
+--gap seconds of rest) as the gesture loop would see them and runs them through
+a VisionBridge with the assistant's listeners stood in by a JSON broadcast.
+Time is simulated, so the run takes milliseconds. Reports actions dispatched
+and broadcast per second of pinching, dispatch CPU time, and the final zoom
+level, which must be the same either way.
+
+Usage:
+    python -m benchmarks.gesture_dispatch --seconds 60 --rate 4
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from audio_engine.action_coalescer import ActionCoalescer
+from audio_engine.gesture_events import PINCH_BEGIN, PINCH_END, PINCH_UPDATE
+from audio_engine.vision_bridge import VisionBridge
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def pinch_events(args) -> List[Tuple[float, str, float]]:
+    """(time, event type, pinch delta) for alternating zoom-in and zoom-out pinches."""
+    rng = np.random.default_rng(args.seed)
+    events = []
+    t = 0.0
+    direction = 1
+    while t < args.seconds:
+        frames = int(args.pinch * args.fps)
+        for i in range(frames):
+            delta = direction * abs(rng.normal(25.0, 8.0))
+            events.append((t, PINCH_BEGIN if i == 0 else PINCH_UPDATE, delta))
+            t += 1.0 / args.fps
+        events.append((t, PINCH_END, 0.0))
+        t += args.gap
+        direction = -direction
+    return events
+
+
+def run(args, coalesce: bool) -> Dict[str, Any]:
+    bridge = VisionBridge()
+    clock = SimClock()
+    broadcast: List[str] = []
+    state = {"scale": 1.0}
+
+    def zoom(factor=1.0, region=None):
+        state["scale"] *= factor
+        return True
+
+    bridge.register_vision_callbacks({"zoom_in": zoom, "zoom_out": zoom}, blocking=False)
+    bridge.register_action_listener(
+        lambda intent, parameters: broadcast.append(json.dumps({"type": "ACTION", "intent": intent, "parameters": parameters})))
+    coalescer = ActionCoalescer(bridge.execute_action, window=args.window, max_rate=args.rate, clock=clock)
+
+    events = pinch_events(args)
+    dispatched = 0
+    cpu = 0.0
+    for t, kind, delta in events:
+        # The gesture loop wakes up for due actions between events
+        due = coalescer.due()
+        if coalesce and due is not None and due <= t:
+            clock.now = due
+            started = time.perf_counter()
+            coalescer.poll()
+            cpu += time.perf_counter() - started
+        clock.now = t
+        started = time.perf_counter()
+        if kind == PINCH_END:
+            if coalesce:
+                coalescer.flush()
+        else:
+            factor = 1.0 + abs(delta) / 100.0
+            intent = "ZOOM_IN" if delta > 0 else "ZOOM_OUT"
+            if intent == "ZOOM_OUT":
+                factor = 1.0 / factor
+            if coalesce:
+                coalescer.submit(intent, {"factor": factor})
+            else:
+                bridge.execute_action(intent, {"factor": factor})
+                dispatched += 1
+        cpu += time.perf_counter() - started
+    if coalesce:
+        coalescer.flush()
+        dispatched = coalescer.dispatched
+    pinching = sum(1 for _, kind, _ in events if kind != PINCH_END) / args.fps
+    return {
+        "mode": "coalesced" if coalesce else "per-frame",
+        "updates": sum(1 for _, kind, _ in events if kind != PINCH_END),
+        "dispatched": dispatched,
+        "dispatched_per_s": dispatched / pinching,
+        "broadcast_bytes": sum(len(m) for m in broadcast),
+        "cpu_ms": cpu * 1000,
+        "final_scale": state["scale"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--pinch", type=float, default=1.5, help="Seconds of motion per pinch")
+    parser.add_argument("--gap", type=float, default=1.0, help="Seconds between pinches")
+    parser.add_argument("--window", type=float, default=0.1)
+    parser.add_argument("--rate", type=float, default=4.0, help="Coalesced dispatches per second")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    results = [run(args, coalesce=False), run(args, coalesce=True)]
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,55 @@
+"""
+Per-frame cost of GestureRecognizer.push() + match().
+
+The recognizer runs on the vision thread for every frame with a hand in view,
+so it has to fit comfortably inside a 33 ms (30 FPS) frame budget on one core.
+
+Usage:
+    python -m benchmarks.gesture_recognizer --frames 3000 --templates 8
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from audio_engine.gesture_recognizer import GestureRecognizer, GestureTemplate, SHAPE_DIM, default_templates
+
+
+def run(frames=3000, n_templates=8, fps=30.0):
+    rng = np.random.default_rng(0)
+    templates = default_templates()
+    length = templates[0].motion.shape[0]
+    # Pad with random shape-weighted templates to emulate a richer gesture set
+    while len(templates) < n_templates:
+        templates.append(GestureTemplate(f"CUSTOM_{len(templates)}", rng.normal(0, 1, (length, 2)),
+                                         rng.normal(0, 1, (length, SHAPE_DIM)), 0.6, 0.1, 1.0))
+    recognizer = GestureRecognizer(templates=templates)
+
+    base = rng.uniform(0.4, 0.6, (21, 3))
+    timings = np.empty(frames)
+    for i in range(frames):
+        pts = base + rng.normal(0, 0.003, base.shape)
+        pts[:, 0] += 0.2 * np.sin(i / 15.0)
+        start = time.perf_counter()
+        recognizer.push(pts, i / fps, aspect=16 / 9)
+        recognizer.match()
+        timings[i] = time.perf_counter() - start
+
+    timings *= 1000.0
+    return {
+        "templates": len(templates),
+        "frames": frames,
+        "ms_p50": round(float(np.percentile(timings, 50)), 4),
+        "ms_p99": round(float(np.percentile(timings, 99)), 4),
+        "frame_budget_pct_p99": round(float(np.percentile(timings, 99)) / (1000.0 / fps) * 100.0, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--templates", type=int, default=8)
+    parser.add_argument("--fps", type=float, default=30.0)
+    args = parser.parse_args()
+    print(run(args.frames, args.templates, args.fps))
@@ -0,0 +1,80 @@
+"""
+Head-pose tracker vs. the previous per-frame cold solvePnP.
+
+Projects the face model with a known pose (held still, then turned) plus
+landmark noise, and reports per-frame cost, yaw jitter at rest and how many
+times the LEFT/CENTER/RIGHT head label flipped.
+
+Usage:
+    python -m benchmarks.head_pose --frames 900 --noise 1.0 --width 640 --height 480
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from audio_engine.head_pose import MODEL_POINTS, HeadPoseTracker
+
+
+def synthetic_landmarks(frames, width, height, noise, fps=30.0, seed=0):
+    """Yaw holds at 6 deg (right at the old threshold) for the first half, then sweeps to 25 deg."""
+    rng = np.random.default_rng(seed)
+    camera = np.array([[width, 0, width / 2], [0, width, height / 2], [0, 0, 1]], dtype="double")
+    flip = cv2.Rodrigues(np.array([np.pi, 0.0, 0.0]))[0]
+    out = []
+    for i in range(frames):
+        yaw = 6.0 if i < frames // 2 else 6.0 + 19.0 * (i - frames // 2) / max(frames // 2, 1)
+        rmat = flip @ cv2.Rodrigues(np.array([0.0, np.radians(yaw), 0.0]))[0]
+        pts, _ = cv2.projectPoints(MODEL_POINTS, cv2.Rodrigues(rmat)[0], np.array([0.0, 0.0, 2500.0]), camera, None)
+        out.append((i / fps, -yaw, pts.reshape(-1, 2) + rng.normal(0, noise, (6, 2))))
+    return out
+
+
+def cold_solve(pts):
+    """The previous implementation: fixed 1280x720 intrinsics, no warm start, no smoothing."""
+    camera = np.array([[800, 0, 640], [0, 800, 360], [0, 0, 1]], dtype="double")
+    _, rv, _ = cv2.solvePnP(MODEL_POINTS, pts, camera, np.zeros((4, 1)), flags=cv2.SOLVEPNP_ITERATIVE)
+    angles = cv2.RQDecomp3x3(cv2.Rodrigues(rv)[0])[0]
+    yaw = angles[1]
+    return yaw, "LEFT" if yaw > 6 else "RIGHT" if yaw < -6 else "CENTER"
+
+
+def run(frames=900, width=640, height=480, noise=1.0):
+    data = synthetic_landmarks(frames, width, height, noise)
+    tracker = HeadPoseTracker()
+    results = {}
+    for name in ("cold", "tracker"):
+        yaws, labels = [], []
+        start = time.perf_counter()
+        for t, _, pts in data:
+            if name == "cold":
+                yaw, label = cold_solve(pts)
+            else:
+                yaw = tracker.update(pts, width, height, t)[0]
+                label = tracker.label
+            yaws.append(yaw)
+            labels.append(label)
+        elapsed = time.perf_counter() - start
+        rest = np.array(yaws[frames // 8: frames // 2])
+        truth = np.array([y for _, y, _ in data[frames // 8: frames // 2]])
+        results[name] = {
+            "us_per_frame": round(1e6 * elapsed / frames, 1),
+            "yaw_std_at_rest_deg": round(float(rest.std()), 3),
+            "yaw_bias_at_rest_deg": round(float((rest - truth).mean()), 3),
+            "label_flips": int(sum(a != b for a, b in zip(labels, labels[1:]))),
+        }
+    results["tracker"]["solves"] = tracker.solves
+    results["tracker"]["skipped"] = tracker.skips
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=900)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--noise", type=float, default=1.0, help="Landmark noise std in pixels")
+    args = parser.parse_args()
+    print(run(args.frames, args.width, args.height, args.noise))
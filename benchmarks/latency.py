@@ -0,0 +1,389 @@
+"""
+End-to-end latency of the voice -> action path.
+
+Drives AssistantState.listen_once() (capture -> VAD -> ASR -> intent ->
+fusion -> validation -> VisionBridge dispatch -> WebSocket broadcast) with
+recorded or synthetic utterances and recorded or scripted vision input, and
+reports p50/p95/p99 per stage plus end-of-speech -> dispatch and end-of-speech
+-> client receipt, as JSON.
+
+Audio is played from memory through AudioCapture's normal block loop on a
+controllable media clock: by default it advances as fast as it is read (the
+'capture' stage is then the loop's own cost), with --realtime it is paced like
+a microphone. Vision states are taken at the media time each utterance ends,
+from a session recording (--vision session.ztrec) or a deterministic script.
+TTS is a stub; ASR is a stub returning the utterance's transcript unless
+--asr whisper is given. Broadcasts go to an in-process WebSocket client on a
+real event loop.
+
+With --asr whisper the 'asr' stage is the production model.transcribe() call.
+How it splits into audio encoding and text decoding is measured separately,
+after the run, by timing embed_audio() and one greedy decode() per utterance
+('asr_breakdown' in the report); those calls are not on the measured path.
+
+Utterances: --wavs DIR reads DIR/*.wav (16 kHz mono PCM) and, for the stub
+ASR, DIR/transcripts.json ({"file.wav": "zoom in here", ...}).
+
+Regression check: --baseline FILE exits with status 1 if any stage percentile
+exceeds the baseline by more than --tolerance (relative) plus --slack-ms.
+
+Usage:
+    python -m benchmarks.latency --repeat 20
+    python -m benchmarks.latency --wavs recordings/commands --asr whisper --model tiny
+    python -m benchmarks.latency --baseline benchmarks/baselines/latency.json
+    python -m benchmarks.latency --save-baseline benchmarks/baselines/latency.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_engine.audio_capture import AudioCapture
+from audio_engine.intent_engine import IntentEngine
+from audio_engine.session_recorder import SessionReader
+from audio_engine.stage_timer import STAGES, StageTimer
+from audio_engine.vision_snapshot import EMPTY_SNAPSHOT
+
+SAMPLE_RATE = 16000
+PERCENTILES = (50, 95, 99)
+
+# Synthetic session: one command per 3 s chunk; the last needs the LLM tier
+SYNTHETIC_COMMANDS = ["zoom in here", "next image", "scroll left", "highlight this", "hello", "reset",
+                      "analyze this region", "make it bigger"]
+
+
+class MediaClock:
+    """Controllable media time in seconds; audio reads advance it."""
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.now = 0.0
+        self._origin = time.perf_counter()
+
+    def advance(self, seconds: float):
+        self.now += seconds
+        if self.realtime:
+            delay = self._origin + self.now - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class PlaybackStream:
+    """Stands in for sd.InputStream: serves the current utterance block by block, then silence."""
+    def __init__(self, player: "Playback"):
+        self.player = player
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self, frames: int):
+        return self.player.read(frames), False
+
+
+class Playback:
+    def __init__(self, clock: MediaClock):
+        self.clock = clock
+        self.samples = np.zeros(0, dtype=np.float32)
+        self.pos = 0
+
+    def load(self, samples: np.ndarray):
+        self.samples = samples
+        self.pos = 0
+
+    def read(self, frames: int) -> np.ndarray:
+        out = np.zeros((frames, 1), dtype=np.float32)
+        chunk = self.samples[self.pos:self.pos + frames]
+        out[:len(chunk), 0] = chunk
+        self.pos += frames
+        self.clock.advance(frames / SAMPLE_RATE)
+        return out
+
+    def stream(self, samplerate, channels, dtype):
+        return PlaybackStream(self)
+
+
+class ScriptedVision:
+    """VisionManager stand-in: the recorded (or scripted) vision state at the current media time."""
+    def __init__(self, clock: MediaClock, reader: Optional[SessionReader] = None):
+        self.clock = clock
+        self.reader = reader
+        self.recorder = None
+        self.running = True
+        self._t0 = float(reader.states["timestamp"][0]) if reader is not None and len(reader.states) else 0.0
+
+    def get_snapshot(self):
+        if self.reader is not None:
+            snapshot = self.reader.state_at(self._t0 + self.clock.now)
+            if snapshot is not None:
+                return snapshot
+        # Deterministic script: user present, calibrated gaze drifting over the image
+        phase = self.clock.now / 7.0
+        point = (0.5 + 0.3 * np.cos(phase), 0.5 + 0.3 * np.sin(phase))
+        return EMPTY_SNAPSHOT._replace(timestamp=self.clock.now, user_present=True, eye="CENTER", head="CENTER",
+                                       gaze_point=point, fps=30.0)
+
+    def get_state(self) -> Dict[str, Any]:
+        return self.get_snapshot().to_dict()
+
+    def boost_gaze(self, duration=10.0):
+        return None
+
+    def release_gaze(self, token):
+        pass
+
+    def set_gaze_calibration(self, calibration):
+        pass
+
+    def stop(self):
+        pass
+
+
+class StubASR:
+    """Returns the current utterance's known transcript; marks the ASR stages so reports keep their shape."""
+    def __init__(self):
+        self.text = ""
+
+    def transcribe(self, audio_data, timer=None):
+        if timer:
+            timer.mark("asr")
+        return {"text": self.text, "confidence": 1.0, "language": "en"}
+
+
+class StubTTS:
+    def __init__(self):
+        self.spoken: List[str] = []
+
+    def speak(self, text, priority=None):
+        self.spoken.append(text)
+
+    def stop(self):
+        pass
+
+
+class ProbeClient:
+    """In-process WebSocket client; records when each broadcast arrives."""
+    def __init__(self):
+        self.received = threading.Event()
+        self.received_at = 0.0
+        self.messages: List[Dict[str, Any]] = []
+
+    async def send_text(self, message: str):
+        self.received_at = time.perf_counter()
+        self.messages.append(json.loads(message))
+        self.received.set()
+
+
+def synthetic_utterance(seed: int, duration=3.0) -> np.ndarray:
+    """Speech-like burst (amplitude-modulated harmonics) padded with room noise to one capture chunk."""
+    rng = np.random.default_rng(seed)
+    n = int(duration * SAMPLE_RATE)
+    audio = (0.002 * rng.standard_normal(n)).astype(np.float32)
+    start, length = int(0.3 * SAMPLE_RATE), int(1.4 * SAMPLE_RATE)
+    t = np.arange(length) / SAMPLE_RATE
+    f0 = 110.0 + 40.0 * rng.random()
+    voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    envelope = 0.5 * (1 - np.cos(2 * np.pi * 4.0 * t)) * np.hanning(length)
+    audio[start:start + length] += (0.1 * voiced * envelope).astype(np.float32)
+    return audio
+
+
+def read_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        rate, channels = f.getframerate(), f.getnchannels()
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).reshape(-1, channels)
+    audio = pcm[:, 0].astype(np.float32) / 32767.0
+    if rate != SAMPLE_RATE:
+        audio = np.interp(np.arange(0, len(audio), rate / SAMPLE_RATE), np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def load_utterances(wav_dir: Optional[str]) -> List[Tuple[str, np.ndarray, str]]:
+    """(name, samples, transcript) per utterance."""
+    if not wav_dir:
+        return [(f"synthetic-{i}", synthetic_utterance(i), text) for i, text in enumerate(SYNTHETIC_COMMANDS)]
+    transcripts = {}
+    manifest = os.path.join(wav_dir, "transcripts.json")
+    if os.path.exists(manifest):
+        with open(manifest, "r") as f:
+            transcripts = json.load(f)
+    names = sorted(n for n in os.listdir(wav_dir) if n.lower().endswith(".wav"))
+    if not names:
+        raise ValueError(f"No .wav files in {wav_dir}")
+    return [(n, read_wav(os.path.join(wav_dir, n)), transcripts.get(n, "")) for n in names]
+
+
+def percentiles(values_ms: List[float]) -> Dict[str, float]:
+    stats = {f"p{q}": round(float(np.percentile(values_ms, q)), 4) for q in PERCENTILES}
+    stats["n"] = len(values_ms)
+    return stats
+
+
+def asr_breakdown(asr, utterances, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Whisper encoder and decoder time per utterance (one 30 s window, temperature 0), in ms."""
+    import torch
+    import whisper
+
+    model = asr.model
+    options = whisper.DecodingOptions(language=asr.language, temperature=0.0, fp16=False)
+    samples: Dict[str, List[float]] = {"encode": [], "decode": []}
+    for _ in range(repeat):
+        for _, audio, _ in utterances:
+            started = time.perf_counter()
+            mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels).to(model.device)
+            with torch.no_grad():
+                features = model.embed_audio(mel.unsqueeze(0))
+            encoded = time.perf_counter()
+            # Given encoder features, decode() runs the text decoder only
+            whisper.decode(model, features, options)
+            samples["encode"].append(1000.0 * (encoded - started))
+            samples["decode"].append(1000.0 * (time.perf_counter() - encoded))
+    return {part: percentiles(ms) for part, ms in samples.items()}
+
+
+def build_assistant(args, clock: MediaClock, playback: Playback):
+    import main_audio  # Imported here: it configures logging and reads the ZT_* environment
+
+    reader = SessionReader(args.vision) if args.vision else None
+    vision = ScriptedVision(clock, reader)
+    if args.asr == "whisper":
+        from audio_engine.asr_engine import ASREngine
+        asr = ASREngine(model_size=args.model)
+    else:
+        asr = StubASR()
+    capture = AudioCapture(duration=args.chunk, threshold=0.01,
+                           stream_factory=playback.stream)
+    state = main_audio.AssistantState(vision_manager=vision, tts=StubTTS(), capture=capture, asr=asr,
+                                      intent_parser=IntentEngine(llm_model_path=args.llm), start_loops=False)
+    # Measurements must not write annotation files or depend on what is on screen
+    state.annotations.directory = None
+    state.state_manager.update_state("is_image_loaded", True)
+    main_audio.assistant = state
+    return state
+
+
+async def _register(hub, client):
+    hub.add(client)
+
+
+def run(args) -> Dict[str, Any]:
+    clock = MediaClock(realtime=args.realtime)
+    playback = Playback(clock)
+    state = build_assistant(args, clock, playback)
+
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    state.main_loop = loop
+    client = ProbeClient()
+    # The hub's sender task for the client has to be created on the loop
+    asyncio.run_coroutine_threadsafe(_register(state.ws_hub, client), loop).result(1.0)
+
+    utterances = load_utterances(args.wavs)
+    samples: Dict[str, List[float]] = {}
+    outcomes: Dict[str, int] = {}
+    try:
+        for i in range(args.warmup + args.repeat * len(utterances)):
+            name, audio, text = utterances[i % len(utterances)]
+            playback.load(audio)
+            if isinstance(state.asr, StubASR):
+                state.asr.text = text
+            client.received.clear()
+
+            timer = StageTimer()
+            result = state.listen_once(timer)
+            # The pipeline only schedules the broadcast; wait for the client to have it
+            delivered = "broadcast" in timer.marks and client.received.wait(1.0)
+            if i < args.warmup:
+                continue
+
+            key = f"{result['status']}:{result.get('intent', result.get('reason'))}"
+            outcomes[key] = outcomes.get(key, 0) + 1
+            durations = timer.durations_ms()
+            if delivered:
+                scheduled = timer.marks["broadcast"] - timer.durations["broadcast"]
+                durations["broadcast"] = 1000.0 * (client.received_at - scheduled)
+                durations["speech_to_broadcast"] = 1000.0 * (client.received_at - timer.marks["capture"])
+            if "dispatch" in timer.marks:
+                durations["speech_to_dispatch"] = 1000.0 * (timer.marks["dispatch"] - timer.marks["capture"])
+            if "intent" in durations:
+                durations[f"intent.{result.get('tier', 'NONE')}"] = durations["intent"]
+            for stage, ms in durations.items():
+                samples.setdefault(stage, []).append(ms)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join(1.0)
+
+    order = list(STAGES) + sorted(s for s in samples if s not in STAGES)
+    report = {
+        "asr": args.asr,
+        "vision": args.vision or "scripted",
+        "realtime": args.realtime,
+        "utterances": len(utterances),
+        "outcomes": outcomes,
+        "stages": {stage: percentiles(samples[stage]) for stage in order if stage in samples},
+    }
+    if not isinstance(state.asr, StubASR):
+        report["asr_breakdown"] = asr_breakdown(state.asr, utterances, args.repeat)
+    return report
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance=0.25, slack_ms=0.5) -> List[str]:
+    """Stage percentiles above baseline * (1 + tolerance) + slack_ms; stages missing on either side are skipped."""
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        current = result["stages"].get(stage)
+        if current is None:
+            continue
+        for q in PERCENTILES:
+            key = f"p{q}"
+            limit = base[key] * (1.0 + tolerance) + slack_ms
+            if current[key] > limit:
+                regressions.append(f"{stage} {key}: {current[key]:.2f} ms > {limit:.2f} ms (baseline {base[key]:.2f} ms)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--wavs", help="Directory of 16 kHz WAV utterances (default: synthetic)")
+    parser.add_argument("--vision", help="Session recording (.ztrec) to take vision states from (default: scripted)")
+    parser.add_argument("--asr", choices=("stub", "whisper"), default="stub")
+    parser.add_argument("--model", default="tiny", help="Whisper model size for --asr whisper")
+    parser.add_argument("--llm", help="GGUF model path for the intent LLM tier (default: rules only)")
+    parser.add_argument("--chunk", type=float, default=3.0, help="Capture chunk length in seconds")
+    parser.add_argument("--repeat", type=int, default=10, help="Passes over the utterance set")
+    parser.add_argument("--warmup", type=int, default=3, help="Unreported utterances before measuring")
+    parser.add_argument("--realtime", action="store_true", help="Pace audio like a live microphone")
+    parser.add_argument("--baseline", help="Fail (exit 1) on regression against this JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per percentile")
+    parser.add_argument("--slack-ms", type=float, default=0.5, help="Allowed absolute slowdown per percentile")
+    parser.add_argument("--save-baseline", help="Write this run's report as a baseline")
+    args = parser.parse_args()
+
+    # Keep stdout to the JSON report
+    logging.disable(logging.WARNING)
+    result = run(args)
+    print(json.dumps(result, indent=2))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(result, json.load(f), args.tolerance, args.slack_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
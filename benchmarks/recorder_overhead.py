@@ -0,0 +1,68 @@
+"""
+CPU cost of the session recorder at live data rates.
+
+Feeds a simulated session (30 FPS landmarks + vision states, 16 kHz audio in
+3 s chunks, a few events per utterance) through SessionRecorder and reports
+the CPU time spent in the record_* calls and in the writer thread, as a
+percentage of one core over the simulated duration.
+
+Usage:
+    python -m benchmarks.recorder_overhead --seconds 60 --out /tmp/bench.ztrec
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from audio_engine.session_recorder import FUSION, INTENT, TRANSCRIPT, SessionReader, SessionRecorder
+from audio_engine.vision_snapshot import EMPTY_SNAPSHOT
+
+
+def run(seconds=60.0, fps=30.0, out="bench.ztrec"):
+    if os.path.exists(out):
+        os.remove(out)
+    rng = np.random.default_rng(0)
+    gaze = rng.random((18, 2))
+    hand = rng.random((21, 3))
+    audio = (0.1 * rng.standard_normal(48000)).astype(np.float32)
+
+    recorder = SessionRecorder(out)
+    frames = int(seconds * fps)
+    producer_cpu = 0.0
+    for i in range(frames):
+        t = i / fps
+        start = time.thread_time()
+        recorder.record_frame(t, i + 1, 1280, 720, True, gaze, hand)
+        recorder.record_state(EMPTY_SNAPSHOT._replace(seq=i + 1, timestamp=t))
+        if i % int(3 * fps) == 0:
+            recorder.record_audio(t, audio, 16000)
+            recorder.record_event(TRANSCRIPT, {"text": "zoom in here"}, t)
+            recorder.record_event(INTENT, {"intent": "ZOOM_IN", "target": "HERE", "confidence": 0.9}, t)
+            recorder.record_event(FUSION, {"action": "ZOOM_IN", "parameters": {"region": "CENTER", "point": {"x": 0.4, "y": 0.6}}}, t)
+        producer_cpu += time.thread_time() - start
+        if i % 30 == 0:
+            # Let the writer run as it would between real frames
+            time.sleep(0.001)
+    recorder.close()
+
+    reader = SessionReader(out)
+    return {
+        "seconds": seconds,
+        "frames_recorded": len(reader.frames),
+        "mb_per_minute": recorder.bytes_written / 1e6 * 60.0 / seconds,
+        "producer_cpu_pct": 100.0 * producer_cpu / seconds,
+        "writer_cpu_pct": 100.0 * recorder.writer_cpu / seconds,
+        "us_per_frame": 1e6 * producer_cpu / frames,
+        "dropped": recorder.dropped,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--out", default="bench.ztrec")
+    args = parser.parse_args()
+    print(run(args.seconds, args.fps, args.out))
@@ -0,0 +1,156 @@
+"""
+WebSocket fan-out under load: BroadcastHub vs the sequential broadcast it replaced.
+
+Simulates hundreds of in-process dashboard clients on one event loop. Most
+clients are healthy (a send yields once, like a write into the socket buffer),
+a few are slow (each send takes --slow-send seconds) and a few are stuck
+(a send never completes). The producer broadcasts a coalescable STATE message
+at --state-hz and a reliable ACTION at --action-hz, and the benchmark reports,
+for healthy clients only, the latency from broadcast() to the client's send,
+the share of ACTIONs delivered and whether they arrived in order, plus
+evictions and coalesced messages. In legacy mode each broadcast sends to the
+clients one after another, so one stuck client holds up everyone behind it.
+
+Usage:
+    python -m benchmarks.ws_fanout --clients 500 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from audio_engine import metrics
+from audio_engine.ws_hub import COALESCE_LATEST, BroadcastHub
+
+
+class SimClient:
+    def __init__(self, kind: str, slow_send: float):
+        self.kind = kind
+        self.slow_send = slow_send
+        self.latencies: Dict[str, List[float]] = {"ACTION": [], "STATE": []}
+        self.actions: List[int] = []
+        self.closed = False
+        self._never = asyncio.Event()
+
+    async def send_text(self, message: str):
+        if self.kind == "stuck":
+            await self._never.wait()
+        elif self.kind == "slow":
+            await asyncio.sleep(self.slow_send)
+        else:
+            await asyncio.sleep(0)
+        payload = json.loads(message)
+        self.latencies[payload["type"]].append(time.perf_counter() - payload["t"])
+        if payload["type"] == "ACTION":
+            self.actions.append(payload["seq"])
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+async def _legacy_broadcast(clients: List[SimClient], payload: Dict[str, Any]):
+    """The old broadcast_to_ws: one send after another, a failed client is dropped."""
+    message = json.dumps(payload)
+    for client in list(clients):
+        try:
+            await client.send_text(message)
+        except Exception:
+            clients.remove(client)
+
+
+async def _run(mode: str, args) -> Dict[str, Any]:
+    n_stuck = int(args.clients * args.stuck)
+    n_slow = int(args.clients * args.slow)
+    kinds = ["stuck"] * n_stuck + ["slow"] * n_slow + ["healthy"] * (args.clients - n_stuck - n_slow)
+    # Spread the bad clients through the connection order, as they would be in practice
+    order = np.random.default_rng(0).permutation(len(kinds))
+    clients = [SimClient(kinds[i], args.slow_send) for i in order]
+
+    hub = BroadcastHub(queue_size=args.queue_size, send_timeout=args.send_timeout,
+                       policies={"STATE": COALESCE_LATEST})
+    legacy_clients = list(clients)
+    tasks = []
+    if mode == "hub":
+        for client in clients:
+            hub.add(client)
+    evictions = metrics.WS_EVICTIONS.value()
+    coalesced = metrics.WS_COALESCED.value()
+
+    broadcast_cost = []
+    actions_sent = 0
+    start = time.perf_counter()
+    next_state = next_action = start
+    seq = 0
+    while True:
+        now = time.perf_counter()
+        if now - start >= args.seconds:
+            break
+        due = []
+        if now >= next_state:
+            due.append("STATE")
+            next_state += 1.0 / args.state_hz
+        if now >= next_action:
+            due.append("ACTION")
+            next_action += 1.0 / args.action_hz
+        for kind in due:
+            seq += 1
+            payload = {"type": kind, "seq": seq, "t": time.perf_counter(), "data": {"x": 0.5, "y": 0.5}}
+            called = time.perf_counter()
+            if mode == "hub":
+                hub.broadcast(payload)
+            else:
+                tasks.append(asyncio.ensure_future(_legacy_broadcast(legacy_clients, payload)))
+            broadcast_cost.append(time.perf_counter() - called)
+            actions_sent += kind == "ACTION"
+        await asyncio.sleep(max(0.0, min(next_state, next_action) - time.perf_counter()))
+    # Let queued messages drain
+    await asyncio.sleep(args.drain)
+
+    for client in hub.clients:
+        hub.remove(client.websocket)
+    for task in tasks:
+        task.cancel()
+    await asyncio.sleep(0)
+
+    healthy = [c for c in clients if c.kind == "healthy"]
+    result = {"mode": mode, "clients": len(clients), "healthy": len(healthy), "slow": n_slow, "stuck": n_stuck,
+              "broadcasts": seq, "broadcast_call_us_p50": round(1e6 * float(np.median(broadcast_cost)), 1)}
+    for kind in ("ACTION", "STATE"):
+        values = [1000.0 * v for c in healthy for v in c.latencies[kind]]
+        if values:
+            result[f"{kind.lower()}_fanout_ms"] = {f"p{q}": round(float(np.percentile(values, q)), 3)
+                                                   for q in (50, 99)}
+    delivered = sum(len(c.actions) for c in healthy)
+    result["healthy_actions_delivered_pct"] = round(100.0 * delivered / max(1, actions_sent * len(healthy)), 2)
+    result["healthy_actions_out_of_order"] = sum(c.actions != sorted(c.actions) for c in healthy)
+    if mode == "hub":
+        result["evicted"] = int(metrics.WS_EVICTIONS.value() - evictions)
+        result["coalesced"] = int(metrics.WS_COALESCED.value() - coalesced)
+    return result
+
+
+def run(args) -> List[Dict[str, Any]]:
+    modes = ["hub", "legacy"] if args.mode == "both" else [args.mode]
+    return [asyncio.run(_run(mode, args)) for mode in modes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["hub", "legacy", "both"], default="both")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--slow", type=float, default=0.02, help="Fraction of slow clients")
+    parser.add_argument("--stuck", type=float, default=0.01, help="Fraction of clients whose sends never complete")
+    parser.add_argument("--slow-send", type=float, default=0.5, help="Seconds per send for slow clients")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--state-hz", type=float, default=30.0)
+    parser.add_argument("--action-hz", type=float, default=10.0)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--send-timeout", type=float, default=1.0)
+    parser.add_argument("--drain", type=float, default=0.5, help="Seconds to let queues drain after the run")
+    args = parser.parse_args()
+    for result in run(args):
+        print(json.dumps(result, indent=2))
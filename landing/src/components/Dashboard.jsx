@@ -2,6 +2,20 @@ import React, { useEffect, useState, useRef, useCallback } from 'react';
 import LivePreview from './LivePreview';
 import { Upload, ChevronLeft, ChevronRight, Image as ImageIcon, HelpCircle, ArrowLeft, Maximize2, RotateCcw, ZoomIn, ZoomOut } from 'lucide-react';
 
+// Vision state is pushed over the assistant WebSocket: a full VISION_STATE, then VISION_DELTAs
+const VISION_SUBSCRIPTION = { type: 'VISION_SUBSCRIBE', hz: 10 };
+
+// Apply {"gaze.eye": "LEFT", "fps": 29.8} style changes to a VisionSnapshot dict
+const applyVisionDelta = (state, changes) => {
+  const next = { ...state, gaze: { ...state.gaze }, hand: { ...state.hand } };
+  for (const [path, value] of Object.entries(changes)) {
+    const [head, field] = path.split('.');
+    if (field) next[head][field] = value;
+    else next[head] = value;
+  }
+  return next;
+};
+
 const Dashboard = ({ onBack }) => {
   const [visionData, setVisionData] = useState(null);
   const [voiceData, setVoiceData] = useState(null);
@@ -12,9 +26,17 @@ const Dashboard = ({ onBack }) => {
 
   // Transform State for Image Viewer
   const [transform, setTransform] = useState({ scale: 1, x: 0, y: 0 });
+  // Highlights of the selected image (normalized boxes), restored by the assistant on image switch
+  const [highlights, setHighlights] = useState([]);
   const [statusMessage, setStatusMessage] = useState({ text: 'SYSTEM READY', type: 'info' });
   const wsRef = useRef(null);
+  const selectedImageRef = useRef(null);
   const messageTimeoutRef = useRef(null);
+  const visionSeqRef = useRef(0);
+  const imageRef = useRef(null);
+  const viewStateRef = useRef(null);
+  // Bumped when the displayed image has loaded (its layout size is known from then on)
+  const [imageLoads, setImageLoads] = useState(0);
 
   const displayMessage = useCallback((text, type = 'info') => {
     setStatusMessage({ text: text.toUpperCase(), type });
@@ -65,7 +87,11 @@ const Dashboard = ({ onBack }) => {
           let newY = prev.y;
 
           // Spatial Targeting
-          if (parameters?.region === 'LEFT_REGION') {
+          if (parameters?.point) {
+            // Calibrated gaze point in [0, 1]; same scale as the fixed regions (x = 1/6 -> 200)
+            newX = (0.5 - parameters.point.x) * 600;
+            newY = (0.5 - parameters.point.y) * 600;
+          } else if (parameters?.region === 'LEFT_REGION') {
             newX = 200; // Shift right to focus left
           } else if (parameters?.region === 'RIGHT_REGION') {
             newX = -200;
@@ -87,7 +113,9 @@ const Dashboard = ({ onBack }) => {
         setTransform({ scale: 1, x: 0, y: 0 });
         break;
       case 'HIGHLIGHT_REGION':
-        // Show a temporary highlight at parameters.coordinates
+        if (parameters?.bbox) {
+          setHighlights(prev => [...prev, { id: `local-${Date.now()}`, bbox: parameters.bbox, label: parameters.annotation?.label || '' }]);
+        }
         break;
       default:
         console.warn("Unhandled Intent:", intent);
@@ -101,14 +129,38 @@ const Dashboard = ({ onBack }) => {
       const wsUrl = `${protocol}//${window.location.hostname}:8000/ws`;
       const ws = new WebSocket(wsUrl);
 
-      ws.onopen = () => console.log("Connected to Assistant WebSocket");
+      ws.onopen = () => {
+        console.log("Connected to Assistant WebSocket");
+        ws.send(JSON.stringify(VISION_SUBSCRIPTION));
+        if (selectedImageRef.current) {
+          ws.send(JSON.stringify({ type: 'IMAGE_ACTIVE', image: getName(selectedImageRef.current) }));
+        }
+        if (viewStateRef.current) ws.send(JSON.stringify(viewStateRef.current));
+      };
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+          // Voice-triggered messages carry the assistant's trace id (GET /debug/traces/{id})
+          if (data.trace_id) console.debug(`[trace ${data.trace_id}]`, data.type, data.intent || data.text);
           if (data.type === 'ACTION') {
             handleAction(data);
           } else if (data.type === 'MESSAGE') {
             displayMessage(data.text, 'chat');
+          } else if (data.type === 'VISION_STATE') {
+            visionSeqRef.current = data.seq;
+            setVisionData({ ...data.state, seq: data.seq, timestamp: data.timestamp });
+          } else if (data.type === 'VISION_DELTA') {
+            if (data.base !== visionSeqRef.current) {
+              // Missed the state this delta builds on: start over from a full snapshot
+              ws.send(JSON.stringify(VISION_SUBSCRIPTION));
+              return;
+            }
+            visionSeqRef.current = data.seq;
+            setVisionData(prev => ({ ...applyVisionDelta(prev, data.changes), seq: data.seq, timestamp: data.timestamp }));
+          } else if (data.type === 'HIGHLIGHTS') {
+            if (selectedImageRef.current && data.image === getName(selectedImageRef.current)) {
+              setHighlights(data.highlights);
+            }
           }
         } catch (e) {
           console.error("WS Parse Error:", e);
@@ -129,18 +181,41 @@ const Dashboard = ({ onBack }) => {
     };
   }, [handleAction]);
 
-  // Telemetry Polling (Optional fallback for display)
+  // Tell the assistant which image is displayed so deictic commands and highlights bind to it
   useEffect(() => {
-    let mounted = true;
-    const loadVision = async () => {
-      try {
-        const res = await fetch('/vision');
-        if (res.ok) {
-          const data = await res.json();
-          if (mounted) setVisionData(data);
-        }
-      } catch (e) { }
+    selectedImageRef.current = selectedImage;
+    setHighlights([]);
+    const ws = wsRef.current;
+    if (selectedImage && ws && ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ type: 'IMAGE_ACTIVE', image: getName(selectedImage) }));
+    }
+  }, [selectedImage]);
+
+  // Report where the image sits on screen, so gaze and hand points map to image coordinates after zoom/pan
+  useEffect(() => {
+    const sendViewState = () => {
+      const img = imageRef.current;
+      if (!selectedImage || !img || !img.offsetWidth) return;
+      // Target transform, not the mid-transition one: commands after a zoom refer to where it lands
+      const vw = window.innerWidth, vh = window.innerHeight;
+      const w = img.offsetWidth * transform.scale, h = img.offsetHeight * transform.scale;
+      const cx = vw / 2 + transform.x, cy = vh / 2 + transform.y;
+      viewStateRef.current = {
+        type: 'VIEW_STATE',
+        image: getName(selectedImage),
+        rect: [(cx - w / 2) / vw, (cy - h / 2) / vh, (cx + w / 2) / vw, (cy + h / 2) / vh]
+      };
+      const ws = wsRef.current;
+      if (ws && ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify(viewStateRef.current));
     };
+    sendViewState();
+    window.addEventListener('resize', sendViewState);
+    return () => window.removeEventListener('resize', sendViewState);
+  }, [selectedImage, transform, imageLoads]);
+
+  // Voice status polling (vision state arrives over the WebSocket)
+  useEffect(() => {
+    let mounted = true;
     const loadVoice = async () => {
       try {
         const res = await fetch('/voice');
@@ -150,10 +225,7 @@ const Dashboard = ({ onBack }) => {
         }
       } catch (e) { }
     };
-    const id = setInterval(() => {
-      loadVision();
-      loadVoice();
-    }, 1000);
+    const id = setInterval(loadVoice, 1000);
     return () => {
       mounted = false;
       clearInterval(id);
@@ -196,17 +268,30 @@ const Dashboard = ({ onBack }) => {
       <div className="absolute inset-0 flex items-center justify-center z-0 overflow-hidden cursor-crosshair">
         {selectedImage ? (
           <div
-            className="transition-transform duration-500 ease-out will-change-transform"
+            className="relative transition-transform duration-500 ease-out will-change-transform"
             style={{
               transform: `translate(${transform.x}px, ${transform.y}px) scale(${transform.scale})`
             }}
           >
             <img
+              ref={imageRef}
+              onLoad={() => setImageLoads(n => n + 1)}
               src={`/samples/${getName(selectedImage)}`}
               alt={getName(selectedImage)}
               className="max-w-[90vw] max-h-[85vh] object-contain shadow-[0_0_50px_rgba(0,0,0,0.5)] rounded-sm"
               draggable="false"
             />
+            {highlights.map(h => (
+              <div
+                key={h.id}
+                className="absolute border-2 border-yellow-400/80 bg-yellow-400/10 pointer-events-none rounded-sm"
+                style={{
+                  left: `${h.bbox[0] * 100}%`, top: `${h.bbox[1] * 100}%`,
+                  width: `${(h.bbox[2] - h.bbox[0]) * 100}%`, height: `${(h.bbox[3] - h.bbox[1]) * 100}%`
+                }}
+                title={h.label}
+              />
+            ))}
           </div>
         ) : (
           <div className="text-gray-500 flex flex-col items-center">
@@ -239,9 +324,9 @@ const Dashboard = ({ onBack }) => {
           <div className="h-0.5 w-full bg-gradient-to-r from-cyan-500/50 to-transparent mb-3"></div>
 
           <div className="grid grid-cols-2 gap-2 text-[10px] font-mono text-gray-400 capitalize">
-            <div>Vision: <span className="text-white">{visionData?.raw?.gaze?.eye || 'None'}</span></div>
+            <div>Vision: <span className="text-white">{visionData?.gaze?.eye || 'None'}</span></div>
             <div className="text-right">Scale: <span className="text-cyan-400">{transform.scale.toFixed(2)}x</span></div>
-            <div>Gesture: <span className="text-white">{visionData?.raw?.hand?.pose?.replace('_', ' ') || 'Idle'}</span></div>
+            <div>Gesture: <span className="text-white">{visionData?.hand?.pose?.replace('_', ' ') || 'Idle'}</span></div>
             <div className="text-right text-green-400">98.2% ACC</div>
           </div>
         </div>
@@ -268,7 +353,7 @@ const Dashboard = ({ onBack }) => {
           </span>
         </div>
         <div className="h-40 relative bg-black/40">
-          <LivePreview />
+          <LivePreview vision={visionData} />
         </div>
       </div>
 
@@ -3,8 +3,12 @@ import { motion } from 'framer-motion';
 import Waveform from './Waveform';
 import GazeRing from './GazeRing';
 
-const LivePreview = () => {
-  const [visionData, setVisionData] = useState(null);
+// `vision`: VisionSnapshot state pushed over the Dashboard's WebSocket (null until the first one);
+// when the prop is not passed at all, /vision is polled instead
+const LivePreview = ({ vision }) => {
+  const pushed = vision !== undefined;
+  const [polledVision, setVisionData] = useState(null);
+  const visionData = pushed ? { object: vision?.gaze?.eye } : polledVision;
   const [voiceData, setVoiceData] = useState(null);
   const mounted = useRef(true);
 
@@ -13,9 +17,9 @@ const LivePreview = () => {
 
     const loadData = async () => {
       try {
-        const visRes = await fetch('/vision');
+        const visRes = pushed ? null : await fetch('/vision');
         const voiRes = await fetch('/voice');
-        if (visRes.ok) {
+        if (visRes && visRes.ok) {
           const vData = await visRes.json();
           if (mounted.current) setVisionData(vData);
         }
@@ -35,7 +39,7 @@ const LivePreview = () => {
       mounted.current = false;
       clearInterval(intervalId);
     };
-  }, []);
+  }, [pushed]);
 
   return (
     <section id="demo" className="h-full py-4 px-2">
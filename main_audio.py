@@ -1,23 +1,43 @@
 import logging
+import os
 import time
 import sys
 import threading
+import itertools
 import asyncio
 from typing import Optional, Dict, Any, List
 from fastapi import FastAPI, Body, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import uvicorn
 import json
 
 # Import our modules
+from audio_engine import metrics
 from audio_engine.audio_capture import AudioCapture
+from audio_engine.echo_guard import EchoGuard
 from audio_engine.asr_engine import ASREngine
 from audio_engine.intent_engine import IntentEngine
 from audio_engine.state_manager import StateManager
-from audio_engine.tts_engine import TTSEngine
+from audio_engine.tts_engine import CHAT, CONFIRMATION, SAFETY, TTSEngine
 from audio_engine.vision_bridge import get_bridge
 from audio_engine.vision_manager import VisionManager
+from audio_engine.vision_process import ProcessVisionManager
+from audio_engine.frame_sources import create_source
 from audio_engine.fusion_engine import FusionEngine
+from audio_engine.annotation_store import AnnotationStore, HIGHLIGHT
+from audio_engine.image_view import ImageView
+from audio_engine.session_recorder import ACTION, FUSION, INTENT, TRANSCRIPT, SessionRecorder
+from audio_engine.gaze_calibration import CalibrationSession, GazeProfileStore, gaze_inputs
+from audio_engine.gesture_events import SWIPE_START, PINCH_BEGIN, PINCH_UPDATE, PINCH_END
+from audio_engine.stage_timer import StageTimer
+from audio_engine.tracing import Tracer
+from audio_engine.profiler import SamplingProfiler, memory_diff
+from audio_engine.ws_hub import BroadcastHub
+from audio_engine.vision_stream import VisionPublisher
+from audio_engine.listen_jobs import ListenJobQueue
+from audio_engine.voice_pipeline import StagedPipeline
+from audio_engine.action_coalescer import ActionCoalescer
 
 # Configure logging
 logging.basicConfig(
@@ -27,10 +47,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ZeroTouchAssistant")
 
+# "thread" runs vision in this interpreter; "process" moves it to a worker process
+VISION_MODE = os.environ.get("ZT_VISION_MODE", "thread")
+# Frame source spec (camera:0, video:<path>, images:<dir>, synthetic:640x480@30); file sources
+# are paced to their frame rate unless ZT_VISION_REALTIME=0
+VISION_SOURCE = os.environ.get("ZT_VISION_SOURCE", "camera:0")
+VISION_REALTIME = os.environ.get("ZT_VISION_REALTIME", "1") != "0"
+VISION_LOOP = os.environ.get("ZT_VISION_LOOP", "0") == "1"
+# Per-user profiles (gaze calibration); ZT_GAZE_PROFILE is loaded at startup if set
+PROFILE_DIR = os.environ.get("ZT_PROFILE_DIR", "profiles")
+GAZE_PROFILE = os.environ.get("ZT_GAZE_PROFILE")
+# Per-image annotations and highlights
+ANNOTATION_DIR = os.environ.get("ZT_ANNOTATION_DIR", "annotations")
+# Session recording (off unless set): a new recording in this directory per start
+RECORD_DIR = os.environ.get("ZT_RECORD_DIR")
+# Per-utterance traces kept for /debug/traces (ZT_TRACE=0 disables)
+TRACE_ENABLED = os.environ.get("ZT_TRACE", "1") != "0"
+TRACE_CAPACITY = int(os.environ.get("ZT_TRACE_CAPACITY", "256"))
+# /debug/profile and /debug/memory (off unless ZT_PROFILING=1)
+PROFILING_ENABLED = os.environ.get("ZT_PROFILING", "0") == "1"
+PROFILE_MAX_SECONDS = 60.0
+# WebSocket clients with this many undelivered actions/messages, or a send stuck this long, are dropped
+WS_QUEUE_SIZE = int(os.environ.get("ZT_WS_QUEUE", "256"))
+WS_SEND_TIMEOUT = float(os.environ.get("ZT_WS_SEND_TIMEOUT", "5.0"))
+# Highest rate a WebSocket client may subscribe to vision state at (VISION_SUBSCRIBE)
+VISION_PUSH_MAX_HZ = float(os.environ.get("ZT_VISION_PUSH_MAX_HZ", "30"))
+# /voice/listen job workers (a second one overlaps the next capture with the previous transcription)
+LISTEN_WORKERS = int(os.environ.get("ZT_LISTEN_WORKERS", "2"))
+# Continuous listening: pipelined stages (default) or the sequential loop (ZT_VOICE_PIPELINE=0)
+VOICE_PIPELINE = os.environ.get("ZT_VOICE_PIPELINE", "1") != "0"
+# Utterances that may wait in front of each voice stage before capture blocks
+VOICE_QUEUE_SIZE = int(os.environ.get("ZT_VOICE_QUEUE", "2"))
+# Synthesized TTS phrases are also kept here across restarts (memory only if unset)
+TTS_CACHE_DIR = os.environ.get("ZT_TTS_CACHE_DIR")
+# Capture stays gated this long after TTS playback ends (output latency + reverb), in seconds
+ECHO_TAIL = float(os.environ.get("ZT_ECHO_TAIL", "0.3"))
+# During TTS, microphone blocks louder than this x the VAD threshold still pass (barge-in)
+ECHO_MARGIN = float(os.environ.get("ZT_ECHO_MARGIN", "4.0"))
+# Pinch zooms (and scrolls) within this many seconds are merged into one action
+GESTURE_WINDOW = float(os.environ.get("ZT_GESTURE_WINDOW", "0.1"))
+# Most merged gesture actions dispatched per second
+GESTURE_RATE = float(os.environ.get("ZT_GESTURE_RATE", "4"))
+# A vision callback that takes longer is reported as slow, and later actions fail as busy until it returns
+BRIDGE_CALLBACK_TIMEOUT = float(os.environ.get("ZT_BRIDGE_CALLBACK_TIMEOUT", "2.0"))
+# Longest /voice/listen?wait=true or /voice/jobs/{id}?wait= long-poll, in seconds
+LISTEN_MAX_WAIT = 60.0
+
+# --- Spoken phrases ---
+
+CHAT_GREETING = "Hello! Ready for procedure."
+CHAT_DEFAULT = "I'm here to assist with surgical commands."
+EXECUTION_FAILED = "Failed to execute."
+# Intents the bridge executes and confirms aloud
+CONFIRMED_INTENTS = ["ZOOM_IN", "ZOOM_OUT", "SCROLL_LEFT", "SCROLL_RIGHT", "SCROLL_UP", "SCROLL_DOWN", "NEXT_IMAGE",
+                     "PREV_IMAGE", "RESET_VIEW", "LOAD_IMAGE", "HIGHLIGHT_REGION"]
+
+def confirmation_phrase(intent: str) -> str:
+    return f"Executing {intent.replace('_', ' ').lower()}."
+
+def fixed_phrases() -> List[str]:
+    """Everything the assistant says that does not depend on the utterance (synthesized at startup)."""
+    return ([confirmation_phrase(i) for i in CONFIRMED_INTENTS] +
+            [EXECUTION_FAILED, CHAT_GREETING, CHAT_DEFAULT, "No image loaded.", "Gaze tracking not available.",
+             "Target required but no user/gaze detected"])
+
 # --- Assistant Global Initialization ---
 
+class Utterance:
+    """One captured chunk on its way through the voice stages."""
+    def __init__(self, audio, timer: StageTimer, seq: int = 0):
+        self.audio = audio
+        # Capture order; speech of utterances captured before a STOP is not played
+        self.seq = seq
+        self.timer = timer
+        # Sent with every broadcast of this utterance so the dashboard can quote it
+        self.trace_id = getattr(timer, "trace_id", None)
+        self.text = ""
+        self.tier = "NONE"
+        self.fused: Optional[Dict[str, Any]] = None
+        # Confirmation for the speak stage (text, TTS priority), and the outcome once decided
+        self.speech: Optional[str] = None
+        self.speech_priority = CONFIRMATION
+        self.result: Optional[Dict[str, Any]] = None
+        # Token from vision_manager.boost_gaze() at this utterance's voice onset (None if it had none)
+        self.gaze_boost = None
+
 class AssistantState:
-    def __init__(self):
+    def __init__(self, vision_manager=None, tts=None, capture=None, asr=None, intent_parser=None, start_loops=True):
+        """
+        Engines not passed in are created from the ZT_* configuration (benchmarks and tests pass stubs).
+        :param start_loops: Start the background voice and gesture loops.
+        """
         self.asr_loaded = False
         self.llm_loaded = False
         self.tts_loaded = False
@@ -38,56 +145,162 @@ class AssistantState:
         self.main_loop = None  # Store the main event loop for thread-safe broadcasts
         
         # WebSockets
-        self.active_connections: List[WebSocket] = []
+        self.ws_hub = BroadcastHub(queue_size=WS_QUEUE_SIZE, send_timeout=WS_SEND_TIMEOUT)
+        self.vision_stream = VisionPublisher(lambda: self.vision_manager.get_snapshot(), max_hz=VISION_PUSH_MAX_HZ)
         
         # Modules
         self.state_manager = StateManager()
         self.vision_bridge = get_bridge()
         self.vision_bridge.register_state_manager(self.state_manager)
+        self.vision_bridge.callback_timeout = BRIDGE_CALLBACK_TIMEOUT
+        
+        # Annotations/highlights of the displayed images
+        self.annotations = AnnotationStore(ANNOTATION_DIR)
+        # Zoom/pan of the displayed image, reported by the viewer (maps gaze/hand to image coordinates)
+        self.image_view = ImageView()
         
         # Register a listener to broadcast actions to frontend
         self.vision_bridge.register_action_listener(self.broadcast_action)
+        self.vision_bridge.register_action_listener(self._store_highlight)
+        self.vision_bridge.register_action_listener(self._record_action)
+        # Continuous gestures go through this instead of calling the bridge every frame
+        self.gesture_actions = ActionCoalescer(self.vision_bridge.execute_action, window=GESTURE_WINDOW,
+                                               max_rate=GESTURE_RATE)
+        self.recorder = None
+        self.tracer = Tracer(TRACE_CAPACITY, TRACE_ENABLED)
+        # One capture at a time: the voice loop and /voice/listen jobs share the microphone
+        self._mic_lock = threading.Lock()
+        # Gaze boost taken at voice onset of the capture in progress (handed to its Utterance)
+        self._capture_boost = None
+        self.voice_pipeline: Optional[StagedPipeline] = None
+        self._utterance_seq = itertools.count(1)
+        # Utterances captured before this seq are not spoken (set by STOP)
+        self._silenced_before = 0
+        # Shared by TTS (what is playing) and capture/ASR (ignore it)
+        self.echo_guard = EchoGuard(tail=ECHO_TAIL, margin=ECHO_MARGIN)
+        self.listen_jobs = ListenJobQueue(self.listen_once, workers=LISTEN_WORKERS, on_done=self._broadcast_listen_job)
+        
+        # Gaze calibration profiles
+        self.gaze_profiles = GazeProfileStore(PROFILE_DIR)
+        self.gaze_profile = None
+        self.calibration_session = None
+        self.calibration_user = None
         
         # Core Engines
         try:
             # 1. Vision & Gaze Tracking
-            self.vision_manager = VisionManager()
-            self.vision_manager.start()
+            self.vision_source = VISION_SOURCE
+            if vision_manager is None:
+                # Built from the spec on every (re)start of the loop, in the worker process if there is one
+                source = dict(source=VISION_SOURCE, realtime=VISION_REALTIME, loop=VISION_LOOP)
+                if VISION_MODE == "process":
+                    vision_manager = ProcessVisionManager(**source)
+                else:
+                    vision_manager = VisionManager(**source)
+                vision_manager.start()
+            self.vision_manager = vision_manager
             self.vision_running = True
+            metrics.VISION_FPS.set_function(lambda: self.vision_manager.get_snapshot().fps)
+            metrics.WS_CLIENTS.set_function(lambda: len(self.ws_hub))
+            metrics.WS_QUEUE_DEPTH.set_function(self.ws_hub.queue_depth)
+            if GAZE_PROFILE:
+                self.activate_gaze_profile(GAZE_PROFILE)
             
             # 2. TTS
-            self.tts = TTSEngine(use_coqui=True)
+            if tts is None:
+                tts = TTSEngine(use_coqui=True, cache_dir=TTS_CACHE_DIR, echo_guard=self.echo_guard)
+                tts.warm(fixed_phrases())
+            self.tts = tts
             self.tts_loaded = True
             
             # 3. Audio Capture
-            self.capture = AudioCapture(duration=3.0, threshold=0.01)
+            # Voice onset switches gaze to full rate until that utterance has been fused
+            self.capture = capture or AudioCapture(duration=3.0, threshold=0.01, echo_guard=self.echo_guard)
+            self.capture.on_speech_start = self._speech_started
             
             # 4. ASR (Whisper)
-            self.asr = ASREngine(model_size="tiny")
+            self.asr = asr or ASREngine(model_size="tiny")
             self.asr_loaded = True
             
             # 5. Intent Parser (LLM)
-            self.intent_parser = IntentEngine(llm_model_path="D:\\LLM\\models\\phi-2\\phi-2.Q4_K_M.gguf")
+            self.intent_parser = intent_parser or IntentEngine(llm_model_path="D:\\LLM\\models\\phi-2\\phi-2.Q4_K_M.gguf")
             self.llm_loaded = True
             
             # 6. Multimodal Fusion
-            self.fusion_engine = FusionEngine()
+            self.fusion_engine = FusionEngine(self.annotations, self.image_view)
             
             # 7. Voice Monitoring Control
-            self.voice_listening = True
+            self.voice_listening = start_loops
+            if RECORD_DIR:
+                self.start_recording(RECORD_DIR)
             
-            # 8. Start Gesture Monitoring Loop
-            self.gesture_thread = threading.Thread(target=self._gesture_monitor_loop, daemon=True)
-            self.gesture_thread.start()
-            
-            # 9. Start Continuous Voice Monitoring Loop
-            self.voice_thread = threading.Thread(target=self._voice_monitor_loop, daemon=True)
-            self.voice_thread.start()
+            if start_loops:
+                # 8. Start Gesture Monitoring Loop
+                self.gesture_thread = threading.Thread(target=self._gesture_monitor_loop, name="GestureLoop", daemon=True)
+                self.gesture_thread.start()
+                
+                # 9. Start Continuous Voice Monitoring Loop
+                if VOICE_PIPELINE:
+                    self.voice_pipeline = self._start_voice_pipeline()
+                else:
+                    self.voice_thread = threading.Thread(target=self._voice_monitor_loop, name="VoiceLoop", daemon=True)
+                    self.voice_thread.start()
             
             logger.info("All Zero-Touch engines and loops loaded successfully.")
         except Exception as e:
             logger.error(f"Error during initialization: {e}")
 
+    def activate_gaze_profile(self, user: str) -> bool:
+        """Load a user's gaze calibration and apply it to the vision stream."""
+        calibration = self.gaze_profiles.load(user)
+        if calibration is None:
+            logger.warning(f"No gaze calibration stored for profile {user}")
+            return False
+        self.vision_manager.set_gaze_calibration(calibration)
+        self.gaze_profile = user
+        logger.info(f"Gaze profile {user} active (RMS error {calibration.rms_error:.3f})")
+        return True
+
+    def start_recording(self, directory: str) -> str:
+        """Record audio, landmarks, vision states and voice/fusion decisions until stop_recording()."""
+        self.stop_recording()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("session-%Y%m%d-%H%M%S.ztrec"))
+        self.recorder = SessionRecorder(path, metadata={"vision_mode": VISION_MODE, "vision_source": self.vision_source})
+        self.vision_manager.recorder = self.recorder
+        self.capture.recorder = self.recorder
+        logger.info(f"Recording session to {path}")
+        return path
+
+    def stop_recording(self) -> Optional[str]:
+        recorder = self.recorder
+        if recorder is None:
+            return None
+        # Listeners run in the background: let the last actions reach the recording
+        self.vision_bridge.drain_listeners(1.0)
+        self.recorder = None
+        self.vision_manager.recorder = None
+        self.capture.recorder = None
+        recorder.close()
+        return recorder.path
+
+    def record_event(self, kind: str, data: Dict[str, Any]):
+        recorder = self.recorder
+        if recorder:
+            recorder.record_event(kind, data)
+
+    def _record_action(self, intent: str, parameters: Dict[str, Any]):
+        self.record_event(ACTION, {"intent": intent, "parameters": parameters})
+
+    def _store_highlight(self, intent: str, parameters: Dict[str, Any]):
+        """Keep executed highlights with their image so they come back when it is shown again."""
+        if intent != "HIGHLIGHT_REGION" or not parameters.get("bbox"):
+            return
+        image = parameters.get("image") or self.annotations.active_image
+        if image:
+            label = (parameters.get("annotation") or {}).get("label", "")
+            self.annotations.add(image, label, parameters["bbox"], kind=HIGHLIGHT)
+
     def broadcast_action(self, intent: str, parameters: Dict[str, Any]):
         """Callback for VisionBridge to push actions to WebSocket clients."""
         payload = {"type": "ACTION", "intent": intent, "parameters": parameters}
@@ -103,37 +316,39 @@ class AssistantState:
         logger.info(f"Broadcasting action: {intent}")
 
     def _gesture_monitor_loop(self):
-        """Background loop to detect gestures without voice."""
-        last_gesture = "NONE"
-        last_gesture_time = 0
+        """Background loop to dispatch gestures without voice. Blocks on the vision event queue."""
+        last_swipe_time = 0
+        actions = self.gesture_actions
         
         while self.vision_running:
             try:
-                state = self.vision_manager.get_state()
-                curr_gesture = state["hand"]["gesture"]
-                pinch_delta = state["hand"]["pinch_delta"]
-                
-                now = time.time()
+                # Wake up in time to dispatch merged zooms even if no further event arrives
+                event = self.vision_manager.events.get(timeout=actions.wait_time(1.0))
+                actions.poll()
+                if event is None:
+                    continue
                 
-                # 1. SWIPE DETECTION (Debounced)
-                if curr_gesture != "NONE" and curr_gesture != last_gesture:
-                    if now - last_gesture_time > 1.0: # 1 second debounce
-                        intent = "NEXT_IMAGE" if curr_gesture == "SWIPE_RIGHT" else "PREV_IMAGE"
+                # 1. SWIPE (Debounced on frame time)
+                if event.type == SWIPE_START:
+                    if event.timestamp - last_swipe_time > 1.0: # 1 second debounce
+                        intent = "NEXT_IMAGE" if event.data["gesture"] == "SWIPE_RIGHT" else "PREV_IMAGE"
                         logger.info(f"Gesture Triggered: {intent}")
-                        self.vision_bridge.execute_action(intent)
-                        last_gesture_time = now
+                        actions.submit(intent)
+                        last_swipe_time = event.timestamp
                 
-                # 2. PINCH DETECTION (Continuous for zoom)
-                if abs(pinch_delta) > 10:
+                # 2. PINCH (Continuous for zoom)
+                elif event.type in (PINCH_BEGIN, PINCH_UPDATE):
+                    pinch_delta = event.data["delta"]
                     intent = "ZOOM_IN" if pinch_delta > 0 else "ZOOM_OUT"
                     # Zoom factor based on delta
                     factor = 1.0 + (abs(pinch_delta) / 100.0)
                     if intent == "ZOOM_OUT": factor = 1.0 / factor
                     
-                    self.vision_bridge.execute_action(intent, {"factor": factor})
+                    actions.submit(intent, {"factor": factor})
                 
-                last_gesture = curr_gesture
-                time.sleep(0.1)
+                # 3. Gesture end: apply the rest of the zoom now
+                elif event.type == PINCH_END:
+                    actions.flush()
             except Exception as e:
                 logger.error(f"Error in gesture monitor: {e}")
                 time.sleep(1)
@@ -144,69 +359,206 @@ class AssistantState:
         
         while self.voice_listening:
             try:
-                # 1. Capture Audio
-                audio_buffer = self.capture.listen_chunk()
-                if audio_buffer is None:
+                result = self.listen_once()
+                if result.get("reason") == "SILENCE":
                     time.sleep(0.1)
-                    continue
-                
-                # 2. Transcribe (Whisper)
-                transcript_data = self.asr.transcribe(audio_buffer)
-                text = transcript_data.get("text", "").strip()
-                
-                if len(text) < 2:
-                    continue
-                
-                logger.info(f"[VOICE] Detected: {text}")
-                
-                # 3. Intent Parsing
-                voice_intent = self.intent_parser.parse(text)
-                
-                # 4. Multimodal Fusion
-                vision_state = self.vision_manager.get_state()
-                fused_intent = self.fusion_engine.fuse(voice_intent, vision_state)
-                
-                intent = fused_intent["action"]
-                
-                # 5. Handle CHAT separately
-                if intent == "CHAT":
-                    response_text = "I'm here to assist with surgical commands."
-                    if "hello" in text.lower(): 
-                        response_text = "Hello! Ready for procedure."
-                    
-                    self.tts.speak(response_text)
-                    # Broadcast to frontend
-                    self._sync_broadcast({"type": "MESSAGE", "text": response_text, "source": "AI"})
-                    continue
-                
-                # 6. Check if rejected
-                if fused_intent["status"] == "REJECTED":
-                    self.tts.speak(fused_intent["reason"])
-                    self._sync_broadcast({"type": "MESSAGE", "text": fused_intent["reason"], "source": "SYSTEM"})
-                    continue
-                
-                # 7. Safety Validation
-                is_valid, msg = self.state_manager.validate_command(fused_intent)
-                if not is_valid:
-                    self.tts.speak(msg)
-                    self._sync_broadcast({"type": "MESSAGE", "text": msg, "source": "SYSTEM"})
-                    continue
-                
-                # 8. Execute Action
-                success, exec_msg = self.vision_bridge.execute_action(intent, fused_intent.get("parameters"))
-                
-                if success:
-                    logger.info(f"[VOICE] Executed: {intent}")
-                    self.tts.speak(f"Executing {intent.replace('_', ' ').lower()}.")
-                    # Broadcast action to frontend
-                    self._sync_broadcast({"type": "ACTION", "intent": intent, "parameters": fused_intent.get("parameters")})
-                else:
-                    self.tts.speak("Failed to execute.")
-                    logger.warning(f"[VOICE] Failed: {exec_msg}")
-                
             except Exception as e:
                 logger.error(f"Error in voice monitor: {e}")
                 time.sleep(1)
+
+    def _start_voice_pipeline(self) -> StagedPipeline:
+        """Continuous listening with capture, recognition, dispatch and speech overlapping (see voice_pipeline)."""
+        pipeline = StagedPipeline(self._capture_utterance, [
+            ("asr", self._transcribe),
+            ("interpret", self._interpret),
+            ("dispatch", self._dispatch),
+            ("speak", self._speak_and_finish),
+        ], queue_size=VOICE_QUEUE_SIZE, name="Voice")
+        pipeline.start()
+        logger.info("Voice pipeline started - listening continuously...")
+        return pipeline
+
+    def _capture_utterance(self) -> Optional["Utterance"]:
+        """Pipeline source: the next chunk with speech in it, or None after silence."""
+        with self._mic_lock:
+            timer = self.tracer.start()
+            audio_buffer = self.capture.listen_chunk(timer)
+            boost = self._take_gaze_boost()
+        if audio_buffer is None:
+            self.vision_manager.release_gaze(boost)
+            time.sleep(0.1)
+            return None
+        utterance = Utterance(audio_buffer, timer, next(self._utterance_seq))
+        utterance.gaze_boost = boost
+        return utterance
+
+    def listen_once(self, timer: Optional[StageTimer] = None, on_captured=None) -> Dict[str, Any]:
+        """
+        Capture one chunk and run it through handle_utterance().
+        :param on_captured: Called once the chunk has been recorded, before it is processed.
+        """
+        with self._mic_lock:
+            timer = timer or self.tracer.start()
+            audio_buffer = self.capture.listen_chunk(timer)
+            boost = self._take_gaze_boost()
+        if on_captured:
+            on_captured()
+        if audio_buffer is None:
+            self.vision_manager.release_gaze(boost)
+            return {"status": "ignored", "reason": "SILENCE", "timings": timer.durations_ms()}
+        return self.handle_utterance(audio_buffer, timer, gaze_boost=boost)
+
+    def _speech_started(self):
+        """Capture callback at voice onset: boost gaze for the chunk being recorded."""
+        self._capture_boost = self.vision_manager.boost_gaze()
+
+    def _take_gaze_boost(self):
+        """The boost taken during the capture that just ended (call under _mic_lock)."""
+        boost, self._capture_boost = self._capture_boost, None
+        return boost
+
+    def _release_gaze(self, u: "Utterance"):
+        """End this utterance's gaze boost; boosts of utterances captured since stay live."""
+        self.vision_manager.release_gaze(u.gaze_boost)
+        u.gaze_boost = None
+
+    def _broadcast_listen_job(self, job):
+        """Deliver a finished /voice/listen job to WebSocket clients."""
+        self._sync_broadcast({"type": "LISTEN_RESULT", **job.to_dict()})
+
+    def handle_utterance(self, audio_buffer, timer: Optional[StageTimer] = None, gaze_boost=None) -> Dict[str, Any]:
+        """
+        One listen-fuse-act cycle on captured audio: transcribe, parse, fuse with the current
+        vision state, validate, execute and broadcast. Runs the voice pipeline's stages inline
+        (for /voice/listen and benchmarks; the voice loop runs them on separate threads).
+        :param timer: StageTimer (or Trace) started at capture; a new trace starts here if omitted.
+        :param gaze_boost: Token of the gaze boost taken at this audio's voice onset, released after fusion.
+        :return: Outcome dict ("status", ...) with per-stage "timings" in milliseconds and the "trace_id".
+        """
+        utterance = Utterance(audio_buffer, timer or self.tracer.start(), next(self._utterance_seq))
+        utterance.gaze_boost = gaze_boost
+        for stage in (self._transcribe, self._interpret, self._dispatch, self._speak_and_finish):
+            stage(utterance)
+        return utterance.result
+
+    # --- Voice stages (each takes and returns an Utterance; later stages see result set early) ---
+
+    def _transcribe(self, u: "Utterance") -> "Utterance":
+        # 1. Transcribe (Whisper)
+        transcript_data = self.asr.transcribe(u.audio, u.timer)
+        u.audio = None
+        u.text = transcript_data.get("text", "").strip()
+        self.record_event(TRANSCRIPT, {"text": u.text})
+        
+        if len(u.text) < 2:
+            self._release_gaze(u)
+            u.result = {"status": "ignored", "reason": "TOO_SHORT", "text": u.text}
+            return u
+        if self.echo_guard.is_echo(u.text):
+            # The assistant's own confirmation came back through the microphone
+            self._release_gaze(u)
+            u.result = {"status": "ignored", "reason": "ECHO", "text": u.text}
+            return u
+        
+        logger.info(f"[VOICE {u.trace_id}] Detected: {u.text}")
+        return u
+
+    def _interpret(self, u: "Utterance") -> "Utterance":
+        if u.result is not None:
+            return u
+        timer = u.timer
+        
+        # 2. Intent Parsing
+        voice_intent = self.intent_parser.parse(u.text)
+        timer.mark("intent")
+        self.record_event(INTENT, voice_intent)
+        if voice_intent.get("intent") == "STOP":
+            # Cut speech now rather than when the STOP reaches the speak stage
+            self._silenced_before = u.seq
+            self.tts.stop()
+        u.tier = voice_intent.get("source", "NONE")
+        
+        # 3. Multimodal Fusion
+        vision_state = self.vision_manager.get_state()
+        u.fused = self.fusion_engine.fuse(voice_intent, vision_state)
+        timer.mark("fusion")
+        self._release_gaze(u)
+        self.record_event(FUSION, u.fused)
+        return u
+
+    def _dispatch(self, u: "Utterance") -> "Utterance":
+        # Validation runs here rather than in _interpret: it must see the effect of the previous command
+        if u.result is not None:
+            return u
+        timer, trace_id, text, tier = u.timer, u.trace_id, u.text, u.tier
+        fused_intent = u.fused
+        intent = fused_intent["action"]
+        
+        # 4. Handle STOP and CHAT separately
+        if intent == "STOP":
+            # Speech was already cut in _interpret
+            u.result = {"status": "success", "intent": "STOP", "heard_text": text, "tier": tier}
+            return u
+        if intent == "CHAT":
+            response_text = CHAT_DEFAULT
+            if "hello" in text.lower(): 
+                response_text = CHAT_GREETING
+            self._sync_broadcast({"type": "MESSAGE", "text": response_text, "source": "AI", "trace_id": trace_id})
+            timer.mark("broadcast")
+            u.speech, u.speech_priority = response_text, CHAT
+            u.result = {"status": "success", "intent": "CHAT", "response": response_text, "heard_text": text, "tier": tier}
+            return u
+        
+        # 5. Check if rejected
+        if fused_intent["status"] == "REJECTED":
+            self._sync_broadcast({"type": "MESSAGE", "text": fused_intent["reason"], "source": "SYSTEM",
+                                  "trace_id": trace_id})
+            timer.mark("broadcast")
+            u.speech, u.speech_priority = fused_intent["reason"], SAFETY
+            u.result = {"status": "blocked", "reason": fused_intent["reason"], "intent": intent, "tier": tier}
+            return u
+        
+        # 6. Safety Validation
+        is_valid, msg = self.state_manager.validate_command(fused_intent)
+        timer.mark("validation")
+        if not is_valid:
+            self._sync_broadcast({"type": "MESSAGE", "text": msg, "source": "SYSTEM", "trace_id": trace_id})
+            timer.mark("broadcast")
+            u.speech, u.speech_priority = msg, SAFETY
+            u.result = {"status": "blocked", "reason": msg, "intent": intent, "tier": tier}
+            return u
+        
+        # 7. Execute Action
+        success, exec_msg = self.vision_bridge.execute_action(intent, fused_intent.get("parameters"))
+        timer.mark("dispatch")
+        
+        if not success:
+            logger.warning(f"[VOICE {trace_id}] Failed: {exec_msg}")
+            u.speech = EXECUTION_FAILED
+            u.result = {"status": "failed", "reason": exec_msg, "intent": intent, "tier": tier}
+            return u
+        
+        # Broadcast before speaking: the confirmation must not hold back the display
+        logger.info(f"[VOICE {trace_id}] Executed: {intent}")
+        self._sync_broadcast({"type": "ACTION", "intent": intent, "parameters": fused_intent.get("parameters"),
+                              "trace_id": trace_id})
+        timer.mark("broadcast")
+        u.speech = confirmation_phrase(intent)
+        u.result = {"heard_text": text, "intent": intent, "status": "success", "fusion": fused_intent, "tier": tier}
+        return u
+
+    def _speak_and_finish(self, u: "Utterance") -> None:
+        # Queued, not awaited: playback runs on the TTS worker while the next command is processed
+        if u.speech and u.seq >= self._silenced_before:
+            self.tts.speak(u.speech, priority=u.speech_priority)
+            u.timer.mark("tts")
+        result = u.result
+        result["timings"] = u.timer.durations_ms()
+        result["trace_id"] = u.trace_id
+        for stage, seconds in u.timer.durations.items():
+            metrics.VOICE_STAGE_SECONDS.labels(stage).observe(seconds)
+        self.tracer.finish(u.timer, result)
+        return None
     
     def _sync_broadcast(self, payload: dict):
         """Thread-safe broadcast helper for background threads."""
@@ -215,7 +567,8 @@ class AssistantState:
             return
         
         try:
-            asyncio.run_coroutine_threadsafe(broadcast_to_ws(payload), self.main_loop)
+            # The hub only queues (no awaiting), so this costs the loop one callback
+            self.main_loop.call_soon_threadsafe(self.ws_hub.broadcast, payload)
             logger.debug(f"Broadcast scheduled: {payload.get('type')}")
         except Exception as e:
             logger.error(f"Broadcast failed: {e}")
@@ -235,6 +588,12 @@ async def startup_event():
 
 @app.on_event("shutdown")
 def shutdown_event():
+    if assistant:
+        assistant.listen_jobs.shutdown()
+        if assistant.voice_pipeline:
+            assistant.voice_pipeline.stop(timeout=0.5)
+    if assistant and assistant.recorder:
+        assistant.stop_recording()
     if assistant and assistant.vision_running:
         assistant.vision_manager.stop()
 
@@ -243,31 +602,54 @@ def shutdown_event():
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    if assistant:
-        assistant.active_connections.append(websocket)
+    if not assistant:
+        await websocket.close(code=1013)
+        return
+    client = assistant.ws_hub.add(websocket)
     try:
         while True:
             # Keep alive and listen for any client messages if needed
             data = await websocket.receive_text()
             logger.info(f"WebSocket received: {data}")
+            try:
+                message = json.loads(data)
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get("type") == "IMAGE_ACTIVE" and message.get("image"):
+                # Image switched in the viewer: resolve deictic commands against it and restore its highlights
+                image = str(message["image"])
+                highlights = assistant.annotations.set_active_image(image)
+                # Replies go through the client's queue too, so they never interleave with a broadcast send
+                client.send({"type": "HIGHLIGHTS", "image": image, "highlights": [h.to_dict() for h in highlights]})
+            elif isinstance(message, dict) and message.get("type") == "VIEW_STATE":
+                # Viewer zoomed/panned: where the image now sits on screen
+                try:
+                    assistant.image_view.update(message["rect"], message.get("image"))
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"Invalid view state: {data}")
+            elif isinstance(message, dict) and message.get("type") == "VISION_SUBSCRIBE":
+                # Push vision state to this client (full snapshot, then deltas) instead of it polling /vision/state
+                if not assistant.vision_running:
+                    logger.warning("Vision subscription ignored: vision manager not running")
+                    continue
+                try:
+                    hz = float(message.get("hz", 10))
+                    thresholds = {str(k): float(v) for k, v in (message.get("thresholds") or {}).items()}
+                except (TypeError, ValueError, AttributeError):
+                    logger.warning(f"Invalid vision subscription: {data}")
+                    continue
+                assistant.vision_stream.subscribe(client, hz, thresholds)
     except WebSocketDisconnect:
-        if assistant:
-            assistant.active_connections.remove(websocket)
         logger.info("WebSocket client disconnected")
+    finally:
+        assistant.vision_stream.unsubscribe(client)
+        assistant.ws_hub.remove(websocket)
 
 # We need to override the broadcast_action to be async-aware
 async def broadcast_to_ws(payload: dict):
+    """Queue a payload for every client (returns at once; each client's sender task delivers it)."""
     if not assistant: return
-    message = json.dumps(payload)
-    disconnected = []
-    for conn in assistant.active_connections:
-        try:
-            await conn.send_text(message)
-        except Exception:
-            disconnected.append(conn)
-    
-    for conn in disconnected:
-        assistant.active_connections.remove(conn)
+    assistant.ws_hub.broadcast(payload)
 
 # Hack to bridge the threaded bridge to async WebSocket
 def threaded_broadcast(intent, parameters):
@@ -285,6 +667,22 @@ def threaded_broadcast(intent, parameters):
 class IntentRequest(BaseModel):
     text: str
 
+class VisionSourceRequest(BaseModel):
+    source: str  # camera:0, video:<path>, images:<dir>, synthetic:640x480@30
+    realtime: bool = True
+    loop: bool = False
+
+class AnnotationsRequest(BaseModel):
+    annotations: List[Dict[str, Any]]  # [{"label", "bbox": [x0, y0, x1, y1], "kind"?, "id"?}], normalized
+
+class CalibrationStartRequest(BaseModel):
+    user: str
+
+class CalibrationSampleRequest(BaseModel):
+    x: float  # Target position in the viewport, normalized to [0, 1]
+    y: float
+    frames: int = 15
+
 # --- Endpoints ---
 
 @app.get("/health")
@@ -297,9 +695,16 @@ def get_health():
         "asr": "loaded" if assistant.asr_loaded else "failed",
         "llm": "loaded" if assistant.llm_loaded else "failed",
         "tts": "loaded" if assistant.tts_loaded else "failed",
-        "clients": len(assistant.active_connections)
+        "clients": len(assistant.ws_hub),
+        "tts_cache": assistant.tts.cache.stats() if hasattr(assistant.tts, "cache") else None,
+        "echo": assistant.echo_guard.stats()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of all engine instruments."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/vision/state")
 def get_vision_state():
     """Returns the current raw sensor state (gaze, hands, etc)"""
@@ -307,73 +712,233 @@ def get_vision_state():
         raise HTTPException(status_code=503, detail="Vision manager not running")
     return assistant.vision_manager.get_state()
 
+@app.get("/vision/source")
+def get_vision_source():
+    if not assistant or not assistant.vision_running:
+        raise HTTPException(status_code=503, detail="Vision manager not running")
+    return {"source": assistant.vision_source, "running": assistant.vision_manager.running}
+
+@app.post("/vision/source")
+def set_vision_source(request: VisionSourceRequest):
+    """Switch the vision input, e.g. to a recorded video for demos or measurements."""
+    if not assistant or not assistant.vision_running:
+        raise HTTPException(status_code=503, detail="Vision manager not running")
+    try:
+        # Only validates the spec: the manager builds the source itself when its loop restarts
+        create_source(request.source, realtime=request.realtime, loop=request.loop)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    assistant.vision_manager.set_source(request.source, realtime=request.realtime, loop=request.loop)
+    assistant.vision_source = request.source
+    return {"status": "ok", "source": request.source}
+
+@app.get("/debug/traces")
+def get_traces(limit: int = 50):
+    """Most recent utterance traces (newest first) and per-stage duration histograms."""
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    tracer = assistant.tracer
+    return {"enabled": tracer.enabled, "traces": tracer.recent(limit), "stages": tracer.stage_stats()}
+
+@app.get("/debug/traces/{trace_id}")
+def get_trace(trace_id: str):
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    trace = assistant.tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (expired or unknown)")
+    return trace
+
+def _check_profiling(seconds: float):
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set ZT_PROFILING=1)")
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILE_MAX_SECONDS:g}]")
+
+@app.post("/debug/profile")
+async def profile(seconds: float = 10.0, interval_ms: float = 10.0, format: str = "speedscope"):
+    """
+    Sample every thread's stack for `seconds` and return a speedscope JSON file
+    or collapsed stacks (format=collapsed, for flamegraph.pl).
+    """
+    _check_profiling(seconds)
+    if format not in ("speedscope", "collapsed"):
+        raise HTTPException(status_code=400, detail="format must be speedscope or collapsed")
+    profiler = SamplingProfiler(interval=max(interval_ms, 1.0) / 1000.0)
+    try:
+        # The sampler runs in a worker thread so the event loop keeps serving (and shows up in the profile)
+        result = await asyncio.get_running_loop().run_in_executor(None, profiler.run, seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"Profile finished: {result.summary()}")
+    if format == "collapsed":
+        return PlainTextResponse(result.to_collapsed())
+    return result.to_speedscope()
+
+@app.post("/debug/memory")
+async def memory_profile(seconds: float = 10.0, top: int = 30):
+    """Allocation growth by source line over `seconds` (tracemalloc snapshot diff)."""
+    _check_profiling(seconds)
+    return await asyncio.get_running_loop().run_in_executor(None, memory_diff, seconds, top)
+
+@app.get("/recording")
+def get_recording():
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    recorder = assistant.recorder
+    if recorder is None:
+        return {"recording": False}
+    return {"recording": True, "path": recorder.path, "bytes": recorder.bytes_written, "dropped": recorder.dropped}
+
+@app.post("/recording/start")
+def start_recording():
+    if not assistant or not assistant.vision_running:
+        raise HTTPException(status_code=503, detail="Vision manager not running")
+    return {"status": "recording", "path": assistant.start_recording(RECORD_DIR or "recordings")}
+
+@app.post("/recording/stop")
+def stop_recording():
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    return {"status": "stopped", "path": assistant.stop_recording()}
+
+@app.get("/gaze/profiles")
+def get_gaze_profiles():
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    return {"profiles": assistant.gaze_profiles.profiles(), "active": assistant.gaze_profile}
+
+@app.post("/gaze/profiles/{user}/activate")
+def activate_gaze_profile(user: str):
+    if not assistant or not assistant.vision_running:
+        raise HTTPException(status_code=503, detail="Vision manager not running")
+    try:
+        found = assistant.activate_gaze_profile(user)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=404, detail=f"No gaze calibration for {user}")
+    return {"status": "ok", "active": user}
+
+@app.post("/gaze/calibration/start")
+def start_gaze_calibration(request: CalibrationStartRequest):
+    """Begin collecting calibration samples; the frontend then shows targets and posts /gaze/calibration/sample."""
+    if not assistant or not assistant.vision_running:
+        raise HTTPException(status_code=503, detail="Vision manager not running")
+    assistant.calibration_session = CalibrationSession()
+    assistant.calibration_user = request.user
+    return {"status": "collecting", "user": request.user}
+
+@app.post("/gaze/calibration/sample")
+def add_gaze_calibration_sample(request: CalibrationSampleRequest):
+    """Record the raw gaze signals over the next frames while the user fixates (x, y)."""
+    session = assistant.calibration_session if assistant else None
+    if session is None:
+        raise HTTPException(status_code=409, detail="No calibration in progress")
+
+    vm = assistant.vision_manager
+    boost = vm.boost_gaze(5.0)
+    collected = 0
+    seq = vm.get_snapshot().seq
+    deadline = time.time() + 5.0
+    while collected < request.frames and time.time() < deadline:
+        snapshot = vm.wait_for_snapshot(seq, timeout=0.5)
+        if snapshot is None:
+            continue
+        seq = snapshot.seq
+        if snapshot.user_present:
+            session.add((request.x, request.y), gaze_inputs(snapshot.iris[0], snapshot.iris[1], snapshot.yaw, snapshot.pitch))
+            collected += 1
+    vm.release_gaze(boost)
+    return {"status": "ok", "collected": collected, "samples": session.samples, "targets": session.targets}
+
+@app.post("/gaze/calibration/finish")
+def finish_gaze_calibration():
+    """Fit the calibration, store it in the user's profile and apply it."""
+    session = assistant.calibration_session if assistant else None
+    if session is None:
+        raise HTTPException(status_code=409, detail="No calibration in progress")
+    try:
+        calibration = session.fit()
+        assistant.gaze_profiles.save(assistant.calibration_user, calibration)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    assistant.vision_manager.set_gaze_calibration(calibration)
+    assistant.gaze_profile = assistant.calibration_user
+    assistant.calibration_session = None
+    return {"status": "ok", "user": assistant.gaze_profile, "rms_error": calibration.rms_error,
+            "samples": calibration.samples}
+
+@app.get("/annotations/{image}")
+def list_annotations(image: str, kind: Optional[str] = None):
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    return {"image": image, "annotations": [a.to_dict() for a in assistant.annotations.list(image, kind)]}
+
+@app.post("/annotations/{image}")
+def add_annotations(image: str, request: AnnotationsRequest):
+    """Bulk import annotated structures (e.g. a study's segmentation export)."""
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    try:
+        added = assistant.annotations.add_many(image, request.annotations)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid annotation: {e}")
+    return {"status": "ok", "added": len(added)}
+
+@app.delete("/annotations/{image}/{annotation_id}")
+def delete_annotation(image: str, annotation_id: str):
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    if not assistant.annotations.remove(image, annotation_id):
+        raise HTTPException(status_code=404, detail="Annotation not found")
+    return {"status": "ok"}
+
+@app.get("/annotations/{image}/nearest")
+def nearest_annotation(image: str, x: float, y: float, max_dist: float = 0.1):
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    found = assistant.annotations.nearest(x, y, image=image, max_dist=max_dist, kind=None)
+    if not found:
+        return {"annotation": None}
+    return {"annotation": found[0].to_dict(), "distance": found[1]}
+
 @app.post("/voice/listen")
-async def voice_listen():
-    """Trigger one listen–fuse–act cycle"""
+async def voice_listen(wait: bool = False, timeout: float = 30.0):
+    """
+    Queue one listen–fuse–act cycle and return its job at once (requests made while a capture is
+    pending share it). The result arrives as a LISTEN_RESULT WebSocket message, from
+    GET /voice/jobs/{job_id}, or in this response with ?wait=true (until `timeout` seconds).
+    """
     if not assistant:
         return {"status": "error", "reason": "Assistant not initialized"}
         
-    logger.info("API Trigger: Start Listening cycle...")
-    
-    # 1. Capture Audio
-    audio_buffer = assistant.capture.listen_chunk()
-    if audio_buffer is None:
-        return {"status": "ignored", "reason": "SILENCE"}
-        
-    # 2. Transcribe (Whisper)
-    transcript_data = assistant.asr.transcribe(audio_buffer)
-    text = transcript_data.get("text", "").strip()
-    
-    if len(text) < 2:
-        return {"status": "ignored", "reason": "TOO_SHORT", "text": text}
-        
-    logger.info(f"Detected Speech: {text}")
-    
-    # 3. Intent Parsing
-    voice_intent = assistant.intent_parser.parse(text)
-    
-    # 4. Multimodal Fusion Logic
-    vision_state = assistant.vision_manager.get_state()
-    fused_intent = assistant.fusion_engine.fuse(voice_intent, vision_state)
-    
-    intent = fused_intent["action"]
-    
-    if intent == "CHAT":
-        response_text = "I'm here to assist with surgical commands."
-        if "hello" in text.lower(): response_text = "Hello! Ready for procedure."
-        assistant.tts.speak(response_text)
-        # Broadcast the chat response to frontend
-        await broadcast_to_ws({"type": "MESSAGE", "text": response_text, "source": "AI"})
-        return {"status": "success", "intent": "CHAT", "response": response_text}
-        
-    if fused_intent["status"] == "REJECTED":
-        assistant.tts.speak(fused_intent["reason"])
-        return {"status": "blocked", "reason": fused_intent["reason"], "intent": intent}
-
-    # 5. Safety Validation
-    is_valid, msg = assistant.state_manager.validate_command(fused_intent)
-    if not is_valid:
-        assistant.tts.speak(msg)
-        return {"status": "blocked", "reason": msg, "intent": intent}
-        
-    # 6. Execution via VisionBridge
-    # This will trigger threaded_broadcast via the listener we registered
-    success, exec_msg = assistant.vision_bridge.execute_action(intent, fused_intent.get("parameters"))
-    
-    if success:
-        logger.info(f"FUSED EXECUTION: {intent}")
-        assistant.tts.speak(f"Executing {intent.replace('_', ' ').lower()}.")
-        # Explicitly broadcast for voice too
-        await broadcast_to_ws({"type": "ACTION", "intent": intent, "parameters": fused_intent.get("parameters")})
-        return {
-            "heard_text": text,
-            "intent": intent,
-            "status": "success",
-            "fusion": fused_intent
-        }
-    else:
-        assistant.tts.speak("Failed to execute.")
-        return {"status": "failed", "reason": exec_msg}
+    job = assistant.listen_jobs.submit()
+    logger.info(f"API Trigger: listen job {job.job_id} ({job.requests} request(s))")
+    if wait:
+        await assistant.listen_jobs.wait_async(job, min(max(timeout, 0.0), LISTEN_MAX_WAIT))
+    return job.to_dict()
+
+@app.get("/voice/pipeline")
+def voice_pipeline_stats():
+    """Queue depths and per-stage throughput/utilization of the continuous voice pipeline."""
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    if not assistant.voice_pipeline:
+        return {"running": False, "stages": []}
+    return assistant.voice_pipeline.stats()
+
+@app.get("/voice/jobs/{job_id}")
+async def voice_job(job_id: str, wait: float = 0.0):
+    """A listen job's status and result; wait > 0 long-polls until it finishes or `wait` seconds pass."""
+    if not assistant:
+        raise HTTPException(status_code=503, detail="Assistant not initialized")
+    job = assistant.listen_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (expired or unknown)")
+    if wait > 0 and not job.finished:
+        await assistant.listen_jobs.wait_async(job, min(wait, LISTEN_MAX_WAIT))
+    return job.to_dict()
 
 @app.post("/intent/parse")
 async def intent_parse(request: IntentRequest):
@@ -383,11 +948,13 @@ async def intent_parse(request: IntentRequest):
     voice_intent = assistant.intent_parser.parse(request.text)
     vision_state = assistant.vision_manager.get_state()
     fused = assistant.fusion_engine.fuse(voice_intent, vision_state)
+    assistant.record_event(TRANSCRIPT, {"text": request.text, "source": "api"})
+    assistant.record_event(INTENT, voice_intent)
+    assistant.record_event(FUSION, fused)
     
     # Execute for testing
     if fused["status"] == "APPROVED":
-        # Note: AssistantState doesn't store bridge directly, it uses get_bridge()
-        success, exec_msg = assistant.vision_bridge.execute_action(fused["action"], fused.get("parameters"))
+        success, exec_msg = await assistant.vision_bridge.execute_action_async(fused["action"], fused.get("parameters"))
         # Also broadcast via the async bridge
         await broadcast_to_ws({"type": "ACTION", "intent": fused["action"], "parameters": fused.get("parameters")})
     
@@ -1,4 +1,6 @@
 
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 import sys
@@ -16,6 +18,19 @@ sys.modules["torch"] = MagicMock()
 from audio_engine.asr_engine import ASREngine
 from audio_engine.intent_engine import IntentEngine
 from audio_engine.state_manager import StateManager
+from audio_engine.stage_timer import StageTimer
+from audio_engine.tracing import Trace, Tracer
+from audio_engine.metrics import Counter, Gauge, Histogram, Registry
+from audio_engine.profiler import SamplingProfiler, memory_diff
+from audio_engine.ws_hub import COALESCE_LATEST, BroadcastHub
+from audio_engine.listen_jobs import DONE, FAILED, ListenJobQueue
+from audio_engine.voice_pipeline import StagedPipeline
+from audio_engine import tts_engine
+from audio_engine.tts_engine import CONFIRMATION, SAFETY, TTSEngine
+from audio_engine.phrase_cache import PhraseCache
+from audio_engine.audio_capture import AudioCapture
+from audio_engine.echo_guard import EchoGuard
+from audio_engine.vision_bridge import VisionBridge
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +55,15 @@ class TestAudioPipeline(unittest.TestCase):
         self.assertIn("text", result)
         print("ASR Check Passed.")
 
+    def test_asr_stage_timing(self):
+        """Commands go through model.transcribe(), timed as one 'asr' stage."""
+        self.asr.model.transcribe.return_value = {"text": " zoom in here ", "segments": [{"avg_logprob": -0.1}]}
+        timer = StageTimer()
+        result = self.asr.transcribe(np.zeros(48000, dtype=np.float32), timer)
+        self.assertEqual(result["text"], "zoom in here")
+        self.assertAlmostEqual(result["confidence"], np.exp(-0.1))
+        self.assertEqual(list(timer.durations), ["asr"])
+
     def test_intent_parsing_rules(self):
         """Test rule-based intent parsing."""
         print("\n--- Testing Intent Rules ---")
@@ -71,5 +95,521 @@ class TestAudioPipeline(unittest.TestCase):
         self.assertTrue(valid)
         print("Allowed as expected after state update.")
 
+class TestTracing(unittest.TestCase):
+
+    def test_trace_spans_and_ring(self):
+        """Finished traces keep contiguous stage spans; the ring holds only the newest."""
+        tracer = Tracer(capacity=2)
+        ids = []
+        for i in range(3):
+            trace = tracer.start()
+            for stage in ("capture", "vad", "intent"):
+                trace.mark(stage)
+            tracer.finish(trace, {"status": "success", "intent": "ZOOM_IN", "timings": {}})
+            ids.append(trace.trace_id)
+
+        self.assertEqual(len(set(ids)), 3)
+        recent = tracer.recent()
+        self.assertEqual([t["trace_id"] for t in recent], [ids[2], ids[1]])
+        self.assertIsNone(tracer.get(ids[0]))
+        spans = recent[0]["spans"]
+        self.assertEqual([s["stage"] for s in spans], ["capture", "vad", "intent"])
+        for prev, nxt in zip(spans, spans[1:]):
+            self.assertEqual(prev["end_ms"], nxt["start_ms"])
+        self.assertEqual(recent[0]["attributes"], {"status": "success", "intent": "ZOOM_IN"})
+        # Histograms count every finished trace, including ones that left the ring
+        self.assertEqual(tracer.stage_stats()["intent"]["count"], 3)
+        self.assertEqual(tracer.stage_stats()["total"]["count"], 3)
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        timer = tracer.start()
+        self.assertNotIsInstance(timer, Trace)
+        timer.mark("capture")
+        tracer.finish(timer, {"status": "success"})
+        self.assertEqual(tracer.recent(), [])
+        self.assertEqual(tracer.stage_stats(), {})
+
+class TestMetrics(unittest.TestCase):
+
+    def test_concurrent_updates_are_not_lost(self):
+        """Per-thread shards: no increments are lost without a lock on the hot path."""
+        import threading
+        registry = Registry()
+        counter = Counter("t_events_total", "events", registry=registry)
+        histogram = Histogram("t_seconds", "durations", buckets=(0.1, 1.0), registry=registry)
+
+        def work():
+            for i in range(10000):
+                counter.inc()
+                histogram.observe(0.05 if i % 2 else 0.5)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(counter.value(), 40000)
+        cumulative, count, total = histogram.snapshot()
+        self.assertEqual(cumulative, [20000, 40000, 40000])
+        self.assertEqual(count, 40000)
+        self.assertAlmostEqual(total, 20000 * 0.55)
+
+    def test_prometheus_text_format(self):
+        registry = Registry()
+        actions = Counter("t_actions_total", "Dispatches", ["intent", "result"], registry=registry)
+        depth = Gauge("t_depth", "Queue depth", registry=registry)
+        latency = Histogram("t_latency_seconds", "Latency", buckets=(0.01, 0.1), registry=registry)
+        actions.labels("ZOOM_IN", "ok").inc(2)
+        depth.set_function(lambda: 3)
+        latency.observe(0.05)
+        text = registry.render()
+        self.assertIn("# TYPE t_actions_total counter", text)
+        self.assertIn('t_actions_total{intent="ZOOM_IN",result="ok"} 2', text)
+        self.assertIn("t_depth 3", text)
+        self.assertIn('t_latency_seconds_bucket{le="0.01"} 0', text)
+        self.assertIn('t_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('t_latency_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("t_latency_seconds_count 1", text)
+        with self.assertRaises(ValueError):
+            actions.labels("ZOOM_IN")
+
+def _busy_marker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_samples_other_threads(self):
+        import threading
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_marker, args=(stop,), name="BusyWorker", daemon=True)
+        worker.start()
+        try:
+            profile = SamplingProfiler(interval=0.005).run(0.3)
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertGreater(profile.samples_taken, 10)
+        self.assertIn("BusyWorker", profile.stacks)
+        collapsed = profile.to_collapsed()
+        self.assertTrue(any(line.startswith("BusyWorker;") and "_busy_marker" in line
+                            for line in collapsed.splitlines()))
+        speedscope = profile.to_speedscope()
+        frames = speedscope["shared"]["frames"]
+        busy = next(p for p in speedscope["profiles"] if p["name"] == "BusyWorker")
+        self.assertEqual(len(busy["samples"]), len(busy["weights"]))
+        self.assertIn("_busy_marker", {frames[i]["name"] for sample in busy["samples"] for i in sample})
+
+    def test_memory_diff_finds_growth(self):
+        import threading
+        hoard = []
+        grow = threading.Timer(0.05, lambda: hoard.extend(bytearray(1024) for _ in range(2000)))
+        grow.start()
+        report = memory_diff(0.3, top=5)
+        grow.join()
+        self.assertGreater(report["top"][0]["size_diff"], 1024 * 1000)
+
+class _FakeSocket:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.received = []
+        self.close_code = None
+
+    async def send_text(self, message):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.received.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class TestBroadcastHub(unittest.TestCase):
+
+    def test_reliable_in_order_and_state_coalesced(self):
+        import asyncio, json
+
+        async def scenario():
+            hub = BroadcastHub(policies={"STATE": COALESCE_LATEST})
+            gate = asyncio.Event()
+            socket = _FakeSocket(gate)
+            hub.add(socket)
+            for i in range(5):
+                hub.broadcast({"type": "ACTION", "seq": i})
+                hub.broadcast({"type": "STATE", "seq": i})
+            gate.set()
+            await asyncio.sleep(0.05)
+            return [json.loads(m) for m in socket.received]
+
+        messages = asyncio.run(scenario())
+        actions = [m["seq"] for m in messages if m["type"] == "ACTION"]
+        states = [m["seq"] for m in messages if m["type"] == "STATE"]
+        self.assertEqual(actions, [0, 1, 2, 3, 4])
+        # The first ACTION's send was blocked; only the newest state waited behind it
+        self.assertEqual(states, [4])
+
+    def test_slow_clients_are_evicted(self):
+        import asyncio
+
+        async def scenario():
+            hub = BroadcastHub(queue_size=3, send_timeout=0.05)
+            healthy, stuck = _FakeSocket(), _FakeSocket(asyncio.Event())
+            hub.add(healthy)
+            hub.add(stuck)
+            hub.broadcast({"type": "ACTION"})
+            # stuck's send of the ACTION never completes: evicted by the watchdog
+            await asyncio.sleep(0.2)
+            after_timeout = (len(hub), stuck.close_code)
+
+            backlogged = _FakeSocket(asyncio.Event())
+            hub.add(backlogged)
+            # One in flight, then a fourth queued message overflows queue_size=3
+            for _ in range(5):
+                hub.broadcast({"type": "MESSAGE"})
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+            return after_timeout, hub, healthy, backlogged
+
+        after_timeout, hub, healthy, backlogged = asyncio.run(scenario())
+        self.assertEqual(after_timeout, (1, 1013))
+        self.assertEqual(backlogged.close_code, 1013)
+        self.assertEqual([c.websocket for c in hub.clients], [healthy])
+        self.assertEqual(len(healthy.received), 6)
+
+class TestListenJobs(unittest.TestCase):
+
+    def test_concurrent_requests_share_one_capture(self):
+        import threading
+        mic_open = threading.Event()
+        captures = []
+
+        def listen(on_captured):
+            mic_open.wait(2.0)
+            captures.append(len(captures) + 1)
+            on_captured()
+            return {"status": "success", "capture": captures[-1]}
+
+        done = []
+        jobs = ListenJobQueue(listen, workers=2, on_done=done.append)
+        first = [jobs.submit() for _ in range(3)]
+        self.assertTrue(all(job is first[0] for job in first))
+        self.assertEqual(first[0].requests, 3)
+        self.assertFalse(first[0].wait(0.05))
+
+        mic_open.set()
+        self.assertTrue(first[0].wait(2.0))
+        self.assertEqual(first[0].state, DONE)
+        self.assertEqual(first[0].to_dict()["result"], {"status": "success", "capture": 1})
+        self.assertEqual(done, [first[0]])
+
+        # Captured and finished: the next request records again
+        second = jobs.submit()
+        self.assertIsNot(second, first[0])
+        self.assertTrue(second.wait(2.0))
+        self.assertEqual(second.result["capture"], 2)
+        self.assertIs(jobs.get(first[0].job_id), first[0])
+        jobs.shutdown()
+
+    def test_failed_job_reports_error(self):
+        def listen(on_captured):
+            raise RuntimeError("device busy")
+
+        jobs = ListenJobQueue(listen, workers=1)
+        job = jobs.submit()
+        self.assertTrue(job.wait(2.0))
+        self.assertEqual(job.state, FAILED)
+        self.assertEqual(job.to_dict()["error"], "device busy")
+        # A failed capture does not leave later requests attached to it
+        self.assertIsNot(jobs.submit(), job)
+        jobs.shutdown()
+
+class TestStagedPipeline(unittest.TestCase):
+
+    def test_stages_overlap_and_keep_order(self):
+        import threading, time
+        items = iter(range(6))
+        finished = []
+        done = threading.Event()
+
+        def capture():
+            time.sleep(0.05)
+            return next(items, None)
+
+        def recognize(i):
+            # Uneven stage times must not reorder anything
+            time.sleep(0.08 if i % 2 == 0 else 0.01)
+            return None if i == 3 else i
+
+        def speak(i):
+            finished.append(i)
+            if i == 5:
+                done.set()
+
+        pipeline = StagedPipeline(capture, [("asr", recognize), ("speak", speak)], queue_size=2, name="TestVoice")
+        started = time.perf_counter()
+        pipeline.start()
+        self.assertTrue(done.wait(2.0))
+        elapsed = time.perf_counter() - started
+        pipeline.running = False
+
+        self.assertEqual(finished, [0, 1, 2, 4, 5])
+        # Sequential would take 6 * 50 ms capture + 270 ms recognition
+        self.assertLess(elapsed, 0.5)
+        stats = {s["stage"]: s for s in pipeline.stats()["stages"]}
+        self.assertEqual(stats["asr"]["processed"], 6)
+        self.assertEqual(stats["speak"]["processed"], 5)
+
+    def test_queue_wait_is_not_counted_as_stage_work(self):
+        import threading
+        items = iter(range(2))
+        done = threading.Event()
+        timers = []
+
+        class Item:
+            def __init__(self):
+                self.timer = StageTimer()
+                timers.append(self.timer)
+
+        def capture():
+            if next(items, None) is None:
+                time.sleep(0.05)
+                return None
+            return Item()
+
+        def slow(item):
+            time.sleep(0.1)
+            item.timer.mark("asr")
+            return item
+
+        def speak(item):
+            item.timer.mark("tts")
+            if item.timer is timers[-1] and len(timers) == 2:
+                done.set()
+
+        pipeline = StagedPipeline(capture, [("asr", slow), ("speak", speak)], queue_size=2, name="TestQueue")
+        pipeline.start()
+        self.assertTrue(done.wait(2.0))
+        pipeline.running = False
+        second = timers[1].durations
+        # The second item waited ~100 ms behind the first: that is queue time, not ASR work
+        self.assertGreater(second["queue_asr"], 0.05)
+        self.assertLess(second["asr"], 0.15)
+        self.assertIn("queue_speak", second)
+
+class TestTTSQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tts = TTSEngine(use_coqui=False)
+        # 0.3 s of audio per phrase, written to a fake output stream that blocks like a real one
+        self.tts.engine = MagicMock()
+        self.tts.engine.tts.side_effect = lambda text: [0.5] * int(0.3 * self.tts.sample_rate)
+        tts_engine.sd.reset_mock()
+        self.stream = tts_engine.sd.OutputStream.return_value
+        self.stream.write.side_effect = lambda block: time.sleep(len(block) / self.tts.sample_rate)
+
+    def tearDown(self):
+        self.tts.close()
+
+    def test_supersede_and_preempt(self):
+        playing = self.tts.speak("Executing zoom in.")
+        time.sleep(0.05)
+        stale = self.tts.speak("Executing scroll left.")
+        latest = self.tts.speak("Executing next image.")
+        self.assertTrue(stale.wait(0.1))
+        self.assertEqual(stale.status, "superseded")
+
+        warning = self.tts.speak("No image loaded.", priority=SAFETY)
+        self.assertTrue(playing.wait(0.1))
+        self.assertEqual(playing.status, "preempted")
+        self.assertTrue(warning.wait(1.0))
+        self.assertTrue(latest.wait(1.0))
+        self.assertEqual((warning.status, latest.status), ("done", "done"))
+        spoken = [c.kwargs["text"] for c in self.tts.engine.tts.call_args_list]
+        self.assertEqual(spoken, ["Executing zoom in.", "No image loaded.", "Executing next image."])
+
+    def test_stop_cuts_playback(self):
+        handle = self.tts.speak("Executing zoom in.", priority=CONFIRMATION)
+        queued = self.tts.speak("Hello! Ready for procedure.", priority=tts_engine.CHAT)
+        time.sleep(0.05)
+        started = time.perf_counter()
+        self.tts.stop()
+        self.assertTrue(handle.wait(0.1))
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertEqual((handle.status, queued.status), ("cancelled", "cancelled"))
+        # Cut with a short fade-out rather than mid-sample
+        fade = self.stream.write.call_args.args[0]
+        self.assertEqual(len(fade), int(self.tts.CROSSFADE * self.tts.sample_rate))
+        self.assertAlmostEqual(float(fade[-1]), 0.0)
+
+    def test_split_sentences(self):
+        self.assertEqual(tts_engine.split_sentences("Executing zoom in."), ["Executing zoom in."])
+        self.assertEqual(tts_engine.split_sentences("Rejected. Gaze is not on the screen; look at the monitor."),
+                         ["Rejected. Gaze is not on the screen;", "look at the monitor."])
+        long = "The image cannot be highlighted, because no region was selected, " * 2 + "try again."
+        self.assertTrue(all(len(c) <= tts_engine.MAX_CHUNK_CHARS for c in tts_engine.split_sentences(long)))
+
+    def test_streams_first_chunk_before_synthesizing_the_rest(self):
+        def synthesize(text):
+            time.sleep(0.1)
+            return [0.5] * int(0.3 * self.tts.sample_rate)
+        self.tts.engine.tts.side_effect = synthesize
+        handle = self.tts.speak("The zoom level is already at maximum. Zoom out first. Then try again.",
+                                priority=tts_engine.CHAT)
+        self.assertTrue(handle.wait(2.0))
+        self.assertEqual(self.tts.engine.tts.call_count, 3)
+        # Playback starts after one chunk; later chunks are synthesized while it plays
+        self.assertLess(handle.first_audio, 0.2)
+        self.assertGreater(handle.synthesis, 0.25)
+        written = sum(len(c.args[0]) for c in self.stream.write.call_args_list)
+        overlap = int(self.tts.CROSSFADE * self.tts.sample_rate)
+        self.assertEqual(written, 3 * int(0.3 * self.tts.sample_rate) - 2 * overlap)
+
+class TestPhraseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.synthesize = MagicMock(side_effect=lambda text: np.full(len(text), 0.5, dtype=np.float32))
+
+    def test_hits_and_lru_eviction(self):
+        cache = PhraseCache(self.synthesize, model="glow-tts", capacity=2)
+        first = cache.synthesize("Executing zoom in.")
+        self.assertIs(cache.synthesize("Executing zoom in."), first)
+        cache.synthesize("No image loaded.")
+        cache.synthesize("Executing zoom out.")
+        self.assertNotIn("Executing zoom in.", cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses, self.synthesize.call_count), (1, 3, 3))
+
+    def test_disk_round_trip_and_warm(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            cache = PhraseCache(self.synthesize, model="glow-tts", directory=directory)
+            cache.warm(["Executing zoom in.", "No image loaded.", "Executing zoom in."]).join(5)
+            self.assertEqual(self.synthesize.call_count, 2)
+            # A fresh process reads the files instead of synthesizing; another model does not
+            restarted = PhraseCache(self.synthesize, model="glow-tts", directory=directory)
+            wav = restarted.synthesize("No image loaded.")
+            np.testing.assert_array_equal(wav, np.full(16, 0.5, dtype=np.float32))
+            self.assertEqual((restarted.hits, self.synthesize.call_count), (1, 2))
+            PhraseCache(self.synthesize, model="vits", directory=directory).synthesize("No image loaded.")
+            self.assertEqual(self.synthesize.call_count, 3)
+
+
+class TestEchoGuard(unittest.TestCase):
+
+    def _capture(self, guard, samples):
+        """AudioCapture reading `samples` from a fake input stream."""
+        stream = MagicMock()
+        stream.__enter__.return_value = stream
+        blocks = iter(np.split(samples.reshape(-1, 1), len(samples) // 1600))
+        stream.read.side_effect = lambda frames: (next(blocks), False)
+        return AudioCapture(duration=len(samples) / 16000, threshold=0.01, echo_guard=guard,
+                            stream_factory=lambda **kwargs: stream)
+
+    def test_gates_echo_but_not_barge_in(self):
+        guard = EchoGuard(margin=4.0)
+        guard.playback_started("Executing zoom in.")
+        # Speaker bleed at 2x the VAD threshold: muted, and counted as an ASR call saved
+        echo = np.full(16000, 0.02, dtype=np.float32)
+        self.assertIsNone(self._capture(guard, echo).listen_chunk())
+        self.assertEqual(guard.gated, 1)
+        # The user talking over the assistant is well above the margin
+        voice = np.full(16000, 0.1, dtype=np.float32)
+        self.assertIsNotNone(self._capture(guard, voice).listen_chunk())
+        guard.playback_finished()
+        self.assertIsNotNone(self._capture(EchoGuard(), echo).listen_chunk())
+
+    def test_drops_transcripts_of_own_speech(self):
+        guard = EchoGuard(window=4.0)
+        guard.playback_started("Executing zoom in.")
+        guard.playback_finished()
+        self.assertTrue(guard.is_echo(" Executing zoom-in."))
+        # A user repeating the command is not echo
+        self.assertFalse(guard.is_echo("Zoom in."))
+        self.assertFalse(guard.is_echo("Next image."))
+        self.assertEqual(guard.stats()["dropped_transcripts"], 1)
+
+
+class TestVisionBridge(unittest.TestCase):
+
+    def setUp(self):
+        self.bridge = VisionBridge(callback_timeout=0.2)
+        self.zoom = MagicMock(return_value=True)
+        self.bridge.register_vision_callbacks({"zoom_in": self.zoom})
+
+    def test_slow_listener_is_off_the_dispatch_path(self):
+        seen = []
+        self.bridge.register_action_listener(lambda intent, parameters: (time.sleep(0.2), seen.append(intent)))
+        started = time.perf_counter()
+        self.assertEqual(self.bridge.execute_action("ZOOM_IN", {"factor": 1.5}), (True, "Executed ZOOM_IN"))
+        self.assertLess(time.perf_counter() - started, 0.1)
+        # No region given: not passed, so callbacks without that argument still work
+        self.zoom.assert_called_once_with(factor=1.5)
+        self.assertEqual(self.bridge.execute_action("NEXT_IMAGE")[0], True)
+        self.assertTrue(self.bridge.drain_listeners(2.0))
+        self.assertEqual(seen, ["ZOOM_IN", "NEXT_IMAGE"])
+
+    def test_slow_callback_reports_its_real_outcome(self):
+        import asyncio
+        from audio_engine import metrics
+        slow = metrics.ACTIONS.labels("ZOOM_IN", "slow")
+        before = slow.value()
+        # Past callback_timeout the display still zooms: the action reports that, and counts as slow
+        self.zoom.side_effect = lambda **kwargs: time.sleep(0.3) or True
+        self.assertEqual(self.bridge.execute_action("ZOOM_IN"), (True, "Executed ZOOM_IN"))
+        self.zoom.side_effect = lambda **kwargs: time.sleep(0.3) or False
+        self.assertEqual(asyncio.run(self.bridge.execute_action_async("ZOOM_IN")), (False, "Failed to execute ZOOM_IN"))
+        self.assertEqual(slow.value() - before, 2)
+        self.zoom.side_effect = None
+        parameters = {"region": "LEFT_REGION", "point": {"x": 0.2, "y": 0.5}}
+        self.assertEqual(asyncio.run(self.bridge.execute_action_async("ZOOM_IN", parameters)), (True, "Executed ZOOM_IN"))
+        self.zoom.assert_called_with(factor=1.2, region="LEFT_REGION", point={"x": 0.2, "y": 0.5})
+        self.assertEqual(asyncio.run(self.bridge.execute_action_async("DANCE"))[0], False)
+
+    def test_callbacks_run_in_order_on_one_thread(self):
+        calls = []
+        self.bridge.register_vision_callbacks({
+            "zoom_in": lambda factor: calls.append((factor, threading.current_thread().name)) or True})
+        threads = [threading.Thread(target=self.bridge.execute_action, args=("ZOOM_IN", {"factor": i}))
+                   for i in range(8)]
+        for t in threads:
+            t.start()
+            t.join()
+        self.assertEqual([factor for factor, _ in calls], list(range(8)))
+        self.assertEqual(len({name for _, name in calls}), 1)
+        self.assertTrue(calls[0][1].startswith("BridgeCallback"))
+
+    def test_hung_callback_fails_later_actions_fast_as_busy(self):
+        import asyncio
+        release = threading.Event()
+        bridge = VisionBridge(callback_timeout=0.05)
+        bridge.register_vision_callbacks({"zoom_in": lambda **kwargs: release.wait()})
+        scroll = MagicMock(return_value=True)
+        bridge.register_vision_callbacks({"scroll": scroll}, blocking=False)
+        results = []
+        hung = threading.Thread(target=lambda: results.append(bridge.execute_action("ZOOM_IN")))
+        hung.start()
+        try:
+            time.sleep(0.1)
+            # The callback thread is stuck past the timeout: nothing more is queued behind it
+            started = time.perf_counter()
+            self.assertEqual(bridge.execute_action("ZOOM_IN"), (False, "Vision system busy, ZOOM_IN not executed"))
+            self.assertEqual(asyncio.run(bridge.execute_action_async("ZOOM_IN"))[1],
+                             "Vision system busy, ZOOM_IN not executed")
+            self.assertLess(time.perf_counter() - started, 0.04)
+            # Non-blocking callbacks run inline on the caller's thread regardless
+            scroll.side_effect = lambda **kwargs: threading.current_thread() is threading.main_thread()
+            self.assertEqual(bridge.execute_action("SCROLL_LEFT"), (True, "Executed SCROLL_LEFT"))
+            self.assertEqual(asyncio.run(bridge.execute_action_async("SCROLL_UP")), (True, "Executed SCROLL_UP"))
+        finally:
+            release.set()
+        hung.join(2.0)
+        # The hung action reports what its callback finally returned
+        self.assertEqual(results, [(True, "Executed ZOOM_IN")])
+        bridge.register_vision_callbacks({"zoom_in": lambda **kwargs: True})
+        self.assertEqual(bridge.execute_action("ZOOM_IN"), (True, "Executed ZOOM_IN"))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,660 @@
+import unittest
+from unittest.mock import MagicMock
+import asyncio
+import sys
+import threading
+import time
+import numpy as np
+
+# Mock dependencies BEFORE importing our modules
+sys.modules["mediapipe"] = MagicMock()
+sys.modules["mediapipe.python"] = MagicMock()
+sys.modules["mediapipe.python.solutions"] = MagicMock()
+
+from audio_engine.vision_manager import VisionManager
+from audio_engine.vision_process import EXIT_SOURCE_FAILED, ProcessVisionManager, SharedStateRing, record_to_snapshot
+from audio_engine.vision_snapshot import EMPTY_SNAPSHOT
+from audio_engine.gesture_events import GestureEventDetector, GestureEventQueue
+from audio_engine.gesture_recognizer import GestureRecognizer
+from benchmarks.head_pose import synthetic_landmarks
+from audio_engine.head_pose import HeadPoseTracker
+from audio_engine.gaze_calibration import CalibrationSession, GazeCalibration, GazeProfileStore, gaze_inputs
+from audio_engine.fusion_engine import FusionEngine
+from audio_engine.image_view import ImageView
+from audio_engine.annotation_store import HIGHLIGHT, AnnotationStore, GridIndex
+from audio_engine.frame_sources import FrameSource, ImageDirectorySource, SyntheticSource, create_source
+from audio_engine.session_recorder import FUSION, SessionReader, SessionRecorder, replay_vision
+from audio_engine.vision_stream import VisionPublisher, VisionSubscription
+from audio_engine.action_coalescer import ActionCoalescer
+
+class TestVisionSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.vm = VisionManager()
+        # The mocked MediaPipe models are shared by every VisionManager
+        self.vm.face_mesh.process.reset_mock()
+        # No face or hand in view
+        empty = MagicMock(multi_face_landmarks=None, multi_hand_landmarks=None)
+        self.vm.face_mesh.process.return_value = empty
+        self.vm.hands.process.return_value = empty
+        self.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def test_sequence_increases_per_frame(self):
+        self.assertEqual(self.vm.get_snapshot().seq, 0)
+        self.vm._process_frame(self.frame)
+        self.vm._process_frame(self.frame)
+        self.assertEqual(self.vm.get_snapshot().seq, 2)
+        self.assertEqual(self.vm.get_state()["seq"], 2)
+
+    def test_get_state_is_independent_copy(self):
+        self.vm._process_frame(self.frame)
+        state = self.vm.get_state()
+        state["hand"]["gesture"] = "SWIPE_LEFT"
+        self.assertEqual(self.vm.get_state()["hand"]["gesture"], "NONE")
+
+    def test_wait_for_snapshot(self):
+        self.assertIsNone(self.vm.wait_for_snapshot(0, timeout=0.01))
+
+        timer = threading.Timer(0.05, self.vm._process_frame, args=(self.frame,))
+        timer.start()
+        snapshot = self.vm.wait_for_snapshot(0, timeout=2.0)
+        timer.join()
+        self.assertIsNotNone(snapshot)
+        self.assertEqual(snapshot.seq, 1)
+
+    def test_gaze_runs_at_background_rate_until_boosted(self):
+        vm = VisionManager(gaze_background_hz=1.0)
+        vm.face_mesh.process.return_value = self.vm.face_mesh.process.return_value
+        vm.hands.process.return_value = self.vm.hands.process.return_value
+        for _ in range(5):
+            vm._process_frame(self.frame)
+        self.assertEqual((vm.frames, vm.gaze_frames), (5, 1))
+        self.assertEqual(vm.face_mesh.process.call_count, 1)
+
+        boost = vm.boost_gaze(5.0)
+        for _ in range(3):
+            vm._process_frame(self.frame)
+        self.assertEqual(vm.gaze_frames, 4)
+
+        vm.release_gaze(boost)
+        vm._process_frame(self.frame)
+        self.assertEqual(vm.gaze_frames, 4)
+
+    def test_fps_is_smoothed(self):
+        for _ in range(50):
+            self.vm._last_frame_time = time.time() - 1 / 30
+            self.vm._process_frame(self.frame)
+        self.assertAlmostEqual(self.vm.get_snapshot().fps, 30.0, delta=2.0)
+        # One frame after a 1 s stall moves the average, not down to 1 FPS
+        self.vm._last_frame_time = time.time() - 1.0
+        self.vm._process_frame(self.frame)
+        self.assertGreater(self.vm.get_snapshot().fps, 5.0)
+
+    def test_gaze_boost_is_on_the_wall_clock_for_media_timestamps(self):
+        vm = VisionManager(gaze_background_hz=1.0)
+        vm.face_mesh.process.return_value = self.vm.face_mesh.process.return_value
+        vm.hands.process.return_value = self.vm.hands.process.return_value
+        # A replayed file stamps frames on its media clock, far from time.time()
+        for timestamp in (1.0, 1.5):
+            vm._process_frame(self.frame, timestamp)
+        self.assertEqual(vm.gaze_frames, 1)
+
+        # Boosted for every frame, even with media time past the wall-clock deadline
+        boost = vm.boost_gaze(0.2)
+        for i in range(3):
+            vm._process_frame(self.frame, 3e9 + i / 30)
+        self.assertEqual(vm.gaze_frames, 4)
+        # Ends when its wall-clock duration is up
+        time.sleep(0.25)
+        vm._process_frame(self.frame, 3e9 + 0.1)
+        self.assertEqual(vm.gaze_frames, 4)
+        vm.release_gaze(boost)
+
+    def test_overlapping_utterances_keep_their_own_boost(self):
+        vm = VisionManager(gaze_background_hz=1.0)
+        vm.face_mesh.process.return_value = self.vm.face_mesh.process.return_value
+        vm.hands.process.return_value = self.vm.hands.process.return_value
+        vm._process_frame(self.frame)
+        # Utterance N is being fused while N+1's speech onset has already boosted gaze
+        first = vm.boost_gaze(5.0)
+        second = vm.boost_gaze(5.0)
+        vm.release_gaze(first)
+        for _ in range(3):
+            vm._process_frame(self.frame)
+        self.assertEqual(vm.gaze_frames, 4)
+        vm.release_gaze(second)
+        vm._process_frame(self.frame)
+        self.assertEqual(vm.gaze_frames, 4)
+
+        # Same for the worker process: the ring carries the latest live deadline
+        pvm = ProcessVisionManager()
+        pvm._ring = MagicMock(gaze_boost_until=0.0)
+        first, second = pvm.boost_gaze(5.0), pvm.boost_gaze(8.0)
+        pvm.release_gaze(second)
+        self.assertGreater(pvm._ring.gaze_boost_until, 0.0)
+        pvm.release_gaze(first)
+        self.assertEqual(pvm._ring.gaze_boost_until, 0.0)
+
+class TestSharedStateRing(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = SharedStateRing(capacity=4, create=True)
+        self.reader = SharedStateRing(name=self.writer.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def test_reader_sees_latest_record(self):
+        self.assertIsNone(self.reader.read_latest())
+        vm = VisionManager()
+        base = vm.get_snapshot()
+        for seq in range(1, 4):
+            self.writer.write(base._replace(seq=seq, gesture="SWIPE_LEFT", cursor=(seq, 7)))
+        snapshot = record_to_snapshot(self.reader.read_latest())
+        self.assertEqual(snapshot.seq, 3)
+        self.assertEqual(snapshot.gesture, "SWIPE_LEFT")
+        self.assertEqual(snapshot.cursor, (3, 7))
+
+    def test_lapped_records_are_rejected(self):
+        base = VisionManager().get_snapshot()
+        landmarks = np.ones((21, 3), dtype=np.float32)
+        for seq in range(1, 7):
+            self.writer.write(base._replace(seq=seq, hand_present=True), landmarks)
+        self.assertIsNone(self.reader.read(2))
+        record = self.reader.read(6)
+        self.assertTrue(record["has_landmarks"])
+        self.assertTrue(record_to_snapshot(record).hand_present)
+        np.testing.assert_array_equal(record["hand_landmarks"], landmarks)
+
+class TestGestureEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = GestureEventQueue(maxsize=32)
+        self.detector = GestureEventDetector(self.queue, pinch_threshold=10.0, pinch_release_frames=2)
+        self.seq = 0
+
+    def _feed(self, **fields):
+        self.seq += 1
+        self.detector.feed(EMPTY_SNAPSHOT._replace(seq=self.seq, timestamp=float(self.seq), **fields))
+
+    def _drain(self):
+        events = []
+        while True:
+            event = self.queue.get(timeout=0)
+            if event is None:
+                return events
+            events.append(event)
+
+    def test_single_frame_swipe_is_not_missed(self):
+        self._feed(pose="OPEN_PALM")
+        self._feed(pose="OPEN_PALM", gesture="SWIPE_RIGHT")
+        self._feed(pose="OPEN_PALM")
+        types = [e.type for e in self._drain()]
+        self.assertEqual(types, ["POSE_CHANGE", "SWIPE_START", "SWIPE_END"])
+
+    def test_pinch_lifecycle(self):
+        self._feed(pose="L_SHAPE", pinch_delta=15.0)
+        self._feed(pose="L_SHAPE", pinch_delta=12.0)
+        self._feed(pose="L_SHAPE", pinch_delta=1.0)
+        self._feed(pose="L_SHAPE", pinch_delta=0.0)
+        events = [e for e in self._drain() if e.type.startswith("PINCH")]
+        self.assertEqual([e.type for e in events], ["PINCH_BEGIN", "PINCH_UPDATE", "PINCH_END"])
+        self.assertEqual(events[1].data["delta"], 12.0)
+        self.assertEqual(events[1].timestamp, 2.0)
+
+    def test_queue_drops_oldest_when_full(self):
+        queue = GestureEventQueue(maxsize=2)
+        for seq in range(3):
+            queue.put(("EVENT", seq))
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual(queue.get(timeout=0), ("EVENT", 1))
+
+    def test_async_subscription(self):
+        async def receive():
+            subscription = self.queue.subscribe()
+            self._feed(pose="FIST")
+            return await asyncio.wait_for(subscription.get(), timeout=1.0)
+
+        event = asyncio.run(receive())
+        self.assertEqual(event.type, "POSE_CHANGE")
+        self.assertEqual(event.data["pose"], "FIST")
+
+class TestGestureRecognizer(unittest.TestCase):
+
+    def _run(self, fps, travel, duration=0.4):
+        """Hold still for 0.5 s, move the hand `travel` frame widths in `duration` s, hold again."""
+        rng = np.random.default_rng(0)
+        hand = rng.uniform(-0.03, 0.03, (21, 2))
+        hand[0] = (0.0, 0.0)
+        hand[9] = (0.0, -0.1)
+        recognizer = GestureRecognizer()
+        matches = []
+        for i in range(int(1.5 * fps)):
+            t = i / fps
+            u = min(max((t - 0.5) / duration, 0.0), 1.0)
+            pts = hand + (0.3 + travel * u, 0.5) + rng.normal(0, 0.002, hand.shape)
+            recognizer.push(pts, t)
+            match = recognizer.match()
+            if match:
+                matches.append(match[0])
+        return matches
+
+    def test_swipe_independent_of_frame_rate(self):
+        for fps in (15, 30, 60):
+            self.assertEqual(self._run(fps, 0.3), ["SWIPE_RIGHT"], f"fps={fps}")
+            self.assertEqual(self._run(fps, -0.3), ["SWIPE_LEFT"], f"fps={fps}")
+
+    def test_small_or_slow_motion_is_ignored(self):
+        self.assertEqual(self._run(30, 0.0), [])
+        self.assertEqual(self._run(30, 0.05), [])
+        self.assertEqual(self._run(30, 0.3, duration=1.0), [])
+
+class TestHeadPoseTracker(unittest.TestCase):
+
+    def test_tracks_yaw_at_any_frame_size(self):
+        for width, height in ((640, 480), (1920, 1080)):
+            tracker = HeadPoseTracker()
+            data = synthetic_landmarks(300, width, height, noise=1.0)
+            for t, truth, pts in data:
+                yaw = tracker.update(pts, width, height, t)[0]
+            self.assertAlmostEqual(yaw, truth, delta=1.5)
+
+    def test_label_does_not_flicker_at_threshold(self):
+        tracker = HeadPoseTracker()
+        labels = []
+        # First half of the synthetic run holds yaw right at the old 6 degree threshold
+        for t, _, pts in synthetic_landmarks(600, 640, 480, noise=1.0)[:300]:
+            tracker.update(pts, 640, 480, t)
+            labels.append(tracker.label)
+        self.assertLessEqual(sum(a != b for a, b in zip(labels, labels[1:])), 1)
+
+    def test_static_face_skips_solve(self):
+        tracker = HeadPoseTracker()
+        t, _, pts = synthetic_landmarks(1, 640, 480, noise=0.0)[0]
+        for i in range(10):
+            tracker.update(pts.copy(), 640, 480, t + i / 30.0)
+        self.assertEqual(tracker.solves, 1)
+        self.assertEqual(tracker.skips, 9)
+
+class TestGazeCalibration(unittest.TestCase):
+
+    def _samples(self, n=200, seed=0):
+        rng = np.random.default_rng(seed)
+        iris = rng.uniform(0.3, 0.7, size=(n, 2))
+        yaw = rng.uniform(-20, 20, size=n)
+        pitch = rng.uniform(-10, 10, size=n)
+        inputs = np.stack([gaze_inputs(l, r, y, p) for (l, r), y, p in zip(iris, yaw, pitch)])
+        # Known smooth map from the inputs to the viewport
+        x = 0.5 + 1.5 * (inputs[:, 0] + inputs[:, 1] - 1.0) + 0.3 * inputs[:, 2]
+        y = 0.5 + 0.8 * inputs[:, 3] + 0.2 * inputs[:, 2] ** 2
+        return inputs, np.clip(np.stack([x, y], axis=1), 0.0, 1.0)
+
+    def test_fit_recovers_mapping(self):
+        inputs, targets = self._samples()
+        calibration = GazeCalibration.fit(inputs, targets)
+        self.assertLess(calibration.rms_error, 0.05)
+
+        test_inputs, test_targets = self._samples(50, seed=1)
+        predicted = calibration.apply_many(test_inputs)
+        self.assertLess(np.abs(predicted - test_targets).mean(), 0.05)
+        self.assertTrue(np.allclose(calibration.apply(test_inputs[0]), predicted[0]))
+
+    def test_session_needs_enough_targets(self):
+        session = CalibrationSession(min_targets=3)
+        session.add((0.1, 0.1), np.zeros(4))
+        with self.assertRaises(ValueError):
+            session.fit()
+
+    def test_profile_store_round_trip(self):
+        import tempfile
+        inputs, targets = self._samples()
+        calibration = GazeCalibration.fit(inputs, targets)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = GazeProfileStore(tmp)
+            self.assertIsNone(store.load("dr_smith"))
+            store.save("dr_smith", calibration)
+            self.assertEqual(store.profiles(), ["dr_smith"])
+            loaded = store.load("dr_smith")
+            self.assertTrue(np.allclose(loaded.coeffs, calibration.coeffs))
+            with self.assertRaises(ValueError):
+                store.load("../etc/passwd")
+
+    def test_fusion_uses_calibrated_point(self):
+        inputs, targets = self._samples()
+        vm = VisionManager()
+        vm.set_gaze_calibration(GazeCalibration.fit(inputs, targets))
+        face = MagicMock()
+        face.landmark = [MagicMock(x=0.5, y=0.5) for _ in range(478)]
+        vm.face_mesh.process.return_value = MagicMock(multi_face_landmarks=[face])
+        vm.hands.process.return_value = MagicMock(multi_hand_landmarks=None)
+        vm._head_pose.update = MagicMock(return_value=(0.0, 0.0, 0.0))
+        vm._process_frame(np.zeros((48, 64, 3), dtype=np.uint8))
+
+        state = vm.get_state()
+        self.assertIsNotNone(state["gaze"]["point"])
+        fused = FusionEngine().fuse({"intent": "ZOOM_IN", "target": "HERE", "confidence": 0.9}, state)
+        # The calibrated point comes separately; region stays a region name whether calibrated or not
+        self.assertEqual(fused["parameters"]["point"], state["gaze"]["point"])
+        self.assertIn(fused["parameters"]["region"], ("LEFT_REGION", "CENTER", "RIGHT_REGION"))
+
+class TestAnnotationStore(unittest.TestCase):
+
+    def test_grid_nearest_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        centers = rng.uniform(0, 1, (2000, 2))
+        sizes = rng.uniform(0.002, 0.03, (2000, 2))
+        boxes = np.concatenate([centers - sizes, centers + sizes], axis=1)
+        index = GridIndex()
+        for i, box in enumerate(boxes):
+            index.insert(str(i), box)
+
+        for x, y in rng.uniform(-0.1, 1.1, (100, 2)):
+            dx = np.maximum(np.maximum(boxes[:, 0] - x, x - boxes[:, 2]), 0.0)
+            dy = np.maximum(np.maximum(boxes[:, 1] - y, y - boxes[:, 3]), 0.0)
+            _, dist = index.nearest(x, y)
+            self.assertAlmostEqual(dist, np.hypot(dx, dy).min())
+
+    def test_nested_structures_pick_innermost(self):
+        store = AnnotationStore()
+        store.add("ct.png", "liver", (0.2, 0.2, 0.8, 0.8))
+        store.add("ct.png", "lesion", (0.45, 0.45, 0.55, 0.55))
+        store.set_active_image("ct.png")
+        self.assertEqual(store.nearest(0.5, 0.5)[0].label, "lesion")
+        self.assertEqual(store.nearest(0.3, 0.3)[0].label, "liver")
+        self.assertIsNone(store.nearest(0.95, 0.95, max_dist=0.1))
+
+    def test_highlights_restored_per_image(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AnnotationStore(tmp)
+            store.add("a.png", "", (0.1, 0.1, 0.2, 0.2), kind=HIGHLIGHT)
+            self.assertEqual(store.set_active_image("b.png"), [])
+            self.assertEqual(len(store.set_active_image("a.png")), 1)
+            # A fresh store reads them back from disk
+            self.assertEqual(AnnotationStore(tmp).set_active_image("a.png")[0].bbox, (0.1, 0.1, 0.2, 0.2))
+
+    def test_highlight_snaps_to_structure(self):
+        store = AnnotationStore()
+        store.add("ct.png", "lesion", (0.4, 0.4, 0.5, 0.5))
+        store.set_active_image("ct.png")
+        state = EMPTY_SNAPSHOT._replace(user_present=True, hand_present=True, pose="POINT",
+                                        cursor_norm=(0.48, 0.52)).to_dict()
+        fused = FusionEngine(store).fuse({"intent": "HIGHLIGHT", "target": "NONE", "confidence": 0.9}, state)
+        self.assertEqual(fused["action"], "HIGHLIGHT_REGION")
+        self.assertEqual(fused["parameters"]["annotation"]["label"], "lesion")
+        self.assertEqual(fused["parameters"]["bbox"], [0.4, 0.4, 0.5, 0.5])
+        self.assertEqual(fused["parameters"]["image"], "ct.png")
+
+    def test_deictic_targets_follow_zoom_and_pan(self):
+        store = AnnotationStore()
+        store.add("ct.png", "lesion", (0.70, 0.20, 0.80, 0.30))
+        store.add("ct.png", "liver", (0.45, 0.45, 0.55, 0.55))
+        store.set_active_image("ct.png")
+        view = ImageView()
+        engine = FusionEngine(store, view)
+        highlight = {"intent": "HIGHLIGHT", "target": "NONE", "confidence": 0.9}
+        # The fingertip at the viewport center points at the liver while the image fills the screen
+        hand = EMPTY_SNAPSHOT._replace(user_present=True, hand_present=True, cursor_norm=(0.5, 0.5))
+        self.assertEqual(engine.fuse(highlight, hand.to_dict())["parameters"]["annotation"]["label"], "liver")
+
+        # Zoomed 2x and panned so the lesion is under the viewport center
+        view.update([0.5 - 2 * 0.75, 0.5 - 2 * 0.25, 0.5 + 2 * 0.25, 0.5 + 2 * 0.75], "ct.png")
+        fused = engine.fuse(highlight, hand.to_dict())
+        self.assertEqual(fused["parameters"]["annotation"]["label"], "lesion")
+        self.assertEqual(fused["parameters"]["bbox"], [0.7, 0.2, 0.8, 0.3])
+
+        # Calibrated gaze at the same screen point resolves the same structure
+        gaze = EMPTY_SNAPSHOT._replace(user_present=True, gaze_point=(0.5, 0.5))
+        fused = engine.fuse({"intent": "ZOOM_IN", "target": "HERE", "confidence": 0.9}, gaze.to_dict())
+        self.assertEqual(fused["parameters"]["annotation"]["label"], "lesion")
+        self.assertEqual(fused["parameters"]["point"], {"x": 0.5, "y": 0.5})
+        self.assertEqual(fused["parameters"]["region"], "CENTER")
+
+        # Without a hand in view its stale cursor is ignored: gaze is used instead
+        stale = gaze._replace(cursor_norm=(0.0, 0.0))
+        fused = engine.fuse(highlight, stale.to_dict())
+        self.assertEqual(fused["parameters"]["annotation"]["label"], "lesion")
+        self.assertIn("gaze", fused["reason"])
+        # ... and with neither, or with the pointer off the image, nothing is highlighted
+        self.assertEqual(engine.fuse(highlight, stale._replace(gaze_point=None).to_dict())["status"], "REJECTED")
+        view.update([0.6, 0.6, 1.0, 1.0], "ct.png")
+        self.assertEqual(engine.fuse(highlight, hand.to_dict())["status"], "REJECTED")
+
+class TestFrameSources(unittest.TestCase):
+
+    def test_synthetic_source_is_deterministic(self):
+        a, b = SyntheticSource(64, 48, frames=3), SyntheticSource(64, 48, frames=3)
+        a.open(); b.open()
+        for i in range(3):
+            ok_a, frame_a, t_a = a.read()
+            ok_b, frame_b, _ = b.read()
+            self.assertTrue(ok_a and ok_b)
+            self.assertTrue(np.array_equal(frame_a, frame_b))
+            if i:
+                self.assertAlmostEqual(t_a - prev, 1.0 / 30.0)
+            prev = t_a
+        self.assertFalse(a.read()[0])
+
+    def test_image_directory_source(self):
+        import cv2, tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(3):
+                cv2.imwrite(f"{tmp}/{i:03d}.png", np.full((8, 8, 3), i * 50, dtype=np.uint8))
+            source = ImageDirectorySource(tmp, realtime=False)
+            self.assertTrue(source.open())
+            values = [source.read()[1][0, 0, 0] for _ in range(3)]
+            self.assertEqual(values, [0, 50, 100])
+            self.assertFalse(source.read()[0])
+
+    def test_create_source_spec(self):
+        source = create_source("synthetic:320x240@15")
+        self.assertEqual((source.width, source.height, source.fps), (320, 240, 15.0))
+        with self.assertRaises(ValueError):
+            create_source("webcam:1")
+
+    def test_spec_string_keeps_realtime_and_loop(self):
+        vm = VisionManager(source="images:/frames", realtime=False, loop=True)
+        source = vm._make_source()
+        self.assertEqual((source.realtime, source.loop), (False, True))
+        vm.set_source("video:/clip.mp4", realtime=True)
+        source = vm._make_source()
+        self.assertEqual((source.realtime, source.loop), (True, True))
+
+    def test_vision_loop_runs_without_camera(self):
+        vm = VisionManager(source=SyntheticSource(64, 48, frames=5))
+        empty = MagicMock(multi_face_landmarks=None, multi_hand_landmarks=None)
+        vm.face_mesh.process.return_value = empty
+        vm.hands.process.return_value = empty
+        vm.start()
+        vm.thread.join(timeout=5.0)
+        self.assertFalse(vm.running)
+        self.assertEqual(vm.get_snapshot().seq, 5)
+        self.assertFalse(vm.source_failed)
+
+    def test_live_source_failure_restarts_the_worker(self):
+        class UnpluggedCamera(FrameSource):
+            live = True
+
+            def read(self, out=None):
+                return False, None, 0.0
+
+        vm = VisionManager(source=UnpluggedCamera())
+        vm.running = True
+        vm._run_loop()
+        self.assertTrue(vm.source_failed)
+        vm.set_source(MagicMock(open=MagicMock(return_value=False)))
+        vm._run_loop()
+        self.assertTrue(vm.source_failed)
+
+        # The worker exits non-zero on a failed camera and is restarted; exit 0 (source ended) stops vision
+        pvm = ProcessVisionManager(restart_delay=0.0)
+        pvm._ring = MagicMock(latest_seq=0)
+        pvm._process = MagicMock(exitcode=EXIT_SOURCE_FAILED, **{"is_alive.return_value": False})
+        ended = MagicMock(exitcode=0, **{"is_alive.return_value": False})
+        pvm._spawn_worker = MagicMock(side_effect=lambda: setattr(pvm, "_process", ended))
+        pvm.running = True
+        pvm._pump_loop()
+        self.assertEqual((pvm.restarts, pvm._spawn_worker.call_count), (1, 1))
+        self.assertFalse(pvm.running)
+
+class TestSessionRecorder(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = f"{self.tmp.name}/session.ztrec"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _vision_manager(self):
+        vm = VisionManager(gaze_background_hz=None)
+        vm._head_pose.update = MagicMock(return_value=(0.0, 0.0, 0.0))
+        return vm
+
+    def test_round_trip(self):
+        recorder = SessionRecorder(self.path, frame_rows=8)
+        audio = np.linspace(-0.5, 0.5, 1000, dtype=np.float32)
+        recorder.record_audio(10.0, audio, 16000)
+        recorder.record_event(FUSION, {"action": "ZOOM_IN", "parameters": {"region": "LEFT_REGION"}}, 11.0)
+        for i in range(20):
+            recorder.record_state(EMPTY_SNAPSHOT._replace(seq=i + 1, timestamp=float(i)))
+        recorder.close()
+
+        reader = SessionReader(self.path)
+        self.assertEqual(len(reader.states), 20)
+        self.assertEqual(reader.state_at(4.5).seq, 5)
+        (t, rate, samples), = list(reader.audio_chunks())
+        self.assertEqual((t, rate), (10.0, 16000))
+        self.assertTrue(np.allclose(samples, audio, atol=1e-4))
+        self.assertEqual(reader.events(FUSION)[0][2]["action"], "ZOOM_IN")
+
+    def test_oversized_audio_spans_pooled_buffers(self):
+        recorder = SessionRecorder(self.path, audio_samples=1000, pool=4)
+        short = np.full(300, 0.1, dtype=np.float32)
+        long = np.linspace(-0.5, 0.5, 2500, dtype=np.float32)
+        recorder.record_audio(1.0, short, 16000)
+        recorder.record_audio(2.0, long, 16000)
+        # More than the whole pool can hold: dropped and counted rather than allocated
+        recorder.record_audio(3.0, np.zeros(10000, dtype=np.float32), 16000)
+        self.assertEqual(recorder.dropped, {"audio": 10000})
+        recorder.close()
+
+        chunks = list(SessionReader(self.path).audio_chunks())
+        self.assertEqual([t for t, _, _ in chunks], [1.0, 2.0])
+        self.assertTrue(np.allclose(chunks[0][2], short, atol=1e-4))
+        self.assertTrue(np.allclose(chunks[1][2], long, atol=1e-4))
+
+    def test_truncated_tail_is_ignored(self):
+        recorder = SessionRecorder(self.path)
+        recorder.record_state(EMPTY_SNAPSHOT._replace(seq=1))
+        recorder.close()
+        with open(self.path, "ab") as f:
+            f.write(b"ZTRC" + b"\x00" * 10)
+        self.assertEqual(len(SessionReader(self.path).states), 1)
+
+    def test_replay_reproduces_live_states(self):
+        # Live: a hand moving across the frame
+        live = self._vision_manager()
+        live.recorder = SessionRecorder(self.path)
+        live.face_mesh.process.return_value = MagicMock(multi_face_landmarks=None)
+        hand = MagicMock()
+        snapshots = []
+        for i in range(10):
+            hand.landmark = [MagicMock(x=0.2 + 0.05 * i + 0.01 * k, y=0.5, z=0.0) for k in range(21)]
+            live.hands.process.return_value = MagicMock(multi_hand_landmarks=[hand])
+            live._process_frame(np.zeros((48, 64, 3), dtype=np.uint8), timestamp=float(i) / 30)
+            snapshots.append(live.get_snapshot())
+        live.recorder.close()
+
+        replayed = replay_vision(SessionReader(self.path), self._vision_manager())
+        self.assertEqual([s.cursor for s in replayed], [s.cursor for s in snapshots])
+        self.assertEqual([s.pose for s in replayed], [s.pose for s in snapshots])
+
+class _StreamClient:
+    """Stands in for a ws_hub.HubClient: records sends, one pending vision message at a time."""
+    def __init__(self):
+        self.closed = False
+        self.sent = []
+        self.waiting = False
+
+    def pending(self, key):
+        return self.waiting
+
+    def send(self, payload, policy=None, key=None):
+        self.sent.append(payload)
+
+
+class TestVisionStream(unittest.TestCase):
+
+    def test_full_snapshot_then_thresholded_deltas(self):
+        current = [EMPTY_SNAPSHOT._replace(seq=1, cursor=(100, 100), yaw=0.0)]
+        publisher = VisionPublisher(lambda: current[0], max_hz=30.0)
+        client = _StreamClient()
+        # As subscribe() registers it, without starting the publishing task
+        publisher._subscriptions[id(client)] = VisionSubscription(client, 10.0, publisher.thresholds)
+
+        publisher.tick(0.0)
+        self.assertEqual(client.sent[0]["type"], "VISION_STATE")
+        self.assertEqual(client.sent[0]["state"]["hand"]["cursor"], [100, 100])
+
+        # Cursor jitter under 4 px and yaw under 1 degree: nothing to send
+        current[0] = current[0]._replace(seq=2, cursor=(102, 99), yaw=0.4)
+        publisher.tick(0.2)
+        self.assertEqual(len(client.sent), 1)
+
+        # Drift is measured from the value last sent, so it is sent once it accumulates
+        current[0] = current[0]._replace(seq=3, cursor=(105, 99), yaw=0.6, eye="LEFT")
+        publisher.tick(0.4)
+        delta = client.sent[1]
+        self.assertEqual(delta["type"], "VISION_DELTA")
+        self.assertEqual((delta["seq"], delta["base"]), (3, 1))
+        self.assertEqual(delta["changes"], {"gaze.eye": "LEFT", "hand.cursor": [105, 99]})
+
+        # Not due yet at the client's 10 Hz, then held back while its previous message is unsent
+        current[0] = current[0]._replace(seq=4, eye="RIGHT")
+        publisher.tick(0.45)
+        client.waiting = True
+        publisher.tick(0.6)
+        self.assertEqual(len(client.sent), 2)
+        client.waiting = False
+        publisher.tick(0.7)
+        self.assertEqual(client.sent[2]["changes"], {"gaze.eye": "RIGHT"})
+        self.assertEqual(client.sent[2]["base"], 3)
+
+class TestActionCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.executed = []
+        self.actions = ActionCoalescer(lambda intent, parameters: self.executed.append((intent, parameters)),
+                                       window=0.1, max_rate=4.0, clock=lambda: self.now)
+
+    def test_merges_zoom_at_capped_rate(self):
+        # 30 fps pinch for one second: 1.05x per frame
+        for frame in range(30):
+            self.now = frame / 30
+            self.actions.poll()
+            self.actions.submit("ZOOM_IN", {"factor": 1.05})
+        self.actions.submit("ZOOM_OUT", {"factor": 1 / 1.05})
+        self.actions.flush()
+        self.assertLessEqual(len(self.executed), 5)
+        self.assertEqual({intent for intent, _ in self.executed}, {"ZOOM_IN"})
+        total = np.prod([p["factor"] for _, p in self.executed])
+        self.assertAlmostEqual(total, 1.05 ** 29)
+
+    def test_scrolls_sum_and_order_is_kept(self):
+        self.actions.submit("SCROLL_LEFT", {"amount": 50})
+        self.actions.submit("SCROLL_RIGHT", {"amount": 20})
+        self.actions.submit("SCROLL_DOWN")
+        self.assertEqual(self.executed, [])
+        self.assertAlmostEqual(self.actions.wait_time(1.0), 0.1)
+        # Any other intent flushes what is pending first
+        self.actions.submit("NEXT_IMAGE")
+        self.assertEqual(self.executed, [("SCROLL_LEFT", {"amount": 30}), ("SCROLL_DOWN", {"amount": 50}),
+                                         ("NEXT_IMAGE", {})])
+
+
+if __name__ == "__main__":
+    unittest.main()